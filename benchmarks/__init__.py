@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+
+"""An `airspeed velocity <https://asv.readthedocs.io>`_ suite for Bio2BEL PhosphoSitePlus.
+
+Every benchmark runs on synthetic data sets with the same columns as the real ones, written by
+:func:`bio2bel_phosphosite.synthetic.write_synthetic_release`, and on SQLite, so nothing is downloaded. Run it with::
+
+    $ asv run
+    $ asv continuous master HEAD
+
+The numbers of proteins per species the benchmarks are run at can be set with a comma-separated list in the
+``PHOSPHOSITE_BENCHMARK_SIZES`` environment variable, like ``PHOSPHOSITE_BENCHMARK_SIZES=100,1000,10000``.
+"""
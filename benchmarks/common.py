@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""Synthetic releases and populated databases shared by the benchmarks."""
+
+import json
+import os
+from typing import List, Mapping
+
+from bio2bel_phosphosite import Manager
+from bio2bel_phosphosite.synthetic import write_synthetic_release
+
+__all__ = [
+    'SIZES',
+    'SITES_PER_PROTEIN',
+    'VARIANTS_PER_PROTEIN',
+    'get_release',
+    'get_manager',
+    'get_populated_manager',
+]
+
+
+def _get_sizes() -> List[int]:
+    sizes = os.environ.get('PHOSPHOSITE_BENCHMARK_SIZES', '100,1000')
+    return [int(size) for size in sizes.split(',')]
+
+
+#: The numbers of proteins per species in each synthetic modification site file the benchmarks are run at
+SIZES = _get_sizes()
+
+#: The number of sites per protein in each synthetic modification site file
+SITES_PER_PROTEIN = 10
+
+#: The number of variants per protein in the synthetic PTMVar workbook
+VARIANTS_PER_PROTEIN = 3
+
+
+def get_release(n_proteins: int) -> Mapping[str, str]:
+    """Write a synthetic release of the given size in the current directory, unless it's already there.
+
+    asv runs each benchmark in the directory its ``setup_cache`` ran in, so the release is written once per class.
+
+    :return: The keyword arguments for :meth:`bio2bel_phosphosite.Manager.populate` that load it
+    """
+    directory = os.path.abspath(f'release-{n_proteins}')
+    urls_path = os.path.join(directory, 'urls.json')
+    if os.path.exists(urls_path):
+        with open(urls_path) as file:
+            return json.load(file)
+
+    os.makedirs(directory, exist_ok=True)
+    rv = write_synthetic_release(
+        directory,
+        n_proteins=n_proteins,
+        sites_per_protein=SITES_PER_PROTEIN,
+        variants_per_protein=VARIANTS_PER_PROTEIN,
+    )
+    with open(urls_path, 'w') as file:
+        json.dump(rv, file)
+    return rv
+
+
+def get_manager(path: str) -> Manager:
+    """Get a manager on an SQLite database at the path."""
+    return Manager(connection=f'sqlite:///{os.path.abspath(path)}')
+
+
+def get_populated_manager(n_proteins: int) -> Manager:
+    """Get a manager on a database in the current directory with the synthetic release of the given size loaded."""
+    path = f'populated-{n_proteins}.db'
+    if os.path.exists(path):
+        return get_manager(path)
+
+    urls = get_release(n_proteins)
+    manager = get_manager(path)
+    manager.create_all()
+    manager.populate(**urls)
+    return manager
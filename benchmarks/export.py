@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks for converting a populated database to BEL and summarizing it."""
+
+import os
+
+from bio2bel_phosphosite.export import BEL_FILE_FORMATS
+
+from .common import SIZES, get_populated_manager
+
+
+class _PopulatedSuite:
+    """Populates a database of each size once, in the directory shared by the benchmarks of the class."""
+
+    params = SIZES
+    param_names = ['proteins']
+    timeout = 900
+
+    def setup_cache(self):
+        for n_proteins in SIZES:
+            manager = get_populated_manager(n_proteins)
+            manager.session.close()
+            manager.engine.dispose()
+
+    def setup(self, n_proteins):
+        self.manager = get_populated_manager(n_proteins)
+
+    def teardown(self, n_proteins):
+        self.manager.session.close()
+        self.manager.engine.dispose()
+
+
+class ToBELSuite(_PopulatedSuite):
+    """Build a BEL graph from the whole database and from the human phosphorylations."""
+
+    number = 1
+
+    def time_to_bel(self, n_proteins):
+        self.manager.to_bel()
+
+    def peakmem_to_bel(self, n_proteins):
+        self.manager.to_bel()
+
+    def time_to_bel_filtered(self, n_proteins):
+        self.manager.to_bel(species='human', modification_types='Ph')
+
+    def track_edges(self, n_proteins):
+        return self.manager.to_bel().number_of_edges()
+
+    track_edges.unit = 'edges'
+
+
+class WriteBELSuite(_PopulatedSuite):
+    """Stream the whole database to each BEL file format without building a graph."""
+
+    params = (SIZES, sorted(BEL_FILE_FORMATS))
+    param_names = ['proteins', 'format']
+    number = 1
+
+    def setup(self, n_proteins, file_format):
+        super().setup(n_proteins)
+
+    def teardown(self, n_proteins, file_format):
+        super().teardown(n_proteins)
+
+    def time_write_bel(self, n_proteins, file_format):
+        with open(os.devnull, 'w') as file:
+            self.manager.write_bel(file, fmt=file_format)
+
+    def peakmem_write_bel(self, n_proteins, file_format):
+        with open(os.devnull, 'w') as file:
+            self.manager.write_bel(file, fmt=file_format)
+
+
+class SummarizeSuite(_PopulatedSuite):
+    """Count everything in the database."""
+
+    def time_summarize(self, n_proteins):
+        self.manager.summarize()
+
+    def time_is_populated(self, n_proteins):
+        self.manager.is_populated()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks for looking things up in a populated database and in its site index."""
+
+import random
+from collections import Counter
+
+from bio2bel_phosphosite.models import Mutation, Protein
+from bio2bel_phosphosite.site_index import SiteIndex
+
+from .export import _PopulatedSuite
+
+#: The number of keys each lookup benchmark looks up, or all of them if there are fewer
+N_PROBES = 100
+
+
+class LookupSuite(_PopulatedSuite):
+    """Look up proteins, modifications, and mutations by their keys, a hundred of each."""
+
+    def setup(self, n_proteins):
+        super().setup(n_proteins)
+        rng = random.Random(0)
+        session = self.manager.session
+
+        def sample(population):
+            return rng.sample(population, min(N_PROBES, len(population)))
+
+        self.uniprot_ids = sample([uniprot_id for uniprot_id, in session.query(Protein.uniprot_id)])
+        # O-GalNAc and O-GlcNAc sites are both stored as OGlyco, so a few keys are shared by two modifications
+        modification_keys = Counter(self.manager._iter_modification_rows())
+        self.modification_keys = sample([key for key, count in modification_keys.items() if count == 1])
+        self.mutation_keys = sample(
+            session.query(Protein.uniprot_id, Mutation.from_aa, Mutation.position, Mutation.to_aa).join(Protein).all()
+        )
+
+    def time_get_protein_by_uniprot_id(self, n_proteins):
+        for uniprot_id in self.uniprot_ids:
+            self.manager.get_protein_by_uniprot_id(uniprot_id)
+
+    def time_get_modification(self, n_proteins):
+        for uniprot_id, modification_type, residue, position in self.modification_keys:
+            self.manager.get_modification(uniprot_id, residue, position, modification_type)
+
+    def time_get_mutation(self, n_proteins):
+        for key in self.mutation_keys:
+            self.manager.get_mutation(*key)
+
+
+class SiteIndexSuite(_PopulatedSuite):
+    """Load the in-memory site index and answer window and nearest-site queries in batches."""
+
+    def setup(self, n_proteins):
+        super().setup(n_proteins)
+        self.modifications = self.manager.site_index.modifications
+
+        rng = random.Random(0)
+        uniprot_ids = sorted(self.modifications.uniprot_id_to_code)
+        self.probes = [
+            (rng.choice(uniprot_ids), rng.randint(1, 1000))
+            for _ in range(10000)
+        ]
+
+    def time_load(self, n_proteins):
+        SiteIndex.from_session(self.manager.session)
+
+    def peakmem_load(self, n_proteins):
+        SiteIndex.from_session(self.manager.session)
+
+    def time_within_batch(self, n_proteins):
+        self.modifications.within_batch(self.probes, radius=5)
+
+    def time_nearest_batch(self, n_proteins):
+        self.modifications.nearest_batch(self.probes)
+
+    def time_modifications_near_mutations(self, n_proteins):
+        self.manager.site_index.modifications_near_mutations(radius=5)
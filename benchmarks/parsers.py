@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks for reading and parsing the data sets."""
+
+import collections
+
+from bio2bel_phosphosite.constants import READ_CHUNK_SIZE
+from bio2bel_phosphosite.parsers import (
+    get_disease_associated_sites_df, get_ptmvar_df, get_regulatory_sites_df, parse_mod_rsd,
+    read_modification_site_chunks, read_modification_site_df,
+)
+
+from .common import SIZES, get_release
+
+
+class ModificationSiteSuite:
+    """Read a synthetic phosphorylation site file whole and in chunks, and parse its ``MOD_RSD`` column."""
+
+    params = SIZES
+    param_names = ['proteins']
+    timeout = 300
+
+    def setup_cache(self):
+        for n_proteins in SIZES:
+            get_release(n_proteins)
+
+    def setup(self, n_proteins):
+        self.path = get_release(n_proteins)['phosphorylation_url']
+        self.mod_rsd = read_modification_site_df(self.path).MOD_RSD
+
+    def time_read_df(self, n_proteins):
+        read_modification_site_df(self.path)
+
+    def peakmem_read_df(self, n_proteins):
+        read_modification_site_df(self.path)
+
+    def time_read_chunks(self, n_proteins):
+        collections.deque(read_modification_site_chunks(self.path, chunksize=READ_CHUNK_SIZE), maxlen=0)
+
+    def peakmem_read_chunks(self, n_proteins):
+        collections.deque(read_modification_site_chunks(self.path, chunksize=READ_CHUNK_SIZE), maxlen=0)
+
+    def time_parse_mod_rsd(self, n_proteins):
+        parse_mod_rsd(self.mod_rsd)
+
+
+class OtherDataSetSuite:
+    """Read the synthetic PTMVar workbook and the regulatory and disease-associated site files."""
+
+    params = SIZES
+    param_names = ['proteins']
+    timeout = 300
+
+    def setup_cache(self):
+        for n_proteins in SIZES:
+            get_release(n_proteins)
+
+    def setup(self, n_proteins):
+        self.urls = get_release(n_proteins)
+
+    def time_ptmvar(self, n_proteins):
+        get_ptmvar_df(url=self.urls['ptmvar_url'], cache=False)
+
+    def peakmem_ptmvar(self, n_proteins):
+        get_ptmvar_df(url=self.urls['ptmvar_url'], cache=False)
+
+    def time_regulatory_sites(self, n_proteins):
+        get_regulatory_sites_df(url=self.urls['regulatory_sites_url'], cache=False)
+
+    def time_disease_associated_sites(self, n_proteins):
+        get_disease_associated_sites_df(url=self.urls['disease_associated_sites_url'], cache=False)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks for loading a whole synthetic release into SQLite."""
+
+import os
+
+from .common import SIZES, get_manager, get_release
+
+
+class PopulateSuite:
+    """Populate an empty database from every synthetic data set, in bulk, with the native loader, with the ORM, and
+    filtered.
+    """
+
+    params = SIZES
+    param_names = ['proteins']
+    number = 1
+    repeat = (1, 3, 60.0)
+    timeout = 900
+
+    def setup_cache(self):
+        for n_proteins in SIZES:
+            get_release(n_proteins)
+
+    def setup(self, n_proteins):
+        self.urls = get_release(n_proteins)
+        self.path = f'populate-{n_proteins}.db'
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.manager = get_manager(self.path)
+        self.manager.create_all()
+
+    def teardown(self, n_proteins):
+        self.manager.session.close()
+        self.manager.engine.dispose()
+        os.remove(self.path)
+
+    def time_populate(self, n_proteins):
+        self.manager.populate(**self.urls)
+
+    def peakmem_populate(self, n_proteins):
+        self.manager.populate(**self.urls)
+
+    def time_populate_native(self, n_proteins):
+        self.manager.populate(**self.urls, loader='native')
+
+    def time_populate_orm(self, n_proteins):
+        self.manager.populate(**self.urls, bulk=False)
+
+    def time_populate_filtered(self, n_proteins):
+        self.manager.populate(**self.urls, species='human', modification_types='Ph')
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks for how long importing the package and its command line interface take."""
+
+from bio2bel_phosphosite.benchmark import STARTUP_BASELINE_MODULES, _get_import_time
+
+
+def timeraw_import_package():
+    """Import the package in a new interpreter, like bio2bel does when it looks for its plugins."""
+    return 'import bio2bel_phosphosite'
+
+
+def timeraw_import_cli():
+    """Import the command line interface in a new interpreter, including bio2bel, pandas, and SQLAlchemy."""
+    return 'import bio2bel_phosphosite.cli'
+
+
+def track_cli_import_overhead():
+    """Measure the milliseconds importing the command line interface takes on top of what bio2bel imports."""
+    milliseconds, _ = _get_import_time('bio2bel_phosphosite.cli', baseline=STARTUP_BASELINE_MODULES)
+    return milliseconds
+
+
+track_cli_import_overhead.unit = 'ms'
@@ -28,12 +28,13 @@ INSTALL_REQUIRES = [
     'bio2bel>=0.1.5',
     'click',
     'pandas',
-    'xlrd',
     'tqdm',
 
 ]
 EXTRAS_REQUIRE = {
     'web': ['flask', 'flask-admin'],
+    'cache': ['pyarrow'],
+    'postgres': ['psycopg2'],
 }
 ENTRY_POINTS = {
     'bio2bel': [
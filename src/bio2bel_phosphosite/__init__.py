@@ -1,10 +1,30 @@
 # -*- coding: utf-8 -*-
 
-from . import manager, models
-from .manager import *
-from .models import *
+"""A package for converting PhosphoSitePlus to BEL.
 
-__all__ = (manager.__all__ + models.__all__)
+The manager and models are imported when they're first used, so importing this package, like bio2bel does when it
+looks for its plugins, doesn't import SQLAlchemy, pandas, or PyBEL.
+"""
+
+import importlib
+
+_lazy_attributes = {
+    'Manager': 'manager',
+    'Base': 'models',
+    'Species': 'models',
+    'Protein': 'models',
+    'Modification': 'models',
+    'MutationEffect': 'models',
+    'Mutation': 'models',
+    'ModificationType': 'models',
+    'RegulatorySite': 'models',
+    'RegulatoryEffect': 'models',
+    'DiseaseAssociation': 'models',
+    'Dataset': 'models',
+    'Statistic': 'models',
+}
+
+__all__ = list(_lazy_attributes)
 
 __version__ = '0.0.1-dev'
 
@@ -17,3 +37,18 @@ __email__ = 'charles.hoyt@scai.fraunhofer.de'
 
 __license__ = 'MIT License'
 __copyright__ = 'Copyright (c) 2018 Charles Tapley Hoyt'
+
+
+def __getattr__(name):
+    """Import the manager and models the first time they're used."""
+    module_name = _lazy_attributes.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List the lazily imported attributes along with the ones already loaded."""
+    return sorted(set(globals()) | set(__all__))
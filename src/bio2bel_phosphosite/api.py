@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+
+"""A read-only JSON API for looking up proteins and sites, meant for pipelines rather than people.
+
+The endpoints are:
+
+- ``/api/summary``: the counts of what's in the database, like :meth:`bio2bel_phosphosite.Manager.summarize`
+- ``/api/proteins/<uniprot_id>``: a protein with its modifications and mutations
+- ``/api/proteins?uniprot_id=...``: up to :data:`bio2bel_phosphosite.constants.QUERY_CHUNK_SIZE` proteins at once. The
+  identifier can be given several times or separated by commas.
+- ``/api/proteins/<uniprot_id>/sites/<position>``: the modifications and mutations at a position on a protein
+- ``/api/proteins/<uniprot_id>/window?position=...&radius=...``: the modifications and mutations within ``radius``
+  residues of a position, with their distance from it
+
+The data only changes when the database is populated or updated, so every response gets the same ETag, made from the
+hashes of the loaded data sets and the stored statistics. Requests with a matching ``If-None-Match`` header get an
+empty ``304 Not Modified``, and the rendered responses are kept in a cache that's cleared when the release changes.
+The release is checked again at most every :data:`bio2bel_phosphosite.constants.STATISTICS_CACHE_TTL` seconds.
+
+The app gets its own engine with a pool of connections, and each request thread uses its own session, which is
+removed when the request ends. Run it with the ``serve`` command or any WSGI server, like:
+
+.. code-block:: sh
+
+    gunicorn --threads 8 'bio2bel_phosphosite.api:get_app()'
+
+It needs the web extra:
+
+.. code-block:: sh
+
+    pip install bio2bel_phosphosite[web]
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Any, List, Mapping, Optional, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from .constants import (
+    API_CACHE_MAX_AGE, API_MAX_WINDOW_RADIUS, API_POOL_OVERFLOW, API_POOL_SIZE, API_RESPONSE_CACHE_SIZE,
+    QUERY_CHUNK_SIZE, STATISTICS_CACHE_TTL,
+)
+from .lookup import annotate_proteins, annotation_to_json
+from .manager import Manager
+from .models import Dataset, Statistic
+
+__all__ = [
+    'QueryService',
+    'get_pooled_manager',
+    'get_release',
+    'get_blueprint',
+    'get_app',
+]
+
+log = logging.getLogger(__name__)
+
+
+def get_pooled_manager(connection: Optional[str] = None,
+                       pool_size: int = API_POOL_SIZE,
+                       max_overflow: int = API_POOL_OVERFLOW,
+                       ) -> Manager:
+    """Build a manager whose engine keeps a pool of connections and whose session is local to each thread.
+
+    :param connection: The connection string. Defaults to the usual one for this package.
+    :param pool_size: The number of connections kept open
+    :param max_overflow: The number of connections opened beyond that when they're all in use
+    """
+    connection = Manager._get_connection(connection)
+
+    kwargs = {}
+    if make_url(connection).get_backend_name() == 'sqlite':
+        # connections are handed to other threads by the pool, but only used by one at a time
+        kwargs['connect_args'] = dict(check_same_thread=False)
+
+    engine = create_engine(
+        connection,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=True,
+        **kwargs
+    )
+    session = scoped_session(sessionmaker(bind=engine))
+    return Manager(engine=engine, session=session)
+
+
+def get_release(session) -> str:
+    """Make a tag for the data in the database from the hashes of the loaded data sets and the stored statistics."""
+    checksums = session.query(Dataset.name, Dataset.sha256).order_by(Dataset.name)
+    statistics = session.query(
+        Statistic.name,
+        Statistic.species,
+        Statistic.modification_type,
+        Statistic.residue,
+        Statistic.count,
+    ).order_by(Statistic.name, Statistic.species, Statistic.modification_type, Statistic.residue)
+
+    data = json.dumps([[list(row) for row in checksums], [list(row) for row in statistics]])
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:32]
+
+
+def _site_to_json(site, position: int) -> Mapping[str, Any]:
+    rv = site._asdict()
+    del rv['id'], rv['uniprot_id']
+    rv['distance'] = site.position - position
+    return rv
+
+
+class QueryService:
+    """Answers the queries of the JSON API and keeps the rendered responses for the current release."""
+
+    def __init__(self,
+                 manager: Manager,
+                 cache_size: Optional[int] = API_RESPONSE_CACHE_SIZE,
+                 release_ttl: float = STATISTICS_CACHE_TTL,
+                 ):
+        """Build a query service.
+
+        :param manager: A manager, preferably from :func:`get_pooled_manager` when serving several threads
+        :param cache_size: The number of rendered responses to keep. If none, keeps all of them. If 0, keeps none.
+        :param release_ttl: The number of seconds before checking if the release changed
+        """
+        self.manager = manager
+        self.release_ttl = release_ttl
+
+        self._lock = threading.Lock()
+        self._release = None
+        self._release_expires = 0.0
+        self._endpoints = {
+            'summary': self.get_summary,
+            'protein': self.get_protein,
+            'proteins': self.get_proteins,
+            'site': self.get_site,
+            'window': self.get_window,
+        }
+        self._render = lru_cache(maxsize=cache_size)(self._render_uncached)
+
+    @property
+    def release(self) -> str:
+        """The tag of the data in the database, which is used as the ETag of every response."""
+        now = time.monotonic()
+        if self._release is not None and now < self._release_expires:
+            return self._release
+
+        with self._lock:
+            if self._release is None or self._release_expires <= now:
+                release = get_release(self.manager.session)
+                if release != self._release:
+                    if self._release is not None:
+                        log.info('release changed from %s to %s', self._release, release)
+                        self.manager._clear_caches()
+                    self._render.cache_clear()
+                    self._release = release
+                self._release_expires = now + self.release_ttl
+
+        return self._release
+
+    def preload(self) -> None:
+        """Read the release, statistics, and site index, so the first requests don't wait for them."""
+        t = time.time()
+        with self._lock:
+            self.manager.site_index
+        self.manager.statistics
+        log.info('done preloading release %s in %.2f seconds', self.release, time.time() - t)
+
+    def _get_site_index(self):
+        if self.manager._site_index is None:
+            with self._lock:
+                return self.manager.site_index
+        return self.manager.site_index
+
+    def get_summary(self) -> Mapping[str, Any]:
+        """Summarize the database."""
+        return self.manager.summarize()
+
+    def get_protein(self, uniprot_id: str) -> Optional[Mapping[str, Any]]:
+        """Get a protein with its modifications and mutations, or none if it's not in the database."""
+        annotation = next(annotate_proteins(self.manager, [uniprot_id]))
+        if annotation.found:
+            return annotation_to_json(annotation)
+
+    def get_proteins(self, *uniprot_ids: str) -> Mapping[str, Any]:
+        """Get many proteins with their modifications and mutations, including the ones that aren't in the database."""
+        return dict(proteins=[
+            annotation_to_json(annotation)
+            for annotation in annotate_proteins(self.manager, uniprot_ids)
+        ])
+
+    def get_window(self, uniprot_id: str, position: int, radius: int) -> Mapping[str, Any]:
+        """Get the modifications and mutations within ``radius`` residues of a position on a protein."""
+        site_index = self._get_site_index()
+        return dict(
+            uniprot_id=uniprot_id,
+            position=position,
+            radius=radius,
+            modifications=[
+                _site_to_json(site, position)
+                for site in site_index.modifications.within(uniprot_id, position, radius=radius)
+            ],
+            mutations=[
+                _site_to_json(site, position)
+                for site in site_index.mutations.within(uniprot_id, position, radius=radius)
+            ],
+        )
+
+    def get_site(self, uniprot_id: str, position: int) -> Mapping[str, Any]:
+        """Get the modifications and mutations at a position on a protein."""
+        rv = self.get_window(uniprot_id, position, 0)
+        del rv['radius']
+        return rv
+
+    def _render_uncached(self, release: str, endpoint: str, args: Tuple) -> Tuple[int, bytes]:
+        data = self._endpoints[endpoint](*args)
+        if data is None:
+            return 404, json.dumps(dict(error='not found')).encode('utf-8')
+        return 200, json.dumps(data).encode('utf-8')
+
+    def respond(self, endpoint: str, *args) -> Tuple[int, bytes]:
+        """Get the status and JSON body of a response, reusing it if it was rendered before for the current release.
+
+        :param endpoint: One of ``summary``, ``protein``, ``proteins``, ``site``, or ``window``
+        :param args: The arguments of the method that answers the endpoint, like :meth:`get_window`
+        """
+        return self._render(self.release, endpoint, args)
+
+    def cache_info(self):
+        """Get the hits, misses, and size of the response cache."""
+        return self._render.cache_info()
+
+
+def _respond(service: QueryService, max_age: int, endpoint: str, *args):
+    """Answer the current request with a cached JSON response, or an empty one if the client's copy is current."""
+    from flask import Response, request
+
+    etag = service.release
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        status, body = service.respond(endpoint, *args)
+        response = Response(body, status=status, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+class _InvalidArguments(ValueError):
+    """Raised when the query arguments of a request are missing or out of range."""
+
+
+def _respond_invalid_arguments(exception: _InvalidArguments):
+    """Answer a request whose arguments are invalid with the reason."""
+    from flask import Response
+
+    return Response(json.dumps(dict(error=str(exception))), status=400, mimetype='application/json')
+
+
+def _parse_uniprot_ids(args) -> List[str]:
+    """Get the UniProt identifiers from the ``uniprot_id`` arguments, which can each be separated by commas.
+
+    :param args: The query arguments of the request
+    :raises _InvalidArguments: If there are none, or more than :data:`bio2bel_phosphosite.constants.QUERY_CHUNK_SIZE`
+    """
+    uniprot_ids = [
+        uniprot_id.strip()
+        for value in args.getlist('uniprot_id')
+        for uniprot_id in value.split(',')
+        if uniprot_id.strip()
+    ]
+    if not uniprot_ids:
+        raise _InvalidArguments('give at least one uniprot_id')
+    if QUERY_CHUNK_SIZE < len(uniprot_ids):
+        raise _InvalidArguments(f'give at most {QUERY_CHUNK_SIZE} identifiers')
+    return uniprot_ids
+
+
+def _parse_window(args) -> Tuple[int, int]:
+    """Get the position and radius of a window from the ``position`` and ``radius`` arguments.
+
+    :param args: The query arguments of the request
+    :raises _InvalidArguments: If the position isn't a non-negative integer, or the radius isn't an integer from 0 to
+     :data:`bio2bel_phosphosite.constants.API_MAX_WINDOW_RADIUS`
+    """
+    position = args.get('position', type=int)
+    radius = args.get('radius', default=5, type=int)
+    if position is None or position < 0:
+        raise _InvalidArguments('position must be a non-negative integer')
+    if radius is None or not 0 <= radius <= API_MAX_WINDOW_RADIUS:
+        raise _InvalidArguments(f'radius must be an integer from 0 to {API_MAX_WINDOW_RADIUS}')
+    return position, radius
+
+
+def get_blueprint(service: QueryService, max_age: int = API_CACHE_MAX_AGE):
+    """Build a :class:`flask.Blueprint` with the endpoints of the JSON API, mounted under ``/api``.
+
+    :param service: The service that answers the queries
+    :param max_age: The number of seconds clients can reuse a response before checking its ETag again
+    """
+    from flask import Blueprint, request
+
+    blueprint = Blueprint('phosphosite_api', __name__, url_prefix='/api')
+    blueprint.register_error_handler(_InvalidArguments, _respond_invalid_arguments)
+
+    def respond(endpoint: str, *args):
+        return _respond(service, max_age, endpoint, *args)
+
+    @blueprint.route('/summary')
+    def summary():
+        return respond('summary')
+
+    @blueprint.route('/proteins/<uniprot_id>')
+    def protein(uniprot_id: str):
+        return respond('protein', uniprot_id)
+
+    @blueprint.route('/proteins')
+    def proteins():
+        return respond('proteins', *_parse_uniprot_ids(request.args))
+
+    @blueprint.route('/proteins/<uniprot_id>/sites/<int:position>')
+    def site(uniprot_id: str, position: int):
+        return respond('site', uniprot_id, position)
+
+    @blueprint.route('/proteins/<uniprot_id>/window')
+    def window(uniprot_id: str):
+        return respond('window', uniprot_id, *_parse_window(request.args))
+
+    return blueprint
+
+
+def get_app(connection: Optional[str] = None,
+            pool_size: int = API_POOL_SIZE,
+            max_overflow: int = API_POOL_OVERFLOW,
+            cache_size: Optional[int] = API_RESPONSE_CACHE_SIZE,
+            preload: bool = True,
+            ):
+    """Build a :class:`flask.Flask` application serving the JSON API.
+
+    The service is kept in ``app.extensions['phosphosite_api']``.
+
+    :param connection: The connection string. Defaults to the usual one for this package.
+    :param pool_size: The number of connections kept open
+    :param max_overflow: The number of connections opened beyond that when they're all in use
+    :param cache_size: The number of rendered responses to keep
+    :param preload: If true, reads the site index and statistics before the first request
+    """
+    from flask import Flask
+
+    manager = get_pooled_manager(connection, pool_size=pool_size, max_overflow=max_overflow)
+    service = QueryService(manager, cache_size=cache_size)
+    if preload:
+        service.preload()
+
+    app = Flask(__name__)
+    app.register_blueprint(get_blueprint(service))
+    app.extensions['phosphosite_api'] = service
+
+    @app.teardown_appcontext
+    def remove_session(exception=None):
+        manager.session.remove()
+
+    return app
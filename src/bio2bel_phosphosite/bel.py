@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+
+"""Builders for the BEL nodes and edges of PhosphoSitePlus content.
+
+They work on plain values instead of models, so the export can stream flat rows out of the database without loading
+the related models of every modification and mutation effect.
+
+Adding a node or an edge to a :class:`pybel.BELGraph` hashes its nodes several times, and each hash renders the node
+as a BEL string. The nodes built here remember their BEL string, and a :class:`NodeCache` makes sure each node is only
+built once per export, so each is rendered and hashed once no matter how many edges it's part of.
+"""
+
+from functools import lru_cache
+from typing import List, Mapping, Optional
+
+from pybel import BELGraph
+from pybel.constants import ASSOCIATION, DECREASES, INCREASES, REGULATES
+from pybel.dsl import activity, bioprocess, pathology, pmod, protein, protein_substitution
+from pybel.language import amino_acid_dict
+
+from .constants import NODE_CACHE_SIZE
+
+__all__ = [
+    'NodeCache',
+    'protein_to_bel',
+    'modification_variant',
+    'modification_to_bel',
+    'mutation_to_bel',
+    'split_pmids',
+    'add_modification',
+    'add_mutation_effect',
+    'add_regulatory_effect',
+    'add_disease_association',
+]
+
+#: The name and version of the graph that PhosphoSitePlus is exported to
+BEL_GRAPH_NAME = 'PhosphositePlus Modifications'
+BEL_GRAPH_VERSION = '1.0.0'  # need to get from data source itself
+
+#: The citation and evidence for mutation effects
+MUTATION_EFFECT_CITATION = '15174125'
+MUTATION_EFFECT_EVIDENCE = 'PhosphoSitePlus'
+
+#: The evidence for regulatory effects and disease associations, which are cited by the PubMed identifiers listed
+#: for each of them
+PHOSPHOSITE_EVIDENCE = 'PhosphoSitePlus'
+
+#: The namespace of the functions, processes, and diseases named by PhosphoSitePlus
+PHOSPHOSITE_NAMESPACE = 'phosphositeplus'
+
+#: The relation for each direction of a regulatory effect. Other directions, like 'altered', become regulates.
+_direction_to_relation = {
+    'induced': INCREASES,
+    'inhibited': DECREASES,
+}
+
+
+class _Protein(protein):
+    """A protein that renders itself as BEL, which is also what it's hashed by, only once.
+
+    Like all nodes in a graph, it shouldn't be changed after it's built.
+    """
+
+    def as_bel(self) -> str:  # noqa: D102
+        rv = self.__dict__.get('_bel')
+        if rv is None:
+            rv = self.__dict__['_bel'] = super().as_bel()
+        return rv
+
+
+def protein_to_bel(uniprot_id: str) -> protein:
+    """Build the BEL node for a protein."""
+    return _Protein(
+        namespace='uniprot',
+        name=str(uniprot_id),
+    )
+
+
+def modification_variant(modification_type: str, residue: str, position: int) -> pmod:
+    """Build the BEL variant for a post-translational modification."""
+    return pmod(
+        name=modification_type,
+        position=position,
+        code=amino_acid_dict[residue.upper()],
+    )
+
+
+def modification_to_bel(uniprot_id: str, modification_type: str, residue: str, position: int) -> protein:
+    """Build the BEL node for a protein with a post-translational modification."""
+    return protein_to_bel(uniprot_id).with_variants(modification_variant(modification_type, residue, position))
+
+
+def mutation_to_bel(uniprot_id: str, from_aa: str, position: int, to_aa: str) -> protein:
+    """Build the BEL node for a protein with an amino acid substitution."""
+    return protein_to_bel(uniprot_id).with_variants(protein_substitution(from_aa, position, to_aa))
+
+
+def split_pmids(pmids: Optional[str]) -> List[str]:
+    """Split the semicolon-separated PubMed identifiers listed for a regulatory site or disease association.
+
+    >>> split_pmids('11502751; 9013873;')
+    ['11502751', '9013873']
+    >>> split_pmids(None)
+    []
+    """
+    if not pmids:
+        return []
+    return [pmid.strip() for pmid in pmids.split(';') if pmid.strip()]
+
+
+class NodeCache:
+    """Builds BEL nodes, keeping the most recently used ones of each kind to reuse.
+
+    Proteins are keyed by their UniProt identifier and their variants by the UniProt identifier and the values that
+    make up the variant. Use one per export, so its memory is released when the export is done.
+    """
+
+    def __init__(self, maxsize: Optional[int] = NODE_CACHE_SIZE):
+        """Build a node cache.
+
+        :param maxsize: The number of nodes of each kind to keep. If none, keeps all of them. If 0, keeps none.
+        """
+        self.protein = lru_cache(maxsize=maxsize)(protein_to_bel)
+        self.modification = lru_cache(maxsize=maxsize)(self._build_modification)
+        self.mutation = lru_cache(maxsize=maxsize)(self._build_mutation)
+
+    def _build_modification(self, uniprot_id: str, modification_type: str, residue: str, position: int) -> protein:
+        return self.protein(uniprot_id).with_variants(modification_variant(modification_type, residue, position))
+
+    def _build_mutation(self, uniprot_id: str, from_aa: str, position: int, to_aa: str) -> protein:
+        return self.protein(uniprot_id).with_variants(protein_substitution(from_aa, position, to_aa))
+
+    def cache_info(self) -> Mapping[str, tuple]:
+        """Get the hits, misses, and sizes of the caches for each kind of node."""
+        return dict(
+            protein=self.protein.cache_info(),
+            modification=self.modification.cache_info(),
+            mutation=self.mutation.cache_info(),
+        )
+
+
+#: Builds nodes without keeping them, for when there's no cache for the export
+_uncached = NodeCache(maxsize=0)
+
+
+def add_modification(graph: BELGraph,
+                     uniprot_id: str,
+                     modification_type: str,
+                     residue: str,
+                     position: int,
+                     nodes: Optional[NodeCache] = None,
+                     ) -> str:
+    """Add a modified protein and its parent to the graph.
+
+    :param nodes: The cache of nodes for the current export
+    """
+    if nodes is None:
+        nodes = _uncached
+
+    return graph.add_has_variant(
+        nodes.protein(uniprot_id),
+        nodes.modification(uniprot_id, modification_type, residue, position),
+    )
+
+
+def add_mutation_effect(graph: BELGraph,
+                        mutation_uniprot_id: str,
+                        from_aa: str,
+                        mutation_position: int,
+                        to_aa: str,
+                        modification_uniprot_id: str,
+                        modification_type: str,
+                        residue: str,
+                        modification_position: int,
+                        nodes: Optional[NodeCache] = None,
+                        ) -> str:
+    """Add the association between a mutated protein and a modified protein as an edge.
+
+    :param nodes: The cache of nodes for the current export
+    """
+    if nodes is None:
+        nodes = _uncached
+
+    return graph.add_qualified_edge(
+        u=nodes.mutation(mutation_uniprot_id, from_aa, mutation_position, to_aa),
+        v=nodes.modification(modification_uniprot_id, modification_type, residue, modification_position),
+        relation=REGULATES,
+        evidence=MUTATION_EFFECT_EVIDENCE,
+        citation=MUTATION_EFFECT_CITATION,
+        annotations={
+            'bio2bel': 'phosphositeplus',
+        }
+    )
+
+
+def add_regulatory_effect(graph: BELGraph,
+                          uniprot_id: str,
+                          modification_type: str,
+                          residue: str,
+                          position: int,
+                          category: str,
+                          name: str,
+                          direction: Optional[str],
+                          pmids: Optional[str],
+                          nodes: Optional[NodeCache] = None,
+                          ) -> List[str]:
+    """Add the effect of a modified protein on a molecular function or biological process as one edge per citation.
+
+    A process is a node of its own. A function is what the protein does, so it's the activity of the protein that the
+    edge goes to, like ``act(p(uniprot:P12345), ma(phosphositeplus:"protein degradation"))``.
+
+    :param category: Either ``'function'`` or ``'process'``, which is kept as an annotation
+    :param name: The name of the function or process
+    :param direction: How it's affected, like ``'induced'`` or ``'inhibited'``
+    :param pmids: The semicolon-separated PubMed identifiers of the sources. If there are none, no edges are added.
+    :param nodes: The cache of nodes for the current export
+    :return: The keys of the edges that were added
+    """
+    if nodes is None:
+        nodes = _uncached
+
+    if category == 'function':
+        target = nodes.protein(uniprot_id)
+        object_modifier = activity(name=name, namespace=PHOSPHOSITE_NAMESPACE)
+    else:
+        target = bioprocess(namespace=PHOSPHOSITE_NAMESPACE, name=name)
+        object_modifier = None
+
+    return [
+        graph.add_qualified_edge(
+            u=nodes.modification(uniprot_id, modification_type, residue, position),
+            v=target,
+            relation=_direction_to_relation.get(direction, REGULATES),
+            evidence=PHOSPHOSITE_EVIDENCE,
+            citation=pmid,
+            annotations={
+                'bio2bel': 'phosphositeplus',
+                'category': category,
+            },
+            object_modifier=object_modifier,
+        )
+        for pmid in split_pmids(pmids)
+    ]
+
+
+def add_disease_association(graph: BELGraph,
+                            uniprot_id: str,
+                            modification_type: str,
+                            residue: str,
+                            position: int,
+                            disease: str,
+                            alteration: Optional[str],
+                            pmids: Optional[str],
+                            nodes: Optional[NodeCache] = None,
+                            ) -> List[str]:
+    """Add the association between a modified protein and a disease as one edge per citation.
+
+    :param disease: The name of the disease
+    :param alteration: How the modification is altered in the disease, like ``'increased'``, which is kept as an
+     annotation
+    :param pmids: The semicolon-separated PubMed identifiers of the sources. If there are none, no edges are added.
+    :param nodes: The cache of nodes for the current export
+    :return: The keys of the edges that were added
+    """
+    if nodes is None:
+        nodes = _uncached
+
+    annotations = {'bio2bel': 'phosphositeplus'}
+    if alteration:
+        annotations['alteration'] = alteration
+
+    return [
+        graph.add_qualified_edge(
+            u=nodes.modification(uniprot_id, modification_type, residue, position),
+            v=pathology(namespace=PHOSPHOSITE_NAMESPACE, name=disease),
+            relation=ASSOCIATION,
+            evidence=PHOSPHOSITE_EVIDENCE,
+            citation=pmid,
+            annotations=annotations,
+        )
+        for pmid in split_pmids(pmids)
+    ]
@@ -0,0 +1,1009 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks for the loading procedures, run against synthetic PhosphoSitePlus-shaped data."""
+
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Mapping, Optional, Sequence, TYPE_CHECKING, Tuple
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event
+
+from .export import BEL_FILE_FORMATS
+from .loaders import get_loader
+from .manager import Manager, _ptmvar_rows
+from .models import Modification, Mutation, Protein
+from .parsers import get_phosphorylation_df, get_ptmvar_df
+from .snapshot import Snapshot
+from .synthetic import (
+    MODIFICATION_SITE_DATASET_CODES, write_modification_site_file, write_ptmvar_file, write_synthetic_release,
+)
+
+if TYPE_CHECKING:
+    from pybel import BELGraph
+
+__all__ = [
+    'benchmark_modification_populate',
+    'benchmark_modification_acquisition',
+    'benchmark_ptmvar_parse',
+    'benchmark_bel_export',
+    'benchmark_bel_write',
+    'benchmark_lookups',
+    'benchmark_site_index',
+    'benchmark_filtered',
+    'benchmark_parallel_bel',
+    'benchmark_snapshot',
+    'benchmark_protein_lookup',
+    'benchmark_api',
+    'benchmark_loaders',
+    'benchmark_startup',
+]
+
+
+def _measure(func, *args, **kwargs) -> Mapping[str, float]:
+    """Call the function and return its wall time and peak memory traced by :mod:`tracemalloc`."""
+    tracemalloc.start()
+    t = time.time()
+    try:
+        func(*args, **kwargs)
+        seconds = time.time() - t
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return dict(
+        seconds=seconds,
+        peak_mb=peak / 2 ** 20,
+    )
+
+
+def benchmark_modification_populate(n_proteins: int = 1000,
+                                    sites_per_protein: int = 10,
+                                    batch_size: Optional[int] = None,
+                                    ) -> Mapping[str, Mapping[str, float]]:
+    """Compare the ORM and bulk loading of a synthetic phosphorylation site file into fresh SQLite databases.
+
+    :param n_proteins: The number of proteins per species in the synthetic file
+    :param sites_per_protein: The number of sites per protein in the synthetic file
+    :param batch_size: The batch size for the bulk loader
+    :return: A dictionary from loader name to its measurements
+    """
+    rv = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_modification_site_file(
+            os.path.join(directory, 'Phosphorylation_site_dataset.gz'),
+            n_proteins=n_proteins,
+            sites_per_protein=sites_per_protein,
+        )
+        df = get_phosphorylation_df(url=path)
+
+        for name, bulk in (('orm', False), ('bulk', True)):
+            manager = Manager(connection=f"sqlite:///{os.path.join(directory, f'{name}.db')}")
+            manager.create_all()
+
+            if bulk:
+                measurements = _measure(manager._bulk_populate_modification_df, df, batch_size=batch_size)
+            else:
+                measurements = _measure(manager._populate_modification_df, df)
+
+            measurements['rows'] = manager.count_modifications()
+            measurements['rows_per_second'] = measurements['rows'] / measurements['seconds']
+            rv[name] = measurements
+
+            manager.session.close()
+            manager.engine.dispose()
+
+    return rv
+
+
+@contextmanager
+def _serve_directory(directory: str):
+    """Serve the directory over HTTP on a free local port and yield its base URL."""
+    handler = partial(_QuietHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class _QuietHTTPRequestHandler(SimpleHTTPRequestHandler):
+    """A request handler that doesn't log every request to stderr."""
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+def benchmark_modification_acquisition(n_proteins: int = 1000,
+                                       sites_per_protein: int = 10,
+                                       max_workers: Optional[int] = None,
+                                       http: bool = False,
+                                       ) -> Mapping[str, float]:
+    """Compare serial and concurrent acquisition of all six synthetic modification site files.
+
+    :param n_proteins: The number of proteins per species in each synthetic file
+    :param sites_per_protein: The number of sites per protein in each synthetic file
+    :param max_workers: The number of parsing processes for the concurrent path
+    :param http: If true, the files are served from a local HTTP server instead of read from disk
+    :return: The wall times of both paths and the speedup of the concurrent path
+    """
+    rv = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, code in MODIFICATION_SITE_DATASET_CODES.items():
+            write_modification_site_file(
+                os.path.join(directory, f'{name}.gz'),
+                n_proteins=n_proteins,
+                sites_per_protein=sites_per_protein,
+                code=code,
+            )
+
+        with (_serve_directory(directory) if http else nullcontext(directory)) as location:
+            urls = {
+                f'{name}_url': f'{location}/{name}.gz'
+                for name in MODIFICATION_SITE_DATASET_CODES
+            }
+            for name, parallel in (('serial', False), ('concurrent', True)):
+                manager = Manager(connection=f"sqlite:///{os.path.join(directory, f'{name}.db')}")
+                manager.create_all()
+
+                t = time.time()
+                manager._populate_modifications(parallel=parallel, max_workers=max_workers, **urls)
+                rv[f'{name}_seconds'] = time.time() - t
+
+                manager.session.close()
+                manager.engine.dispose()
+
+    rv['speedup'] = rv['serial_seconds'] / rv['concurrent_seconds']
+    return rv
+
+
+def _read_ptmvar_with_pandas(path: str) -> pd.DataFrame:
+    """Read the PTMVar workbook the way it was done before the streaming reader, for comparison."""
+    with zipfile.ZipFile(path) as zf:
+        with zf.open('PTMVar.xlsx') as f:
+            rv = pd.read_excel(
+                f,
+                sheet_name=1,
+                skiprows=6,
+            )
+
+    rv['VAR_POSITION'] = rv['VAR_POSITION'].apply(lambda x: x.strip("'"))
+    return rv[_ptmvar_rows]
+
+
+def benchmark_ptmvar_parse(n_proteins: int = 1000, variants_per_protein: int = 3) -> Mapping[str, Mapping[str, float]]:
+    """Compare parsing a synthetic PTMVar workbook with :func:`pandas.read_excel` and with the streaming reader.
+
+    The :func:`pandas.read_excel` path needs :mod:`openpyxl`.
+
+    :param n_proteins: The number of proteins in the synthetic workbook
+    :param variants_per_protein: The number of variants per protein in the synthetic workbook
+    :return: A dictionary from parser name to its measurements
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_ptmvar_file(
+            os.path.join(directory, 'PTMVar.xlsx.zip'),
+            n_proteins=n_proteins,
+            variants_per_protein=variants_per_protein,
+        )
+
+        return dict(
+            read_excel=_measure(_read_ptmvar_with_pandas, path),
+            streaming=_measure(get_ptmvar_df, url=path, usecols=_ptmvar_rows),
+        )
+
+
+def _populate_synthetic(manager: Manager,
+                        directory: str,
+                        n_proteins: int,
+                        sites_per_protein: int,
+                        variants_per_protein: int,
+                        ) -> None:
+    """Write a synthetic phosphorylation site file and PTMVar workbook to the directory and load them."""
+    phosphorylation_path = write_modification_site_file(
+        os.path.join(directory, 'Phosphorylation_site_dataset.gz'),
+        n_proteins=n_proteins,
+        sites_per_protein=sites_per_protein,
+    )
+    ptmvar_path = write_ptmvar_file(
+        os.path.join(directory, 'PTMVar.xlsx.zip'),
+        n_proteins=n_proteins,
+        variants_per_protein=variants_per_protein,
+    )
+
+    manager.drop_indexes()
+    manager._bulk_populate_modification_df(get_phosphorylation_df(url=phosphorylation_path))
+    manager.create_indexes()
+    manager._populate_ptmvar(url=ptmvar_path)
+    manager.refresh_statistics()
+
+
+@contextmanager
+def _count_queries(engine):
+    """Count the statements executed on the engine while in the context, yielding a dictionary that gets updated."""
+    rv = dict(queries=0)
+
+    def before_cursor_execute(*args, **kwargs):
+        rv['queries'] += 1
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield rv
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _to_bel_with_models(manager: Manager) -> 'BELGraph':
+    """Convert to BEL by loading the models and letting them add themselves, as was done before the flat export."""
+    from pybel import BELGraph
+
+    graph = BELGraph(name='PhosphositePlus Modifications', version='1.0.0')
+
+    for modification in manager.list_modifications():
+        modification.add_as_relation(graph)
+
+    for mutation_effect in manager.list_mutation_effects():
+        mutation_effect.add_as_relation(graph)
+
+    return graph
+
+
+def benchmark_bel_export(n_proteins: int = 1000,
+                         sites_per_protein: int = 10,
+                         variants_per_protein: int = 3,
+                         ) -> Mapping[str, Mapping[str, float]]:
+    """Compare the queries and time of converting a synthetic database to BEL in three ways.
+
+    The three ways are with models, from flat rows, and from flat rows while reusing nodes.
+
+    :param n_proteins: The number of proteins per species in the synthetic phosphorylation site file, and the number
+     of human proteins in the synthetic PTMVar workbook
+    :param sites_per_protein: The number of sites per protein in the synthetic phosphorylation site file
+    :param variants_per_protein: The number of variants per protein in the synthetic PTMVar workbook
+    :return: A dictionary from export name to its measurements
+    """
+    rv = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        manager = Manager(connection=f"sqlite:///{os.path.join(directory, 'bel.db')}")
+        manager.create_all()
+        _populate_synthetic(manager, directory, n_proteins, sites_per_protein, variants_per_protein)
+
+        exports = (
+            ('models', _to_bel_with_models),
+            ('flat', partial(Manager.to_bel, node_cache_size=0)),
+            ('memoized', Manager.to_bel),
+        )
+        for name, to_bel in exports:
+            manager.session.expunge_all()
+
+            with _count_queries(manager.engine) as measurements:
+                t = time.time()
+                graph = to_bel(manager)
+                measurements['seconds'] = time.time() - t
+
+            measurements['edges'] = graph.number_of_edges()
+            measurements['seconds_per_100k_edges'] = 100000 * measurements['seconds'] / measurements['edges']
+            rv[name] = measurements
+
+        manager.session.close()
+        manager.engine.dispose()
+
+    return rv
+
+
+def benchmark_bel_write(sizes: Sequence[int] = (250, 1000, 4000),
+                        sites_per_protein: int = 10,
+                        variants_per_protein: int = 3,
+                        ) -> Mapping[int, Mapping[str, Mapping[str, float]]]:
+    """Compare the time and peak memory of building a BEL graph with streaming BEL to a file in each format.
+
+    Each is measured on synthetic databases of several sizes.
+
+    :param sizes: The numbers of proteins per species in the synthetic phosphorylation site file, and of human
+     proteins in the synthetic PTMVar workbook
+    :param sites_per_protein: The number of sites per protein in the synthetic phosphorylation site file
+    :param variants_per_protein: The number of variants per protein in the synthetic PTMVar workbook
+    :return: A dictionary from size to a dictionary from export name to its measurements
+    """
+    rv = {}
+
+    for n_proteins in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            manager = Manager(connection=f"sqlite:///{os.path.join(directory, 'bel.db')}")
+            manager.create_all()
+            _populate_synthetic(manager, directory, n_proteins, sites_per_protein, variants_per_protein)
+            manager.session.expunge_all()
+
+            rv[n_proteins] = measurements = dict(graph=_measure(manager.to_bel))
+            for fmt in BEL_FILE_FORMATS:
+                with open(os.devnull, 'w') as file:
+                    measurements[fmt] = _measure(manager.write_bel, file, fmt=fmt)
+
+            manager.session.close()
+            manager.engine.dispose()
+
+    return rv
+
+
+def _explain(manager: Manager, query) -> List[str]:
+    """Get the lines of the database's plan for the query."""
+    statement = query.statement.compile(dialect=manager.engine.dialect, compile_kwargs={'literal_binds': True})
+    if manager.engine.dialect.name == 'sqlite':
+        return [row[-1] for row in manager.engine.execute(f'EXPLAIN QUERY PLAN {statement}')]
+    return [row[0] for row in manager.engine.execute(f'EXPLAIN {statement}')]
+
+
+def _get_lookup_queries(manager: Manager, n_probes: int, seed: int = 0) -> Mapping[str, List[Any]]:
+    """Sample keys of existing rows and build the queries the manager and the CLI run to look them up."""
+    rng = random.Random(seed)
+
+    modification_keys = rng.sample(list(manager._iter_modification_rows()), n_probes)
+    mutation_query = manager.session.query(Protein.uniprot_id, Mutation.from_aa, Mutation.position, Mutation.to_aa)
+    mutation_keys = rng.sample(mutation_query.join(Protein).all(), n_probes)
+    protein_ids = rng.sample([protein_id for protein_id, in manager.session.query(Protein.id)], n_probes)
+
+    return dict(
+        get_modification=[
+            partial(manager.get_modification, uniprot_id, residue, position, modification_type)
+            for uniprot_id, modification_type, residue, position in modification_keys
+        ],
+        get_mutation=[
+            partial(manager.get_mutation, *key)
+            for key in mutation_keys
+        ],
+        protein_modifications=[
+            manager.session.query(Modification).filter(Modification.protein_id == protein_id).all
+            for protein_id in protein_ids
+        ],
+    )
+
+
+def _get_explained_queries(manager: Manager) -> Mapping[str, Any]:
+    """Build one query of each kind that's looked up, for explaining."""
+    uniprot_id, modification_type, residue, position = next(iter(manager._iter_modification_rows()))
+    mutation_key = manager.session.query(Protein.uniprot_id, Mutation.from_aa, Mutation.position, Mutation.to_aa) \
+        .join(Protein).first()
+    protein_id = manager.session.query(Protein.id).first()[0]
+
+    return dict(
+        get_modification=manager._query_modification(uniprot_id, residue, position, modification_type),
+        get_mutation=manager._query_mutation(*mutation_key),
+        protein_modifications=manager.session.query(Modification).filter(Modification.protein_id == protein_id),
+    )
+
+
+def benchmark_lookups(connection: Optional[str] = None,
+                      n_proteins: int = 1000,
+                      sites_per_protein: int = 10,
+                      variants_per_protein: int = 3,
+                      n_probes: int = 1000,
+                      ) -> Mapping[str, Mapping[str, Any]]:
+    """Compare looking up modifications and mutations by their keys with and without the lookup indexes.
+
+    For each kind of lookup, reports the query plan with the indexes, whether it uses them, and the average
+    milliseconds per lookup with and without them.
+
+    :param connection: A connection string for a scratch database. Its tables are dropped when done. If none is
+     given, uses a temporary SQLite database.
+    :param n_proteins: The number of proteins per species in the synthetic phosphorylation site file, and the number
+     of human proteins in the synthetic PTMVar workbook
+    :param sites_per_protein: The number of sites per protein in the synthetic phosphorylation site file
+    :param variants_per_protein: The number of variants per protein in the synthetic PTMVar workbook
+    :param n_probes: The number of lookups of each kind that are timed
+    """
+    index_names = [index.name for index in Manager._get_lookup_indexes()]
+    rv = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        manager = Manager(connection=connection or f"sqlite:///{os.path.join(directory, 'lookups.db')}")
+        manager.drop_all()
+        manager.create_all()
+        try:
+            _populate_synthetic(manager, directory, n_proteins, sites_per_protein, variants_per_protein)
+            lookups = _get_lookup_queries(manager, n_probes=min(n_probes, manager.count_mutations()))
+
+            for name, query in _get_explained_queries(manager).items():
+                plan = _explain(manager, query)
+                rv[name] = dict(
+                    plan=plan,
+                    uses_index=any(index_name in line for line in plan for index_name in index_names),
+                )
+
+            for indexed in (True, False):
+                if not indexed:
+                    manager.drop_indexes()
+
+                for name, calls in lookups.items():
+                    manager.session.expunge_all()
+                    t = time.time()
+                    for call in calls:
+                        call()
+                    key = 'indexed_ms' if indexed else 'unindexed_ms'
+                    rv[name][key] = 1000 * (time.time() - t) / len(calls)
+        finally:
+            manager.session.close()
+            manager.drop_all()
+            manager.engine.dispose()
+
+    return rv
+
+
+def benchmark_site_index(n_proteins: int = 1000,
+                         sites_per_protein: int = 10,
+                         variants_per_protein: int = 3,
+                         n_probes: int = 10000,
+                         radius: int = 5,
+                         ) -> Mapping[str, float]:
+    """Measure loading the site index from a synthetic database and answering window and nearest-site queries.
+
+    :param n_proteins: The number of proteins per species in the synthetic phosphorylation site file, and the number
+     of human proteins in the synthetic PTMVar workbook
+    :param sites_per_protein: The number of sites per protein in the synthetic phosphorylation site file
+    :param variants_per_protein: The number of variants per protein in the synthetic PTMVar workbook
+    :param n_probes: The number of random probes on the proteins with modifications
+    :param radius: The radius of the window queries
+    :return: The seconds to load the index, the microseconds per single query, and the probes per second of the
+     batch queries
+    """
+    rv = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        manager = Manager(connection=f"sqlite:///{os.path.join(directory, 'sites.db')}")
+        manager.create_all()
+        _populate_synthetic(manager, directory, n_proteins, sites_per_protein, variants_per_protein)
+
+        t = time.time()
+        modifications = manager.site_index.modifications
+        rv['load_seconds'] = time.time() - t
+
+        rng = random.Random(0)
+        uniprot_ids = sorted(modifications.uniprot_id_to_code)
+        probes = [
+            (rng.choice(uniprot_ids), rng.randint(1, 10 * sites_per_protein + 100))
+            for _ in range(n_probes)
+        ]
+
+        for name, query in (('within', partial(modifications.within, radius=radius)),
+                            ('nearest', modifications.nearest)):
+            t = time.time()
+            for uniprot_id, position in probes:
+                query(uniprot_id, position)
+            rv[f'{name}_us'] = 1000000 * (time.time() - t) / n_probes
+
+        for name, query in (('within', partial(modifications.within_batch, radius=radius)),
+                            ('nearest', modifications.nearest_batch)):
+            t = time.time()
+            query(probes)
+            rv[f'{name}_batch_probes_per_second'] = n_probes / (time.time() - t)
+
+        manager.session.close()
+        manager.engine.dispose()
+
+    return rv
+
+
+def benchmark_filtered(n_proteins: int = 1000,
+                       sites_per_protein: int = 10,
+                       variants_per_protein: int = 3,
+                       species: Sequence[str] = ('human',),
+                       modification_types: Sequence[str] = ('Ph',),
+                       ) -> Mapping[str, Mapping[str, float]]:
+    """Compare a full populate and export of all synthetic data sets with a filtered one.
+
+    The filtered run only keeps some species and modification types.
+
+    :param n_proteins: The number of proteins per species in each synthetic modification site file, and the number of
+     human proteins in the other synthetic data sets
+    :param sites_per_protein: The number of sites per protein in each synthetic modification site file
+    :param variants_per_protein: The number of variants per protein in the synthetic PTMVar workbook
+    :param species: The species kept by the filtered run
+    :param modification_types: The modification types kept by the filtered run
+    :return: A dictionary from run name to its measurements. The filtered run also has the fraction of the full
+     run's time it took.
+    """
+    rv = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        urls = write_synthetic_release(directory, n_proteins, sites_per_protein, variants_per_protein)
+
+        runs = (
+            ('full', {}),
+            ('filtered', dict(species=species, modification_types=modification_types)),
+        )
+        for name, filters in runs:
+            manager = Manager(connection=f"sqlite:///{os.path.join(directory, f'{name}.db')}")
+            manager.create_all()
+
+            t = time.time()
+            manager.populate(**urls, **filters)
+            populate_seconds = time.time() - t
+
+            manager.session.expunge_all()
+            t = time.time()
+            with open(os.devnull, 'w') as file:
+                written = manager.write_bel(file, **filters)
+            export_seconds = time.time() - t
+
+            rv[name] = dict(
+                populate_seconds=populate_seconds,
+                export_seconds=export_seconds,
+                seconds=populate_seconds + export_seconds,
+                modifications=manager.count_modifications(),
+                edges=written['edges'],
+            )
+
+            manager.session.close()
+            manager.engine.dispose()
+
+    rv['filtered']['fraction_of_full'] = rv['filtered']['seconds'] / rv['full']['seconds']
+    return rv
+
+
+def benchmark_parallel_bel(n_proteins: int = 1000,
+                           sites_per_protein: int = 10,
+                           variants_per_protein: int = 3,
+                           workers: Sequence[int] = (1, 2, 4, 8),
+                           ) -> Mapping[str, Any]:
+    """Compare building BEL in one process with building it in worker processes.
+
+    The work of the workers is both merged into one graph and written as shards, for several numbers of workers.
+
+    :param n_proteins: The number of proteins per species in the synthetic phosphorylation site file, and the number
+     of human proteins in the synthetic PTMVar workbook
+    :param sites_per_protein: The number of sites per protein in the synthetic phosphorylation site file
+    :param variants_per_protein: The number of variants per protein in the synthetic PTMVar workbook
+    :param workers: The numbers of worker processes to measure
+    :return: The number of processors, the seconds of the serial export, and the seconds and speedup over the serial
+     export of each parallel one for each number of workers
+    """
+    rv = dict(cpu_count=os.cpu_count())
+
+    with tempfile.TemporaryDirectory() as directory:
+        manager = Manager(connection=f"sqlite:///{os.path.join(directory, 'bel.db')}")
+        manager.create_all()
+        _populate_synthetic(manager, directory, n_proteins, sites_per_protein, variants_per_protein)
+        manager.session.expunge_all()
+
+        t = time.time()
+        graph = manager.to_bel()
+        rv['serial'] = dict(seconds=time.time() - t, edges=graph.number_of_edges())
+        del graph
+
+        for max_workers in workers:
+            rv[max_workers] = measurements = {}
+
+            t = time.time()
+            graph = manager.to_bel(parallel=True, max_workers=max_workers)
+            measurements['merged_seconds'] = time.time() - t
+            del graph
+
+            with tempfile.TemporaryDirectory() as shard_directory:
+                t = time.time()
+                manager.write_bel_shards(shard_directory, max_workers=max_workers)
+                measurements['sharded_seconds'] = time.time() - t
+
+            for name in ('merged', 'sharded'):
+                measurements[f'{name}_speedup'] = rv['serial']['seconds'] / measurements[f'{name}_seconds']
+
+        manager.session.close()
+        manager.engine.dispose()
+
+    return rv
+
+
+def benchmark_snapshot(n_proteins: int = 1000,
+                       sites_per_protein: int = 10,
+                       variants_per_protein: int = 3,
+                       n_probes: int = 1000,
+                       ) -> Mapping[str, float]:
+    """Compare reading the modifications of proteins from a snapshot with reading them through the ORM.
+
+    :param n_proteins: The number of proteins per species in the synthetic phosphorylation site file, and the number
+     of human proteins in the synthetic PTMVar workbook
+    :param sites_per_protein: The number of sites per protein in the synthetic phosphorylation site file
+    :param variants_per_protein: The number of variants per protein in the synthetic PTMVar workbook
+    :param n_probes: The number of proteins whose modifications are read
+    :return: The seconds to write the snapshot and its size, the milliseconds to load it, the microseconds per protein
+     read from each, and the memory taken by all modifications as ORM instances
+    """
+    rv = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        manager = Manager(connection=f"sqlite:///{os.path.join(directory, 'snapshot.db')}")
+        manager.create_all()
+        _populate_synthetic(manager, directory, n_proteins, sites_per_protein, variants_per_protein)
+        manager.session.expunge_all()
+
+        path = os.path.join(directory, 'phosphosite.snapshot')
+        t = time.time()
+        size = manager.write_snapshot(path)
+        rv['write_seconds'] = time.time() - t
+        rv['size_mb'] = size / 2 ** 20
+
+        t = time.time()
+        for _ in range(10):
+            snapshot = Snapshot.load(path)
+        rv['load_ms'] = 1000 * (time.time() - t) / 10
+
+        rng = random.Random(0)
+        uniprot_ids = [uniprot_id for uniprot_id, in manager.session.query(Protein.uniprot_id)]
+        probes = [rng.choice(uniprot_ids) for _ in range(n_probes)]
+
+        t = time.time()
+        for uniprot_id in probes:
+            manager.get_protein_by_uniprot_id(uniprot_id).modifications.all()
+        rv['orm_protein_us'] = 1000000 * (time.time() - t) / n_probes
+
+        t = time.time()
+        for uniprot_id in probes:
+            snapshot.get_modifications(uniprot_id)
+        rv['snapshot_protein_us'] = 1000000 * (time.time() - t) / n_probes
+
+        manager.session.expunge_all()
+        rv['orm_modifications_mb'] = _measure(manager.list_modifications)['peak_mb']
+
+        manager.session.close()
+        manager.engine.dispose()
+
+    return rv
+
+
+def benchmark_protein_lookup(n_proteins: int = 1000,
+                             sites_per_protein: int = 10,
+                             variants_per_protein: int = 3,
+                             n_probes: int = 1000,
+                             chunk_size: Optional[int] = None,
+                             ) -> Mapping[str, float]:
+    """Compare looking up proteins and their modifications and mutations one by one and in chunks.
+
+    :param n_proteins: The number of proteins per species in the synthetic phosphorylation site file, and the number
+     of human proteins in the synthetic PTMVar workbook
+    :param sites_per_protein: The number of sites per protein in the synthetic phosphorylation site file
+    :param variants_per_protein: The number of variants per protein in the synthetic PTMVar workbook
+    :param n_probes: The number of identifiers looked up. One in ten isn't in the database.
+    :param chunk_size: The number of identifiers per chunk
+    :return: The seconds, queries, and identifiers per second of each way
+    """
+    rv = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        manager = Manager(connection=f"sqlite:///{os.path.join(directory, 'proteins.db')}")
+        manager.create_all()
+        _populate_synthetic(manager, directory, n_proteins, sites_per_protein, variants_per_protein)
+        manager.session.expunge_all()
+
+        rng = random.Random(0)
+        uniprot_ids = [uniprot_id for uniprot_id, in manager.session.query(Protein.uniprot_id)]
+        probes = [
+            rng.choice(uniprot_ids) if i % 10 else f'MISSING{i}'
+            for i in range(n_probes)
+        ]
+
+        def lookup_each():
+            for uniprot_id in probes:
+                protein = manager.get_protein_by_uniprot_id(uniprot_id)
+                if protein is not None:
+                    [m.modification_type.name for m in protein.modifications.all()]
+                    list(protein.mutations)
+
+        def lookup_chunks():
+            manager.write_protein_annotations(probes, io.StringIO(), chunk_size=chunk_size)
+
+        for key, func in [('each', lookup_each), ('chunks', lookup_chunks)]:
+            manager.session.expunge_all()
+            with manager.instrument() as instrumentation:
+                t = time.time()
+                func()
+                seconds = time.time() - t
+            rv[key] = dict(
+                seconds=seconds,
+                queries=instrumentation.report()['total']['statements'],
+                identifiers_per_second=n_probes / seconds,
+            )
+
+        manager.session.close()
+        manager.engine.dispose()
+
+    return rv
+
+
+@contextmanager
+def _serve_app(app):
+    """Serve a WSGI application with a thread per request on a free local port and yield its base URL."""
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _get_api_urls(session, n_requests: int, seed: int = 0) -> List[str]:
+    """Make a random mix of requests to the JSON API, mostly for proteins and windows around their sites."""
+    rng = random.Random(seed)
+    sites = session.query(Protein.uniprot_id, Modification.position).join(Modification.protein).all()
+    uniprot_ids = sorted({uniprot_id for uniprot_id, _ in sites})
+
+    rv = []
+    for i in range(n_requests):
+        uniprot_id, position = rng.choice(sites)
+        kind = i % 10
+        if kind < 4:
+            rv.append(f'/api/proteins/{uniprot_id}')
+        elif kind < 7:
+            rv.append(f'/api/proteins/{uniprot_id}/window?position={position}&radius={rng.choice([5, 10, 25])}')
+        elif kind < 9:
+            rv.append(f'/api/proteins/{uniprot_id}/sites/{position}')
+        elif rng.random() < 0.5:
+            rv.append(f'/api/proteins?uniprot_id={",".join(rng.sample(uniprot_ids, min(10, len(uniprot_ids))))}')
+        else:
+            rv.append('/api/summary')
+    return rv
+
+
+def _load_test(base_url: str,
+               paths: Sequence[str],
+               concurrency: int,
+               etags: Optional[Mapping[str, str]] = None,
+               ) -> Mapping[str, Any]:
+    """Request all paths from a pool of client threads and summarize the latencies and statuses."""
+    def fetch(path: str):
+        headers = {'If-None-Match': etags[path]} if etags is not None else {}
+        t = time.perf_counter()
+        try:
+            with urlopen(Request(base_url + path, headers=headers)) as response:
+                response.read()
+                status, etag = response.status, response.headers.get('ETag')
+        except HTTPError as e:
+            status, etag = e.code, e.headers.get('ETag')
+        return path, status, etag, time.perf_counter() - t
+
+    t = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, paths))
+    seconds = time.time() - t
+
+    latencies = np.array([latency for *_, latency in results]) * 1000
+    return dict(
+        requests=len(results),
+        seconds=seconds,
+        requests_per_second=len(results) / seconds,
+        p50_ms=float(np.percentile(latencies, 50)),
+        p95_ms=float(np.percentile(latencies, 95)),
+        p99_ms=float(np.percentile(latencies, 99)),
+        statuses=dict(Counter(str(status) for _, status, _, _ in results)),
+        etags={path: etag for path, _, etag, _ in results},
+    )
+
+
+def benchmark_api(connection: Optional[str] = None,
+                  n_proteins: int = 1000,
+                  sites_per_protein: int = 10,
+                  variants_per_protein: int = 3,
+                  n_requests: int = 2000,
+                  concurrency: int = 8,
+                  pool_size: Optional[int] = None,
+                  ) -> Mapping[str, Any]:
+    """Load test the JSON API served from a local database.
+
+    The same random mix of requests is sent three times: first with an empty response cache, then with the responses
+    cached, then with the ETags from before, so they're all answered with ``304 Not Modified``.
+
+    :param connection: The connection string of a populated database. Defaults to a temporary SQLite database
+     populated with synthetic data.
+    :param n_proteins: The number of proteins per species in the synthetic phosphorylation site file, and the number
+     of human proteins in the synthetic PTMVar workbook
+    :param sites_per_protein: The number of sites per protein in the synthetic phosphorylation site file
+    :param variants_per_protein: The number of variants per protein in the synthetic PTMVar workbook
+    :param n_requests: The number of requests in each round
+    :param concurrency: The number of client threads
+    :param pool_size: The number of database connections the app keeps open. Defaults to the concurrency.
+    :return: The throughput, latency percentiles, and statuses of each round, and the response cache's hits and misses
+    """
+    from .api import get_app
+
+    with tempfile.TemporaryDirectory() as directory:
+        if connection is None:
+            connection = f"sqlite:///{os.path.join(directory, 'api.db')}"
+            manager = Manager(connection=connection)
+            manager.create_all()
+            _populate_synthetic(manager, directory, n_proteins, sites_per_protein, variants_per_protein)
+        else:
+            manager = Manager(connection=connection)
+
+        paths = _get_api_urls(manager.session, n_requests)
+        manager.session.close()
+        manager.engine.dispose()
+
+        t = time.time()
+        app = get_app(connection, pool_size=pool_size or concurrency)
+        rv = dict(startup_seconds=time.time() - t)
+        service = app.extensions['phosphosite_api']
+
+        with _serve_app(app) as base_url:
+            rv['cold'] = _load_test(base_url, paths, concurrency)
+            rv['warm'] = _load_test(base_url, paths, concurrency)
+            rv['conditional'] = _load_test(base_url, paths, concurrency, etags=rv['warm']['etags'])
+
+        for key in ('cold', 'warm', 'conditional'):
+            del rv[key]['etags']
+
+        cache_info = service.cache_info()
+        rv['cache'] = dict(hits=cache_info.hits, misses=cache_info.misses, size=cache_info.currsize)
+
+        service.manager.session.remove()
+        service.manager.engine.dispose()
+
+    return rv
+
+
+def benchmark_loaders(connection: Optional[str] = None,
+                      n_proteins: int = 1000,
+                      sites_per_protein: int = 10,
+                      variants_per_protein: int = 3,
+                      loaders: Sequence[str] = ('insert', 'native'),
+                      ) -> Mapping[str, Any]:
+    """Compare populating all synthetic data sets with each loader.
+
+    :param connection: A connection string for a scratch database. Its tables are dropped before each run and when
+     done. If none is given, uses a new temporary SQLite database for each run.
+    :param n_proteins: The number of proteins per species in each synthetic modification site file, and the number of
+     human proteins in the other synthetic data sets
+    :param sites_per_protein: The number of sites per protein in each synthetic modification site file
+    :param variants_per_protein: The number of variants per protein in the synthetic PTMVar workbook
+    :param loaders: The names of the loaders to compare. See :mod:`bio2bel_phosphosite.loaders`.
+    :return: A dictionary from loader name to its measurements, and whether every loader stored the same counts
+    """
+    rv = {}
+    summaries = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        urls = write_synthetic_release(directory, n_proteins, sites_per_protein, variants_per_protein)
+
+        for name in loaders:
+            manager = Manager(connection=connection or f"sqlite:///{os.path.join(directory, f'{name}.db')}")
+            manager.drop_all()
+            manager.create_all()
+            try:
+                with manager.instrument() as instrumentation:
+                    manager.populate(**urls, loader=name)
+                report = instrumentation.report()
+
+                summary = manager.summarize()
+                summaries.append(summary)
+                rows = summary['modifications'] + summary['mutations'] + summary['mutation_effects']
+                seconds = report['total']['seconds']
+                rv[name] = dict(
+                    loader=type(get_loader(name, manager.engine)).__name__,
+                    dialect=manager.engine.dialect.name,
+                    seconds=seconds,
+                    flush_seconds=report['phases'].get('flush', {}).get('seconds', 0.0),
+                    index_seconds=report['phases'].get('index', {}).get('seconds', 0.0),
+                    statements=report['total']['statements'],
+                    rows=rows,
+                    rows_per_second=rows / seconds,
+                )
+            finally:
+                manager.session.close()
+                if connection:
+                    manager.drop_all()
+                manager.engine.dispose()
+
+    rv['same_counts'] = all(summary == summaries[0] for summary in summaries)
+    return rv
+
+
+#: The modules that bio2bel's command line interface imports anyway, which aren't counted against the budgets
+STARTUP_BASELINE_MODULES = ['bio2bel.manager.bel_manager', 'bio2bel.manager.flask_manager']
+
+#: The modules that are only imported when the commands that need them run
+STARTUP_DEFERRED_MODULES = [
+    'pybel',
+    'tqdm',
+    'flask',
+    'bio2bel_phosphosite.bel',
+    'bio2bel_phosphosite.benchmark',
+    'bio2bel_phosphosite.export',
+    'bio2bel_phosphosite.parallel',
+]
+
+#: The most milliseconds importing the package may take
+PACKAGE_IMPORT_BUDGET_MS = 20
+
+#: The most milliseconds importing the command line interface may take on top of the baseline modules
+CLI_IMPORT_BUDGET_MS = 200
+
+
+def _get_import_time(module: str, baseline: Sequence[str] = ()) -> Tuple[float, List[str]]:
+    """Import a module in a new interpreter with ``-X importtime``.
+
+    :param module: The module to import
+    :param baseline: Modules to import before it, which aren't counted
+    :return: The milliseconds importing the module took and the modules imported for it
+    """
+    code = '; '.join(f'import {name}' for name in [*baseline, module])
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    # each line looks like "import time: <self us> | <cumulative us> | <indented name>" and is written once the
+    # module is done, so the modules imported for the last one come after the baseline ones
+    lines = [
+        line.split('|')
+        for line in result.stderr.splitlines()
+        if line.startswith('import time:') and not line.rstrip().endswith('imported package')
+    ]
+    names = [name.strip() for _, _, name in lines]
+    start = max((names.index(name) for name in baseline), default=-1) + 1
+    return int(lines[-1][1]) / 1000, names[start:]
+
+
+def benchmark_startup(repeats: int = 5) -> Mapping[str, Any]:
+    """Measure how long importing the package and its command line interface take, and what they import.
+
+    The fastest of several runs is reported for each, since the others are slowed down by the rest of the system.
+
+    :param repeats: The number of times each is measured
+    :return: The milliseconds each import took, the deferred modules each imported, the seconds showing the help of
+     the command line interface took, and the budgets that were exceeded
+    """
+    rv = {}
+    for key, module, baseline, budget in [
+        ('package', 'bio2bel_phosphosite', (), PACKAGE_IMPORT_BUDGET_MS),
+        ('cli', 'bio2bel_phosphosite.cli', STARTUP_BASELINE_MODULES, CLI_IMPORT_BUDGET_MS),
+    ]:
+        results = [_get_import_time(module, baseline=baseline) for _ in range(repeats)]
+        milliseconds = min(ms for ms, _ in results)
+        modules = set(results[0][1])
+        rv[key] = dict(
+            import_ms=milliseconds,
+            budget_ms=budget,
+            deferred_modules_imported=[name for name in STARTUP_DEFERRED_MODULES if name in modules],
+        )
+
+    times = []
+    for _ in range(repeats):
+        t = time.time()
+        subprocess.run([sys.executable, '-m', 'bio2bel_phosphosite', '--help'], stdout=subprocess.DEVNULL, check=True)
+        times.append(time.time() - t)
+    rv['help_seconds'] = min(times)
+
+    rv['violations'] = [
+        f'importing {key} took {results["import_ms"]:.1f} ms, over the budget of {results["budget_ms"]} ms'
+        for key, results in (('package', rv['package']), ('cli', rv['cli']))
+        if results['budget_ms'] < results['import_ms']
+    ] + [
+        f'importing {key} imported {name}'
+        for key in ('package', 'cli')
+        for name in rv[key]['deferred_modules_imported']
+    ]
+    return rv
@@ -1,54 +1,480 @@
 # -*- coding: utf-8 -*-
 
-"""Run this script with :code:`python3 -m bio2bel_phosphosite`"""
+"""Run this script with :code:`python3 -m bio2bel_phosphosite`."""
+
+import json
+import os
+import sys
 
 import click
 
+from .api import get_app
+from .constants import API_POOL_SIZE, BEL_FILE_FORMAT_NAMES, LOADER_NAMES
+from .lookup import ANNOTATION_FILE_FORMATS, read_uniprot_ids
 from .manager import Manager
-from .models import Modification
+from .snapshot import Snapshot
 
 main = Manager.get_cli()
 
 
+@main.command()
+@click.option('--no-download', is_flag=True, help='Compare the previously downloaded files instead of new ones')
+@click.pass_obj
+def update(manager, no_download):
+    """Update the database to the latest release, only writing what changed."""
+    results = manager.update(force_download=not no_download)
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@main.command()
+@click.option('-h', '--host', default='127.0.0.1', show_default=True)
+@click.option('-p', '--port', type=int, default=5000, show_default=True)
+@click.option('--pool-size', type=int, default=API_POOL_SIZE, show_default=True,
+              help='Number of database connections kept open')
+@click.pass_obj
+def serve(manager, host, port, pool_size):
+    """Serve the read-only JSON API."""
+    app = get_app(manager.connection, pool_size=pool_size)
+    app.run(host=host, port=port, threaded=True)
+
+
 @main.group()
 def manage():
-    pass
+    """Manage the database."""
 
 
 @manage.group()
 def protein():
-    pass
+    """Look up proteins."""
 
 
 @protein.command()
 @click.argument('uniprot_id')
 @click.pass_obj
 def get(manager, uniprot_id):
-    """Get a summary of a protein by UniProt identifier"""
-    p = manager.get_protein_by_uniprot_id(uniprot_id)
+    """Get a summary of a protein by UniProt identifier."""
+    annotation = next(manager.annotate_proteins([uniprot_id]))
 
-    if p is None:
+    if not annotation.found:
         click.echo(f'could not find {uniprot_id}')
+        sys.exit(1)
 
-    unique_positions = {m.position for m in p.modifications.all()}
+    unique_positions = {m.position for m in annotation.modifications}
     click.echo(f'Unique positions modified: {len(unique_positions)}')
 
-    for m in p.modifications.order_by(Modification.position):
+    for m in annotation.modifications:
         click.echo(f'{m.position} {m.residue} {m.modification_type}')
 
 
+@protein.command()
+@click.option('-i', '--input', 'file', type=click.File(), default='-', show_default=True,
+              help='File with a UniProt identifier in the first column of each line')
+@click.option('-o', '--output', type=click.File('w'), default='-', show_default=True)
+@click.option('-f', '--format', 'fmt', type=click.Choice(list(ANNOTATION_FILE_FORMATS)), default='tsv',
+              show_default=True)
+@click.option('--chunk-size', type=int, help='Number of identifiers looked up per query')
+@click.option('--report', type=click.File('w'), default=sys.stderr, help='File to write the throughput report to')
+@click.pass_obj
+def annotate(manager, file, output, fmt, chunk_size, report):
+    """Stream the modifications and mutations of many proteins."""
+    results = manager.write_protein_annotations(read_uniprot_ids(file), output, fmt=fmt, chunk_size=chunk_size)
+    json.dump(results, report, indent=2)
+    print(file=report)
+
+
 @manage.group()
 def species():
-    pass
+    """Look up species."""
 
 
 @species.command()
 @click.pass_obj
 def ls(manager):
-    """List all species"""
+    """List all species."""
     for s in manager.list_species():
         click.echo(f'{s.id}\t{s.name}')
 
 
+@manage.group()
+def indexes():
+    """Manage the lookup indexes."""
+
+
+@indexes.command()
+@click.pass_obj
+def create(manager):
+    """Build the lookup indexes that don't exist yet."""
+    manager.create_indexes()
+
+
+@indexes.command()
+@click.pass_obj
+def drop(manager):
+    """Drop the lookup indexes."""
+    manager.drop_indexes()
+
+
+@main.group()
+def snapshot():
+    """Write and read compact, read-only snapshots of the database."""
+
+
+@snapshot.command(name='write')
+@click.option('-o', '--output', type=click.Path(dir_okay=False), required=True, help='Path of the snapshot file')
+@click.pass_obj
+def snapshot_write(manager, output):
+    """Write a snapshot of the proteins, modifications, mutations, and statistics."""
+    size = manager.write_snapshot(output)
+    click.echo(f'wrote {size / 2 ** 20:.1f} MB to {output}')
+
+
+@snapshot.command(name='summarize')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def snapshot_summarize(path):
+    """Summarize a snapshot."""
+    for name, count in sorted(Snapshot.load(path).summarize().items()):
+        click.echo(f'{name.capitalize()}: {count}')
+
+
+@snapshot.command(name='protein')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.argument('uniprot_id')
+def snapshot_protein(path, uniprot_id):
+    """List the modifications and mutations of a protein in a snapshot."""
+    snapshot = Snapshot.load(path)
+
+    p = snapshot.get_protein_by_uniprot_id(uniprot_id)
+    if p is None:
+        click.echo(f'could not find {uniprot_id}')
+        return
+
+    for m in snapshot.get_modifications(uniprot_id):
+        click.echo(f'{m.position} {m.residue} {m.modification_type}')
+    for m in snapshot.get_mutations(uniprot_id):
+        click.echo(f'{m.from_aa}{m.position}{m.to_aa}')
+
+
+@main.group()
+def profile():
+    """Measure the phases of populating and exporting and report them as JSON."""
+
+
+@profile.command(name='populate')
+@click.option('--parallel', is_flag=True, help='Acquire the modification site data sets concurrently')
+@click.option('--species', multiple=True, help='Only populate proteins of this species, like human')
+@click.option('--modification-type', 'modification_types', multiple=True,
+              help='Only populate modifications of this type, like Ph')
+@click.option('--loader', type=click.Choice(LOADER_NAMES), default='insert', show_default=True,
+              help='How the bulk inserts are written')
+@click.option('--report', type=click.File('w'), default=sys.stdout, help='File to write the report to')
+@click.pass_obj
+def profile_populate(manager, parallel, species, modification_types, loader, report):
+    """Populate the database and report where the time went."""
+    with manager.instrument() as instrumentation:
+        manager.populate(
+            parallel=parallel,
+            species=species or None,
+            modification_types=modification_types or None,
+            loader=loader,
+        )
+    instrumentation.write_report(report)
+
+
+@profile.command(name='export')
+@click.option('-o', '--output', type=click.File('w'), default=os.devnull, show_default=True)
+@click.option('-f', '--format', 'fmt', type=click.Choice(['graph', *BEL_FILE_FORMAT_NAMES]), default='graph',
+              show_default=True, help='Build a BEL graph or stream BEL in a format')
+@click.option('--report', type=click.File('w'), default=sys.stdout, help='File to write the report to')
+@click.pass_obj
+def profile_export(manager, output, fmt, report):
+    """Export the database as BEL and report where the time went."""
+    with manager.instrument() as instrumentation:
+        if fmt == 'graph':
+            manager.to_bel()
+        else:
+            manager.write_bel(output, fmt=fmt)
+    instrumentation.write_report(report)
+
+
+@main.group()
+def benchmark():
+    """Run benchmarks on synthetic data."""
+
+
+@benchmark.command()
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins per species')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--batch-size', type=int, help='Number of rows per bulk INSERT')
+def populate(proteins, sites, batch_size):
+    """Compare the ORM and bulk modification loaders."""
+    from .benchmark import benchmark_modification_populate
+
+    results = benchmark_modification_populate(
+        n_proteins=proteins,
+        sites_per_protein=sites,
+        batch_size=batch_size,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command()
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins per species')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--max-workers', type=int, help='Number of parsing processes')
+@click.option('--http', is_flag=True, help='Serve the files from a local HTTP server')
+def acquisition(proteins, sites, max_workers, http):
+    """Compare serial and concurrent acquisition of the modification site files."""
+    from .benchmark import benchmark_modification_acquisition
+
+    results = benchmark_modification_acquisition(
+        n_proteins=proteins,
+        sites_per_protein=sites,
+        max_workers=max_workers,
+        http=http,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command()
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins')
+@click.option('--variants', type=int, default=3, show_default=True, help='Number of variants per protein')
+def ptmvar(proteins, variants):
+    """Compare parsing PTMVar with pandas.read_excel and with the streaming reader."""
+    from .benchmark import benchmark_ptmvar_parse
+
+    results = benchmark_ptmvar_parse(
+        n_proteins=proteins,
+        variants_per_protein=variants,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command()
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins per species')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--variants', type=int, default=3, show_default=True, help='Number of variants per protein')
+def export(proteins, sites, variants):
+    """Compare the queries and time of converting to BEL with models, from flat rows, and reusing nodes."""
+    from .benchmark import benchmark_bel_export
+
+    results = benchmark_bel_export(
+        n_proteins=proteins,
+        sites_per_protein=sites,
+        variants_per_protein=variants,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command()
+@click.option('--size', 'sizes', type=int, multiple=True, default=[250, 1000, 4000], show_default=True,
+              help='Number of proteins per species. Can be given several times.')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--variants', type=int, default=3, show_default=True, help='Number of variants per protein')
+def write(sizes, sites, variants):
+    """Compare the peak memory of building a BEL graph with streaming BEL to a file."""
+    from .benchmark import benchmark_bel_write
+
+    results = benchmark_bel_write(
+        sizes=sizes,
+        sites_per_protein=sites,
+        variants_per_protein=variants,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command()
+@click.option('--connection', help='Connection string of a scratch database. Defaults to a temporary SQLite file.')
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins per species')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--variants', type=int, default=3, show_default=True, help='Number of variants per protein')
+@click.option('--probes', type=int, default=1000, show_default=True, help='Number of lookups of each kind')
+def lookups(connection, proteins, sites, variants, probes):
+    """Show the plans and time of lookups with and without the lookup indexes."""
+    from .benchmark import benchmark_lookups
+
+    results = benchmark_lookups(
+        connection=connection,
+        n_proteins=proteins,
+        sites_per_protein=sites,
+        variants_per_protein=variants,
+        n_probes=probes,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command()
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins per species')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--variants', type=int, default=3, show_default=True, help='Number of variants per protein')
+@click.option('--probes', type=int, default=10000, show_default=True, help='Number of probes')
+@click.option('--radius', type=int, default=5, show_default=True, help='Radius of the window queries')
+def sites(proteins, sites, variants, probes, radius):
+    """Measure window and nearest-site queries on the site index."""
+    from .benchmark import benchmark_site_index
+
+    results = benchmark_site_index(
+        n_proteins=proteins,
+        sites_per_protein=sites,
+        variants_per_protein=variants,
+        n_probes=probes,
+        radius=radius,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command()
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins per species')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--variants', type=int, default=3, show_default=True, help='Number of variants per protein')
+@click.option('--species', multiple=True, default=['human'], show_default=True, help='Species to keep')
+@click.option('--modification-type', 'modification_types', multiple=True, default=['Ph'], show_default=True,
+              help='Modification type to keep')
+def filtered(proteins, sites, variants, species, modification_types):
+    """Compare a full populate and export with one filtered by species and modification type."""
+    from .benchmark import benchmark_filtered
+
+    results = benchmark_filtered(
+        n_proteins=proteins,
+        sites_per_protein=sites,
+        variants_per_protein=variants,
+        species=species,
+        modification_types=modification_types,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command()
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins per species')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--variants', type=int, default=3, show_default=True, help='Number of variants per protein')
+@click.option('--workers', type=int, multiple=True, default=[1, 2, 4, 8], show_default=True,
+              help='Number of worker processes. Can be given several times.')
+def parallel(proteins, sites, variants, workers):
+    """Compare building BEL in one process with building it in worker processes."""
+    from .benchmark import benchmark_parallel_bel
+
+    results = benchmark_parallel_bel(
+        n_proteins=proteins,
+        sites_per_protein=sites,
+        variants_per_protein=variants,
+        workers=workers,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command(name='snapshot')
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins per species')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--variants', type=int, default=3, show_default=True, help='Number of variants per protein')
+@click.option('--probes', type=int, default=1000, show_default=True, help='Number of proteins to read')
+def benchmark_snapshot_command(proteins, sites, variants, probes):
+    """Compare reading proteins from a snapshot with reading them through the ORM."""
+    from .benchmark import benchmark_snapshot
+
+    results = benchmark_snapshot(
+        n_proteins=proteins,
+        sites_per_protein=sites,
+        variants_per_protein=variants,
+        n_probes=probes,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command(name='proteins')
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins per species')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--variants', type=int, default=3, show_default=True, help='Number of variants per protein')
+@click.option('--probes', type=int, default=1000, show_default=True, help='Number of identifiers to look up')
+@click.option('--chunk-size', type=int, help='Number of identifiers looked up per query')
+def benchmark_proteins(proteins, sites, variants, probes, chunk_size):
+    """Compare looking up proteins one by one with looking them up in chunks."""
+    from .benchmark import benchmark_protein_lookup
+
+    results = benchmark_protein_lookup(
+        n_proteins=proteins,
+        sites_per_protein=sites,
+        variants_per_protein=variants,
+        n_probes=probes,
+        chunk_size=chunk_size,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command(name='api')
+@click.option('--connection', help='Connection string of a populated database. Defaults to a synthetic SQLite one.')
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins per species')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--variants', type=int, default=3, show_default=True, help='Number of variants per protein')
+@click.option('--requests', 'n_requests', type=int, default=2000, show_default=True,
+              help='Number of requests per round')
+@click.option('--concurrency', type=int, default=8, show_default=True, help='Number of client threads')
+@click.option('--pool-size', type=int, help='Number of database connections. Defaults to the concurrency.')
+def benchmark_api_command(connection, proteins, sites, variants, n_requests, concurrency, pool_size):
+    """Load test the JSON API with cold, cached, and conditional requests."""
+    from .benchmark import benchmark_api
+
+    results = benchmark_api(
+        connection=connection,
+        n_proteins=proteins,
+        sites_per_protein=sites,
+        variants_per_protein=variants,
+        n_requests=n_requests,
+        concurrency=concurrency,
+        pool_size=pool_size,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command(name='loaders')
+@click.option('--connection', help='Connection string of a scratch database. Defaults to temporary SQLite files.')
+@click.option('--proteins', type=int, default=1000, show_default=True, help='Number of proteins per species')
+@click.option('--sites', type=int, default=10, show_default=True, help='Number of sites per protein')
+@click.option('--variants', type=int, default=3, show_default=True, help='Number of variants per protein')
+@click.option('--loader', 'loaders', type=click.Choice(LOADER_NAMES), multiple=True, default=['insert', 'native'],
+              show_default=True, help='Loaders to compare')
+def benchmark_loaders_command(connection, proteins, sites, variants, loaders):
+    """Compare populating with each way of writing the bulk inserts."""
+    from .benchmark import benchmark_loaders
+
+    results = benchmark_loaders(
+        connection=connection,
+        n_proteins=proteins,
+        sites_per_protein=sites,
+        variants_per_protein=variants,
+        loaders=loaders,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+
+
+@benchmark.command(name='startup')
+@click.option('--repeats', type=int, default=5, show_default=True, help='Number of times each import is measured')
+@click.option('--check', is_flag=True, help='Exit with an error if a budget is exceeded')
+def benchmark_startup_command(repeats, check):
+    """Measure the import time of the package and command line interface against their budgets."""
+    from .benchmark import benchmark_startup
+
+    results = benchmark_startup(repeats=repeats)
+    json.dump(results, sys.stdout, indent=2)
+    click.echo()
+    if check and results['violations']:
+        for violation in results['violations']:
+            click.secho(violation, fg='red', err=True)
+        sys.exit(1)
+
+
 if __name__ == '__main__':
     main()
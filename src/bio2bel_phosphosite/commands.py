@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""Commands that are added to the ``bel`` group of the command line interface.
+
+They're kept apart from :mod:`bio2bel_phosphosite.export` and :mod:`bio2bel_phosphosite.parallel`, which import
+:mod:`pybel`, so building the command line interface doesn't import it. The commands only call the manager, which
+imports those modules when they run.
+"""
+
+import sys
+
+import click
+
+from .constants import BEL_FILE_FORMAT_NAMES
+
+__all__ = [
+    'add_cli_export_bel',
+    'add_cli_write_bel_shards',
+]
+
+
+def add_cli_export_bel(main: click.Group) -> click.Group:  # noqa: D202
+    """Add the command that streams BEL to a file to the ``bel`` group of the command line interface."""
+
+    @main.command()
+    @click.option('-o', '--output', type=click.File('w'), default=sys.stdout)
+    @click.option('-f', '--format', 'fmt', type=click.Choice(BEL_FILE_FORMAT_NAMES), default='jsonl',
+                  show_default=True)
+    @click.option('--batch-size', type=int, help='Number of rows fetched from the database at a time')
+    @click.option('--species', multiple=True, help='Only write proteins of this species, like human')
+    @click.option('--modification-type', 'modification_types', multiple=True,
+                  help='Only write modifications of this type, like Ph')
+    @click.option('--uniprot-id', 'uniprot_ids', multiple=True, help='Only write this protein')
+    @click.pass_obj
+    def export(manager, output, fmt, batch_size, species, modification_types, uniprot_ids):
+        """Stream as node-link JSON lines, BEL Script, or an edge list without building a graph."""
+        manager.write_bel(
+            output,
+            fmt=fmt,
+            batch_size=batch_size,
+            species=species or None,
+            modification_types=modification_types or None,
+            uniprot_ids=uniprot_ids or None,
+        )
+
+    return main
+
+
+def add_cli_write_bel_shards(main: click.Group) -> click.Group:  # noqa: D202
+    """Add the command that writes BEL shards in parallel to the ``bel`` group of the command line interface."""
+
+    @main.command()
+    @click.option('-d', '--directory', type=click.Path(file_okay=False), required=True)
+    @click.option('--max-workers', type=int, help='Number of worker processes. Defaults to the number of processors.')
+    @click.option('--partitions', type=int, help='Number of shards. Defaults to a few per worker.')
+    @click.option('--species', multiple=True, help='Only write proteins of this species, like human')
+    @click.option('--modification-type', 'modification_types', multiple=True,
+                  help='Only write modifications of this type, like Ph')
+    @click.pass_obj
+    def shards(manager, directory, max_workers, partitions, species, modification_types):
+        """Build BEL in worker processes and write a JSON graph for each partition of the proteins."""
+        rv = manager.write_bel_shards(
+            directory,
+            max_workers=max_workers,
+            n_partitions=partitions,
+            species=species or None,
+            modification_types=modification_types or None,
+        )
+        for path, number_of_nodes, number_of_edges in rv:
+            click.echo(f'{path}\t{number_of_nodes}\t{number_of_edges}')
+
+    return main
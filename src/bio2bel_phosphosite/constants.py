@@ -10,6 +10,47 @@ DEFAULT_CACHE_CONNECTION = get_connection(MODULE_NAME)
 
 PROTEIN_NAMESPACE = 'UNIPROT'
 
+#: The number of rows sent per INSERT statement when bulk loading
+BULK_INSERT_BATCH_SIZE = 10000
+
+#: The ways bulk inserts can be written when populating. See :mod:`bio2bel_phosphosite.loaders`.
+LOADER_NAMES = ['insert', 'native', 'sqlite', 'copy']
+
+#: The number of values bound in a single ``IN`` clause when looking up many rows
+QUERY_CHUNK_SIZE = 500
+
+#: The number of rows per chunk when streaming the site flat files
+READ_CHUNK_SIZE = 100000
+
+#: The number of rows fetched from the database at a time when exporting to BEL
+EXPORT_BATCH_SIZE = 10000
+
+#: The formats BEL can be streamed to a file in. See :mod:`bio2bel_phosphosite.export`.
+BEL_FILE_FORMAT_NAMES = ['jsonl', 'bel', 'tsv']
+
+#: The number of nodes of each kind kept for reuse when exporting to BEL
+NODE_CACHE_SIZE = 2 ** 18
+
+#: The number of nodes of each kind kept for reuse when streaming BEL to a file. Rows come grouped by protein, so a
+#: small cache catches most of the reuse while keeping the memory needed small.
+STREAM_NODE_CACHE_SIZE = 2 ** 12
+
+#: The number of seconds the statistics read from the database are reused before they're read again
+STATISTICS_CACHE_TTL = 60
+
+#: The number of connections the JSON API keeps open, and how many more it opens when they're all in use
+API_POOL_SIZE = 8
+API_POOL_OVERFLOW = 8
+
+#: The number of rendered JSON API responses kept for the current release
+API_RESPONSE_CACHE_SIZE = 2 ** 14
+
+#: The number of seconds clients and proxies can reuse a JSON API response before checking its ETag again
+API_CACHE_MAX_AGE = 300
+
+#: The largest radius of a window search in the JSON API
+API_MAX_WINDOW_RADIUS = 1000
+
 PHOSPHORYLATION_URL = 'https://www.phosphosite.org/downloads/Phosphorylation_site_dataset.gz'
 PHOSPHORYLATION_PATH = os.path.join(DATA_DIR, 'Phosphorylation_site_dataset.gz')
 
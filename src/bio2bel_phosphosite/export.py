@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+"""Writers that stream BEL to a file as the rows are read from the database, without building a graph.
+
+:meth:`bio2bel_phosphosite.Manager.to_bel` keeps the whole :class:`pybel.BELGraph` in memory, which is more than
+several gigabytes for all species. The writers here pass a :class:`BELSink` in place of the graph to the same edge
+builders, so each edge goes straight to the file. Nothing is kept between rows except for the bounded
+:class:`bio2bel_phosphosite.bel.NodeCache`, so the memory needed doesn't grow with the size of the database.
+
+The formats are:
+
+- ``jsonl``: node-link JSON lines. Each node is written once as a line like the entries of ``nodes`` in
+  :func:`pybel.to_json`, and each edge as a line like the entries of ``links``, except that ``source`` and ``target``
+  are the ``id`` of the nodes instead of their positions.
+- ``bel``: a BEL script like :func:`pybel.to_bel`, with the edges in the order they're read instead of sorted.
+- ``tsv``: an edge list like :func:`pybel.to_csv`, with the source, relation, target, and edge data as JSON.
+"""
+
+import json
+import logging
+import time
+from typing import Callable, Mapping, Optional, TextIO
+
+from bel_resources import make_knowledge_header
+from pybel.canonicalize import edge_to_bel
+from pybel.constants import (
+    ANNOTATIONS, CITATION, CITATION_REFERENCE, CITATION_TYPE, CITATION_TYPE_PUBMED, EVIDENCE, HAS_VARIANT, OBJECT,
+    PYBEL_AUTOEVIDENCE, RELATION,
+)
+from pybel.dsl import BaseEntity, bioprocess, pathology
+from pybel.utils import hash_edge
+
+from .bel import (
+    BEL_GRAPH_NAME, BEL_GRAPH_VERSION, NodeCache, PHOSPHOSITE_NAMESPACE, add_disease_association, add_modification,
+    add_mutation_effect, add_regulatory_effect,
+)
+from .constants import STREAM_NODE_CACHE_SIZE
+from .filters import SiteFilter
+
+__all__ = [
+    'BEL_FILE_FORMATS',
+    'BELSink',
+    'write_bel_jsonl',
+    'write_bel_script',
+    'write_bel_tsv',
+    'write_bel',
+]
+
+log = logging.getLogger(__name__)
+
+
+class BELSink:
+    """Hands each edge from the builders in :mod:`bio2bel_phosphosite.bel` to a function instead of keeping it.
+
+    It takes the same edges a :class:`pybel.BELGraph` does.
+    """
+
+    def __init__(self, write_edge: Callable[[BaseEntity, BaseEntity, dict], None]):
+        """Build a sink.
+
+        :param write_edge: A function that takes the source node, the target node, and the edge data dictionary
+        """
+        self.write_edge = write_edge
+        self.number_of_edges = 0
+
+    def add_qualified_edge(self, u: BaseEntity, v: BaseEntity, *, relation: str, evidence: str, citation: str,
+                           annotations: Optional[Mapping[str, str]] = None,
+                           object_modifier: Optional[Mapping] = None) -> None:
+        """Write a qualified edge with the same data :meth:`pybel.BELGraph.add_qualified_edge` would store."""
+        data = {
+            RELATION: relation,
+            EVIDENCE: evidence,
+            CITATION: {
+                CITATION_TYPE: CITATION_TYPE_PUBMED,
+                CITATION_REFERENCE: citation,
+            },
+        }
+        if annotations:
+            data[ANNOTATIONS] = {key: {value: True} for key, value in annotations.items()}
+        if object_modifier:
+            data[OBJECT] = object_modifier
+
+        self.write_edge(u, v, data)
+        self.number_of_edges += 1
+
+    def add_has_variant(self, u: BaseEntity, v: BaseEntity) -> None:
+        """Write a has variant edge."""
+        self.write_edge(u, v, {RELATION: HAS_VARIANT})
+        self.number_of_edges += 1
+
+
+def _write_variants(manager, sink: BELSink, nodes: NodeCache, batch_size: Optional[int] = None,
+                    write_node: Optional[Callable[[BaseEntity], None]] = None,
+                    site_filter: Optional[SiteFilter] = None) -> None:
+    """Send the has variant edges from each protein to its modifications and mutations to the sink.
+
+    A :class:`pybel.BELGraph` adds the edges to mutations by itself when the edges between mutations and
+    modifications are added, so they're written here to match.
+
+    :param write_node: If given, is called with each modification and mutation before its edge is written
+    :param site_filter: If given, only the modifications and mutations it keeps are written
+    """
+    for row in manager._iter_modification_rows(batch_size=batch_size, distinct=True, site_filter=site_filter):
+        if write_node is not None:
+            write_node(nodes.modification(*row))
+        add_modification(sink, *row, nodes=nodes)
+
+    for row in manager._iter_mutation_rows(batch_size=batch_size, site_filter=site_filter):
+        mutation = nodes.mutation(*row)
+        if write_node is not None:
+            write_node(mutation)
+        sink.add_has_variant(nodes.protein(row[0]), mutation)
+
+
+def _write_edges(manager, sink: BELSink, nodes: NodeCache, batch_size: Optional[int] = None,
+                 site_filter: Optional[SiteFilter] = None) -> None:
+    """Send the qualified edges of the database, or the ones the filter keeps, to the sink."""
+    for row in manager._iter_mutation_effect_rows(batch_size=batch_size, site_filter=site_filter):
+        add_mutation_effect(sink, *row, nodes=nodes)
+
+    for row in manager._iter_regulatory_effect_rows(batch_size=batch_size, site_filter=site_filter):
+        add_regulatory_effect(sink, *row, nodes=nodes)
+
+    for row in manager._iter_disease_association_rows(batch_size=batch_size, site_filter=site_filter):
+        add_disease_association(sink, *row, nodes=nodes)
+
+
+def write_bel_jsonl(manager,
+                    file: TextIO,
+                    batch_size: Optional[int] = None,
+                    node_cache_size: Optional[int] = STREAM_NODE_CACHE_SIZE,
+                    site_filter: Optional[SiteFilter] = None,
+                    ) -> Mapping[str, int]:
+    """Write the database as node-link JSON lines.
+
+    Nodes are read with queries that give each one once, so there's no need to remember which were written.
+    Each node is written before the edges that use it.
+
+    :param manager: A populated manager
+    :param file: A writable file-like object
+    :param batch_size: The number of rows fetched from the database at a time
+    :param node_cache_size: The number of nodes of each kind kept for reuse
+    :param site_filter: If given, only the parts of the database it keeps are written
+    :return: The number of nodes and edges written
+    """
+    nodes = NodeCache(maxsize=node_cache_size)
+    number_of_nodes = 0
+
+    def write_node(node: BaseEntity) -> None:
+        nonlocal number_of_nodes
+        print(json.dumps(dict(node, id=node.sha512, bel=node.as_bel())), file=file)
+        number_of_nodes += 1
+
+    def write_edge(u: BaseEntity, v: BaseEntity, data: dict) -> None:
+        print(json.dumps(dict(data, source=u.sha512, target=v.sha512, key=hash_edge(u, v, data))), file=file)
+
+    sink = BELSink(write_edge)
+
+    for uniprot_id, in manager._iter_protein_rows(batch_size=batch_size, site_filter=site_filter):
+        write_node(nodes.protein(uniprot_id))
+
+    _write_variants(manager, sink, nodes, batch_size=batch_size, write_node=write_node, site_filter=site_filter)
+
+    for name, in manager._iter_regulatory_effect_names(batch_size=batch_size, site_filter=site_filter):
+        write_node(bioprocess(namespace=PHOSPHOSITE_NAMESPACE, name=name))
+
+    for disease, in manager._iter_disease_names(batch_size=batch_size, site_filter=site_filter):
+        write_node(pathology(namespace=PHOSPHOSITE_NAMESPACE, name=disease))
+
+    _write_edges(manager, sink, nodes, batch_size=batch_size, site_filter=site_filter)
+
+    return dict(nodes=number_of_nodes, edges=sink.number_of_edges)
+
+
+def write_bel_script(manager,
+                     file: TextIO,
+                     batch_size: Optional[int] = None,
+                     node_cache_size: Optional[int] = STREAM_NODE_CACHE_SIZE,
+                     site_filter: Optional[SiteFilter] = None,
+                     ) -> Mapping[str, int]:
+    """Write the database as a BEL script.
+
+    The citation and evidence are set whenever they change from the edge before, and the annotations of each
+    qualified edge are set before and unset after it like :func:`pybel.to_bel` does. The has variant edges follow in
+    a block of their own.
+
+    :param manager: A populated manager
+    :param file: A writable file-like object
+    :param batch_size: The number of rows fetched from the database at a time
+    :param node_cache_size: The number of nodes of each kind kept for reuse
+    :param site_filter: If given, only the parts of the database it keeps are written
+    :return: The number of edges written
+    """
+    nodes = NodeCache(maxsize=node_cache_size)
+
+    for line in make_knowledge_header(name=BEL_GRAPH_NAME, version=BEL_GRAPH_VERSION):
+        print(line, file=file)
+
+    citation = None
+
+    def write_qualified_edge(u: BaseEntity, v: BaseEntity, data: dict) -> None:
+        nonlocal citation
+        if citation != (data[CITATION][CITATION_REFERENCE], data[EVIDENCE]):
+            if citation is not None:
+                print('UNSET SupportingText', file=file)
+            citation = data[CITATION][CITATION_REFERENCE], data[EVIDENCE]
+            # setting the citation clears the evidence, so both are set again
+            print(f'\nSET Citation = {{"{CITATION_TYPE_PUBMED}", "{citation[0]}"}}', file=file)
+            print(f'SET SupportingText = "{citation[1]}"', file=file)
+
+        keys = sorted(data.get(ANNOTATIONS, ()))
+        for key in keys:
+            print(f'SET {key} = "{next(iter(data[ANNOTATIONS][key]))}"', file=file)
+        print(edge_to_bel(u, v, data), file=file)
+        if keys:
+            print('UNSET {}'.format(keys[0] if len(keys) == 1 else '{' + ', '.join(keys) + '}'), file=file)
+
+    qualified_sink = BELSink(write_qualified_edge)
+    _write_edges(manager, qualified_sink, nodes, batch_size=batch_size, site_filter=site_filter)
+    if citation is not None:
+        print('UNSET SupportingText', file=file)
+        print('UNSET Citation\n', file=file)
+
+    unqualified_sink = BELSink(lambda u, v, data: print(u.as_bel(), data[RELATION], v.as_bel(), file=file))
+    print('#' * 80, file=file)
+    print('SET Citation = {"PubMed","Added by PyBEL","29048466"}', file=file)
+    print(f'SET SupportingText = "{PYBEL_AUTOEVIDENCE}"', file=file)
+    _write_variants(manager, unqualified_sink, nodes, batch_size=batch_size, site_filter=site_filter)
+    print('UNSET SupportingText', file=file)
+    print('UNSET Citation', file=file)
+
+    return dict(edges=qualified_sink.number_of_edges + unqualified_sink.number_of_edges)
+
+
+def write_bel_tsv(manager,
+                  file: TextIO,
+                  batch_size: Optional[int] = None,
+                  node_cache_size: Optional[int] = STREAM_NODE_CACHE_SIZE,
+                  site_filter: Optional[SiteFilter] = None,
+                  ) -> Mapping[str, int]:
+    """Write the database as a tab-separated edge list.
+
+    :param manager: A populated manager
+    :param file: A writable file-like object
+    :param batch_size: The number of rows fetched from the database at a time
+    :param node_cache_size: The number of nodes of each kind kept for reuse
+    :param site_filter: If given, only the parts of the database it keeps are written
+    :return: The number of edges written
+    """
+    nodes = NodeCache(maxsize=node_cache_size)
+    sink = BELSink(lambda u, v, data: print(edge_to_bel(u, v, data, sep='\t'), json.dumps(data), sep='\t', file=file))
+
+    _write_variants(manager, sink, nodes, batch_size=batch_size, site_filter=site_filter)
+    _write_edges(manager, sink, nodes, batch_size=batch_size, site_filter=site_filter)
+
+    return dict(edges=sink.number_of_edges)
+
+
+#: The writer for each format, in the order of :data:`bio2bel_phosphosite.constants.BEL_FILE_FORMAT_NAMES`
+BEL_FILE_FORMATS = {
+    'jsonl': write_bel_jsonl,
+    'bel': write_bel_script,
+    'tsv': write_bel_tsv,
+}
+
+
+def write_bel(manager,
+              file: TextIO,
+              fmt: str = 'jsonl',
+              batch_size: Optional[int] = None,
+              node_cache_size: Optional[int] = STREAM_NODE_CACHE_SIZE,
+              site_filter: Optional[SiteFilter] = None,
+              ) -> Mapping[str, int]:
+    """Stream the database as BEL in the given format.
+
+    :param manager: A populated manager
+    :param file: A writable file-like object
+    :param fmt: One of ``jsonl``, ``bel``, or ``tsv``
+    :param batch_size: The number of rows fetched from the database at a time
+    :param node_cache_size: The number of nodes of each kind kept for reuse
+    :param site_filter: If given, only the parts of the database it keeps are written
+    :return: The number of nodes and edges written
+    """
+    writer = BEL_FILE_FORMATS.get(fmt)
+    if writer is None:
+        raise ValueError(f'unknown format {fmt!r}. Use one of {", ".join(BEL_FILE_FORMATS)}')
+
+    log.info('writing BEL as %s', fmt)
+    t = time.time()
+    rv = writer(manager, file, batch_size=batch_size, node_cache_size=node_cache_size, site_filter=site_filter)
+    log.info('done writing %s in %.2f seconds', rv, time.time() - t)
+    return rv
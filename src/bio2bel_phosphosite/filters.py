@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""Restrict what's populated and exported to some species, modification types, or proteins.
+
+A :class:`SiteFilter` is applied as early as it can be. When populating, the data sets of other modification types
+aren't read at all, and the rows of other species and proteins are dropped from each chunk as soon as it's read,
+before ``MOD_RSD`` is parsed or anything is looked up in the database. When exporting, the conditions are added to the
+``WHERE`` clauses of the queries, so the rows that don't match never leave the database.
+
+>>> import pandas as pd
+>>> site_filter = SiteFilter.from_values(species='human', uniprot_ids=['P31749', 'P31751'])
+>>> df = pd.DataFrame({'ACC_ID': ['P31749', 'P31749', 'Q9WV60'], 'ORGANISM': ['human', 'mouse', 'human']})
+>>> site_filter.filter_df(df).index.tolist()
+[0]
+>>> site_filter.allows_modification_type('Ph')
+True
+"""
+
+from typing import FrozenSet, Iterable, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+from sqlalchemy import select
+
+from .constants import QUERY_CHUNK_SIZE
+from .models import ModificationType, Species
+
+__all__ = [
+    'SiteFilter',
+]
+
+Values = Optional[Union[str, Iterable[str]]]
+
+
+def _freeze(values: Values) -> Optional[FrozenSet[str]]:
+    if values is None:
+        return
+    if isinstance(values, str):
+        return frozenset([values])
+    return frozenset(values)
+
+
+class SiteFilter(NamedTuple):
+    """The species, modification types, and proteins to keep. Each one that's none is not restricted."""
+
+    #: The names of the species, like ``human``
+    species: Optional[FrozenSet[str]] = None
+
+    #: The names of the modification types as they're stored, like ``Ph`` or ``Ac``
+    modification_types: Optional[FrozenSet[str]] = None
+
+    #: The UniProt identifiers of the proteins
+    uniprot_ids: Optional[FrozenSet[str]] = None
+
+    #: A half-open range of the database identifiers of the proteins, for splitting an export into partitions. It's
+    #: only used for queries.
+    protein_id_range: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def from_values(cls,
+                    species: Values = None,
+                    modification_types: Values = None,
+                    uniprot_ids: Values = None,
+                    ) -> Optional['SiteFilter']:
+        """Build a filter from a name or an iterable of names for each restriction.
+
+        :return: A filter, or none if nothing is restricted
+        """
+        if species is None and modification_types is None and uniprot_ids is None:
+            return
+
+        return cls(
+            species=_freeze(species),
+            modification_types=_freeze(modification_types),
+            uniprot_ids=_freeze(uniprot_ids),
+        )
+
+    def allows_species(self, name: str) -> bool:
+        """Check if the species is kept."""
+        return self.species is None or name in self.species
+
+    def allows_modification_type(self, name: str) -> bool:
+        """Check if the modification type is kept."""
+        return self.modification_types is None or name in self.modification_types
+
+    def filter_df(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Keep the rows of a data frame from one of the data sets that are of the given species and proteins.
+
+        The ``ORGANISM`` and ``ACC_ID`` columns are used. If there's a ``modification_type`` column, like after
+        the ``MOD_RSD`` column is parsed, it's used too.
+        """
+        mask = pd.Series(True, index=df.index)
+
+        if self.species is not None:
+            mask &= df.ORGANISM.isin(self.species)
+        if self.uniprot_ids is not None:
+            mask &= df.ACC_ID.isin(self.uniprot_ids)
+        if self.modification_types is not None and 'modification_type' in df.columns:
+            mask &= df.modification_type.isin(self.modification_types)
+
+        return df if mask.all() else df[mask]
+
+    def select_modification_type_ids(self):
+        """Select the identifiers of the modification types that are kept, for restricting other tables by."""
+        return select([ModificationType.id]).where(ModificationType.name.in_(sorted(self.modification_types)))
+
+    def filter_query(self, query, protein, modification_type=None) -> Iterable:
+        """Restrict a query to the given species, proteins, and modification types.
+
+        The UniProt identifiers are bound in chunks of :data:`bio2bel_phosphosite.constants.QUERY_CHUNK_SIZE`, so
+        there's one query for each chunk. Since they're split by protein, a row is only in one of them.
+
+        :param query: A query that selects from or joins the protein table
+        :param protein: The protein model, or an alias of it, to restrict
+        :param modification_type: The modification type model, or an alias of it, to restrict. If none, the
+         modification types aren't restricted.
+        :return: The restricted queries
+        """
+        if self.species is not None:
+            query = query.filter(protein.species_id.in_(
+                select([Species.id]).where(Species.name.in_(sorted(self.species)))
+            ))
+
+        if self.modification_types is not None and modification_type is not None:
+            query = query.filter(modification_type.id.in_(self.select_modification_type_ids()))
+
+        if self.protein_id_range is not None:
+            start, stop = self.protein_id_range
+            query = query.filter(start <= protein.id, protein.id < stop)
+
+        if self.uniprot_ids is None:
+            yield query
+            return
+
+        uniprot_ids = sorted(self.uniprot_ids)
+        for start in range(0, len(uniprot_ids), QUERY_CHUNK_SIZE):
+            yield query.filter(protein.uniprot_id.in_(uniprot_ids[start:start + QUERY_CHUNK_SIZE]))
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""Opt-in measurements of where populating and exporting spend their time.
+
+While :meth:`bio2bel_phosphosite.Manager.instrument` is active, the manager's work is split into phases, like
+``download``, ``parse``, ``build``, ``flush``, ``commit``, ``index``, ``statistics``, ``export``, and ``lookup``, and
+every SQL statement sent through its engine is counted. Each phase records:
+
+- ``seconds``: the wall time spent in it, not counting the phases inside it, so the phases add up to the total. The
+  rest of the total is reported as ``unattributed_seconds``.
+- ``calls``: how many times it was entered
+- ``rows``: how many rows it handled, like rows parsed, inserted, or exported
+- ``rows_per_second``: the rows over the seconds
+- ``statements``: the SQL statements executed in it, by their first keyword, and the seconds spent executing them.
+  Statements count towards the innermost phase only.
+- ``peak_rss_mb``: the peak resident memory of the process when it last ended. The operating system only reports the
+  peak over the whole life of the process, so it never goes down from one phase to the next.
+
+>>> instrumentation = Instrumentation()
+>>> with instrumentation.phase('parse'):
+...     instrumentation.add_rows(10)
+>>> report = instrumentation.report()
+>>> report['phases']['parse']['rows'], report['phases']['parse']['calls']
+(10, 1)
+"""
+
+import json
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, TextIO, TypeVar
+
+from sqlalchemy import event
+
+try:
+    import resource
+except ImportError:  # there is no resource module on Windows
+    resource = None
+
+__all__ = [
+    'Instrumentation',
+    'get_peak_rss',
+]
+
+X = TypeVar('X')
+
+
+def get_peak_rss() -> Optional[int]:
+    """Get the peak resident memory of this process in bytes, or none if the operating system doesn't report it."""
+    if resource is None:
+        return
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _Phase:
+    """The measurements of one phase, summed over every time it was entered."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.rows = 0
+        self.statements = Counter()
+        self.sql_seconds = 0.0
+        self.peak_rss = None
+
+    def to_dict(self) -> Mapping[str, Any]:
+        """Get the measurements as they appear in the report."""
+        return dict(
+            seconds=self.seconds,
+            calls=self.calls,
+            rows=self.rows,
+            rows_per_second=self.rows / self.seconds if self.rows and self.seconds else None,
+            statements=sum(self.statements.values()),
+            statements_by_kind=dict(self.statements),
+            sql_seconds=self.sql_seconds,
+            peak_rss_mb=self.peak_rss / 2 ** 20 if self.peak_rss is not None else None,
+        )
+
+
+class _Frame:
+    """A phase that's currently entered."""
+
+    def __init__(self, phase: _Phase):
+        self.phase = phase
+        self.start = time.perf_counter()
+        self.child_seconds = 0.0
+
+
+class Instrumentation:
+    """Collects the time, rows, SQL statements, and memory of the phases of a manager's work."""
+
+    def __init__(self):
+        """Build an instrumentation that isn't attached to any engine yet."""
+        self.phases = {}
+        self._stack: List[_Frame] = []
+        self._total = _Phase()
+        self._start = None
+        self._engines = []
+
+    def attach(self, engine) -> None:
+        """Start counting the statements executed on the engine."""
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        self._engines.append(engine)
+        if self._start is None:
+            self._start = time.perf_counter()
+
+    def detach(self) -> None:
+        """Stop counting the statements on all engines it's attached to."""
+        for engine in self._engines:
+            event.remove(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.remove(engine, 'after_cursor_execute', self._after_cursor_execute)
+        self._engines.clear()
+        if self._start is not None:
+            self._total.seconds += time.perf_counter() - self._start
+            self._start = None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('instrumentation_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['instrumentation_start'].pop()
+        kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+
+        for phase in (self._total, self._stack[-1].phase) if self._stack else (self._total,):
+            phase.statements[kind] += 1
+            phase.sql_seconds += seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure the code in the context as part of the phase with the given name.
+
+        Phases can be nested and entered more than once. Rows are added with :meth:`add_rows`.
+        """
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = _Phase()
+
+        frame = _Frame(phase)
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            seconds = time.perf_counter() - frame.start
+            phase.seconds += seconds - frame.child_seconds
+            phase.calls += 1
+            phase.peak_rss = get_peak_rss()
+            if self._stack:
+                self._stack[-1].child_seconds += seconds
+
+    def add_rows(self, n: int) -> None:
+        """Count rows towards the innermost phase that's currently entered."""
+        if self._stack:
+            self._stack[-1].phase.rows += int(n)
+
+    def iterate(self, name: str, iterable: Iterable[X], count=len) -> Iterator[X]:
+        """Measure getting each element of an iterable, like the chunks of a file being parsed, as the given phase.
+
+        :param count: A function that counts the rows in an element
+        """
+        it = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    element = next(it)
+                except StopIteration:
+                    return
+                self.add_rows(count(element))
+            yield element
+
+    def report(self) -> Mapping[str, Any]:
+        """Summarize the measurements as a JSON-serializable dictionary with the totals and each phase."""
+        seconds = self._total.seconds
+        if self._start is not None:
+            seconds += time.perf_counter() - self._start
+        peak_rss = get_peak_rss()
+
+        return dict(
+            total=dict(
+                seconds=seconds,
+                unattributed_seconds=seconds - sum(phase.seconds for phase in self.phases.values()),
+                statements=sum(self._total.statements.values()),
+                statements_by_kind=dict(self._total.statements),
+                sql_seconds=self._total.sql_seconds,
+                peak_rss_mb=peak_rss / 2 ** 20 if peak_rss is not None else None,
+            ),
+            phases={
+                name: phase.to_dict()
+                for name, phase in self.phases.items()
+            },
+        )
+
+    def write_report(self, file: TextIO) -> None:
+        """Write the report as JSON."""
+        json.dump(self.report(), file, indent=2)
+        print(file=file)
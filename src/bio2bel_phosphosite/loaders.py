@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+
+"""Loaders that write the tables prepared by the bulk path of :meth:`bio2bel_phosphosite.Manager.populate`.
+
+The species, proteins, modifications, mutations, and everything that refers to them are resolved and prepared as
+data frames whose columns are named after the columns of their tables. A loader decides how those rows get into the
+database. They're chosen with the ``loader`` argument of :meth:`bio2bel_phosphosite.Manager.populate`:
+
+- ``insert``: batches of executemany ``INSERT`` statements through SQLAlchemy Core. This works on any database and is
+  the default.
+- ``sqlite``: batches of executemany ``INSERT`` statements with plain tuples, which skips binding the parameters of
+  each row through SQLAlchemy. While loading, the database is in write-ahead logging mode and SQLite doesn't wait for
+  writes to reach the disk (``PRAGMA synchronous=OFF``). An interrupted load has to be redone either way, so nothing
+  is lost by that. Both settings are put back when it's done.
+- ``copy``: each batch is written to an in-memory CSV buffer and streamed to PostgreSQL with ``COPY ... FROM STDIN``
+  using psycopg2, which comes with the ``postgres`` extra. The foreign keys are dropped while loading and added back
+  at the end, so they're checked once per table instead of once per row.
+- ``native``: ``sqlite`` or ``copy``, depending on the database, or ``insert`` if neither fits.
+
+The indexes on the lookup keys are dropped and built again at the end of the modifications no matter which loader is
+used. See :meth:`bio2bel_phosphosite.Manager.drop_indexes`.
+"""
+
+import io
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterable, List, Mapping, Optional, Tuple, Type
+
+import pandas as pd
+from sqlalchemy import Integer, Table, event, inspect
+
+from .constants import BULK_INSERT_BATCH_SIZE, LOADER_NAMES
+from .models import Base
+
+__all__ = [
+    'Loader',
+    'SQLiteLoader',
+    'PostgreSQLCopyLoader',
+    'get_loader',
+]
+
+log = logging.getLogger(__name__)
+
+#: The text COPY reads as a null value. Unquoted empty fields are read as empty strings.
+_COPY_NULL = r'\N'
+
+
+class Loader:
+    """Writes rows with batches of executemany ``INSERT`` statements through SQLAlchemy Core."""
+
+    #: The name the loader is chosen by
+    name = 'insert'
+
+    #: The name of the only SQLAlchemy dialect the loader works with, if any
+    dialect: Optional[str] = None
+
+    @contextmanager
+    def loading(self, manager) -> Iterable[None]:
+        """Prepare the database of the manager for loading and put it back afterwards."""
+        yield
+
+    def load(self, session, table: Table, df: pd.DataFrame, batch_size: Optional[int] = None) -> int:
+        """Write the rows of a data frame whose columns are named after the columns of the table, without committing.
+
+        :param session: The session whose transaction the rows are written in
+        :param table: The table the rows are written to
+        :param df: The rows. Missing values should already be :data:`None`.
+        :param batch_size: The number of rows per statement. Defaults to
+         :data:`bio2bel_phosphosite.constants.BULK_INSERT_BATCH_SIZE`.
+        :return: The number of rows written
+        """
+        if batch_size is None:
+            batch_size = BULK_INSERT_BATCH_SIZE
+
+        insert = table.insert()
+        for start in range(0, len(df.index), batch_size):
+            session.execute(insert, df.iloc[start:start + batch_size].to_dict('records'))
+
+        return len(df.index)
+
+
+def _quote_columns(engine, columns: Iterable[str]) -> str:
+    return ', '.join(engine.dialect.identifier_preparer.quote(column) for column in columns)
+
+
+class SQLiteLoader(Loader):
+    """Writes rows to SQLite with executemany on plain tuples, with the journal and syncing relaxed while loading."""
+
+    name = 'sqlite'
+    dialect = 'sqlite'
+
+    @contextmanager
+    def loading(self, manager) -> Iterable[None]:
+        """Switch to write-ahead logging and turn off syncing while loading, then put both back.
+
+        The rows are committed if the load succeeds and rolled back if it fails.
+
+        The journal mode is kept in the database file, so it's set once. Syncing is set on each connection, so it's
+        turned off whenever a connection is checked out of the pool and put back when it's returned.
+        """
+        manager.session.commit()
+        engine = manager.engine
+
+        with engine.connect() as connection:
+            journal_mode = connection.execute('PRAGMA journal_mode').scalar()
+            synchronous = connection.execute('PRAGMA synchronous').scalar()
+            connection.execute('PRAGMA journal_mode=WAL')
+
+        def relax(dbapi_connection, connection_record, connection_proxy):
+            dbapi_connection.execute('PRAGMA synchronous=OFF')
+
+        def restore(dbapi_connection, connection_record):
+            if dbapi_connection is not None:
+                dbapi_connection.execute(f'PRAGMA synchronous={synchronous}')
+
+        event.listen(engine, 'checkout', relax)
+        event.listen(engine, 'checkin', restore)
+        # committing or rolling back returns the session's connection to the pool before the listeners go
+        try:
+            yield
+        except Exception:
+            manager.session.rollback()
+            raise
+        else:
+            manager.session.commit()
+        finally:
+            event.remove(engine, 'checkout', relax)
+            event.remove(engine, 'checkin', restore)
+
+            with engine.connect() as connection:
+                restored = connection.execute(f'PRAGMA journal_mode={journal_mode}').scalar()
+            if restored != journal_mode:
+                log.warning('could not set the journal mode back to %s from %s', journal_mode, restored)
+
+    def load(self, session, table: Table, df: pd.DataFrame, batch_size: Optional[int] = None) -> int:
+        """Write the rows of a data frame to a table in batches of tuples, without committing."""
+        if batch_size is None:
+            batch_size = BULK_INSERT_BATCH_SIZE
+
+        df = df.astype(object)
+        df = df.where(df.notnull(), None)
+
+        connection = session.connection()
+        statement = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.dialect.identifier_preparer.format_table(table),
+            _quote_columns(connection, df.columns),
+            ', '.join('?' for _ in df.columns),
+        )
+
+        rows = list(df.itertuples(index=False, name=None))
+        for start in range(0, len(rows), batch_size):
+            connection.execute(statement, rows[start:start + batch_size])
+
+        return len(rows)
+
+
+def _drop_foreign_keys(engine) -> List[Tuple[str, Mapping]]:
+    """Drop the foreign keys of all tables, returning them as they were reflected so they can be added back."""
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+
+    rv = []
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            for foreign_key in inspector.get_foreign_keys(table.name):
+                log.info('dropping foreign key %s', foreign_key['name'])
+                connection.execute('ALTER TABLE {} DROP CONSTRAINT {}'.format(
+                    preparer.quote(table.name),
+                    preparer.quote(foreign_key['name']),
+                ))
+                rv.append((table.name, foreign_key))
+
+    return rv
+
+
+def _add_foreign_keys(engine, foreign_keys: List[Tuple[str, Mapping]]) -> None:
+    """Add back the foreign keys from :func:`_drop_foreign_keys`, which checks all the rows of each table at once."""
+    preparer = engine.dialect.identifier_preparer
+
+    with engine.begin() as connection:
+        for table_name, foreign_key in reversed(foreign_keys):
+            log.info('building foreign key %s', foreign_key['name'])
+            t = time.time()
+            options = foreign_key.get('options', {})
+            connection.execute('ALTER TABLE {} ADD CONSTRAINT {} FOREIGN KEY ({}) REFERENCES {} ({}){}'.format(
+                preparer.quote(table_name),
+                preparer.quote(foreign_key['name']),
+                _quote_columns(engine, foreign_key['constrained_columns']),
+                preparer.quote(foreign_key['referred_table']),
+                _quote_columns(engine, foreign_key['referred_columns']),
+                ''.join(
+                    f' ON {action.upper()} {options[f"on{action}"]}'
+                    for action in ('delete', 'update')
+                    if options.get(f'on{action}')
+                ),
+            ))
+            log.info('done building foreign key %s in %.2f seconds', foreign_key['name'], time.time() - t)
+
+
+class PostgreSQLCopyLoader(Loader):
+    """Streams rows to PostgreSQL as CSV with ``COPY ... FROM STDIN``, with the foreign keys built at the end."""
+
+    name = 'copy'
+    dialect = 'postgresql'
+
+    @contextmanager
+    def loading(self, manager) -> Iterable[None]:
+        """Drop the foreign keys while loading and add them back afterwards."""
+        manager.session.commit()
+        foreign_keys = _drop_foreign_keys(manager.engine)
+        try:
+            yield
+        except Exception:
+            manager.session.rollback()
+            raise
+        else:
+            manager.session.commit()
+        finally:
+            with manager._phase('index'):
+                _add_foreign_keys(manager.engine, foreign_keys)
+
+    def load(self, session, table: Table, df: pd.DataFrame, batch_size: Optional[int] = None) -> int:
+        """Write the rows of a data frame to a table with one ``COPY`` per batch, without committing."""
+        if batch_size is None:
+            batch_size = BULK_INSERT_BATCH_SIZE
+
+        # integer columns with missing values would be written as floats, which COPY doesn't read as integers
+        df = df.assign(**{
+            column: pd.to_numeric(df[column]).astype('Int64')
+            for column in df.columns
+            if isinstance(table.c[column].type, Integer)
+        })
+
+        connection = session.connection()
+        statement = "COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '{}')".format(
+            connection.dialect.identifier_preparer.format_table(table),
+            _quote_columns(connection, df.columns),
+            _COPY_NULL,
+        )
+
+        cursor = connection.connection.cursor()
+        try:
+            for start in range(0, len(df.index), batch_size):
+                buffer = io.StringIO()
+                df.iloc[start:start + batch_size].to_csv(buffer, index=False, header=False, na_rep=_COPY_NULL)
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+        finally:
+            cursor.close()
+
+        return len(df.index)
+
+
+#: The loaders that can be chosen by name, besides ``native``
+_loaders: Mapping[str, Type[Loader]] = {
+    loader.name: loader
+    for loader in (Loader, SQLiteLoader, PostgreSQLCopyLoader)
+}
+
+#: The loader ``native`` picks for each SQLAlchemy dialect
+_native_loaders: Mapping[str, Type[Loader]] = {
+    loader.dialect: loader
+    for loader in _loaders.values()
+    if loader.dialect is not None
+}
+
+
+def get_loader(name: Optional[str], engine) -> Loader:
+    """Get a loader by name for the database of an engine.
+
+    :param name: One of :data:`bio2bel_phosphosite.constants.LOADER_NAMES`. If none, uses ``insert``.
+    :param engine: The engine of the database that's loaded
+    :raises ValueError: If the name is unknown or the loader doesn't work with the database
+    """
+    if name is None:
+        return Loader()
+
+    if name == 'native':
+        return _native_loaders.get(engine.dialect.name, Loader)()
+
+    loader = _loaders.get(name)
+    if loader is None:
+        raise ValueError(f'unknown loader {name!r}. Use one of {", ".join(LOADER_NAMES)}')
+    if loader.dialect is not None and loader.dialect != engine.dialect.name:
+        raise ValueError(f'the {name} loader only works with {loader.dialect}, not {engine.dialect.name}')
+
+    return loader()
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+"""Look up many proteins and all of their modifications and mutations at once.
+
+Getting each protein with :meth:`bio2bel_phosphosite.Manager.get_protein_by_uniprot_id` and then its modifications
+through the ORM takes at least two queries per protein. Here, the UniProt identifiers are read in chunks of
+:data:`bio2bel_phosphosite.constants.QUERY_CHUNK_SIZE`, and each chunk takes three queries with an ``IN`` clause: one
+for the proteins, one for their modifications, and one for their mutations. The identifiers can come from any
+iterable, like the lines of a file, so they're never all held in memory, and an annotation is made for each one in the
+order they came in, including the ones that aren't in the database.
+
+The formats they can be written in are:
+
+- ``tsv``: a header and one line per identifier with the gene name, protein name, species, the modifications like
+  ``S473-Ph``, and the mutations like ``E17K``. Lists are separated by semicolons and missing values are empty.
+- ``jsonl``: one JSON object per identifier with the same fields. Modifications and mutations are lists of objects.
+"""
+
+import json
+import logging
+import time
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, NamedTuple, Optional, TextIO
+
+from .constants import QUERY_CHUNK_SIZE
+from .models import Modification, ModificationType, Mutation, Protein, Species
+from .site_index import ModificationSite, MutationSite
+
+__all__ = [
+    'ANNOTATION_FILE_FORMATS',
+    'ProteinAnnotation',
+    'annotate_proteins',
+    'annotation_to_json',
+    'read_uniprot_ids',
+    'write_annotations_jsonl',
+    'write_annotations_tsv',
+    'write_protein_annotations',
+]
+
+log = logging.getLogger(__name__)
+
+#: The columns of the ``tsv`` format
+ANNOTATION_TSV_COLUMNS = ['uniprot_id', 'gene_name', 'protein_name', 'species', 'modifications', 'mutations']
+
+
+class ProteinAnnotation(NamedTuple):
+    """A protein that was looked up, with its modifications and mutations sorted by position."""
+
+    uniprot_id: str
+    found: bool
+    gene_name: Optional[str] = None
+    protein_name: Optional[str] = None
+    species: Optional[str] = None
+    modifications: List[ModificationSite] = []
+    mutations: List[MutationSite] = []
+
+
+def read_uniprot_ids(file: TextIO) -> Iterator[str]:
+    """Read UniProt identifiers from the first column of each line of a file, skipping blank lines and comments."""
+    for line in file:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line.split()[0]
+
+
+def _iter_chunks(values: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    it = iter(values)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _annotate_chunk(session, uniprot_ids: List[str]) -> Iterator[ProteinAnnotation]:
+    """Look up a chunk of proteins with one query each for the proteins, modifications, and mutations."""
+    proteins = {
+        uniprot_id: (protein_id, gene_name, protein_name, species)
+        for protein_id, uniprot_id, gene_name, protein_name, species in (
+            session.query(Protein.id, Protein.uniprot_id, Protein.gene_name, Protein.protein_name, Species.name)
+            .outerjoin(Species, Protein.species_id == Species.id)
+            .filter(Protein.uniprot_id.in_(sorted(set(uniprot_ids))))
+        )
+    }
+    protein_id_to_uniprot_id = {
+        protein_id: uniprot_id
+        for uniprot_id, (protein_id, *_) in proteins.items()
+    }
+
+    modifications = {uniprot_id: [] for uniprot_id in proteins}
+    mutations = {uniprot_id: [] for uniprot_id in proteins}
+    if protein_id_to_uniprot_id:
+        protein_ids = sorted(protein_id_to_uniprot_id)
+        modification_query = (
+            session.query(Modification.id, Modification.protein_id, Modification.residue, Modification.position,
+                          ModificationType.name)
+            .join(ModificationType, Modification.modification_type_id == ModificationType.id)
+            .filter(Modification.protein_id.in_(protein_ids))
+            .order_by(Modification.protein_id, Modification.position, Modification.id)
+        )
+        for modification_id, protein_id, residue, position, modification_type in modification_query:
+            uniprot_id = protein_id_to_uniprot_id[protein_id]
+            modifications[uniprot_id].append(
+                ModificationSite(modification_id, uniprot_id, residue, position, modification_type)
+            )
+
+        mutation_query = (
+            session.query(Mutation.id, Mutation.protein_id, Mutation.from_aa, Mutation.position, Mutation.to_aa)
+            .filter(Mutation.protein_id.in_(protein_ids))
+            .order_by(Mutation.protein_id, Mutation.position, Mutation.id)
+        )
+        for mutation_id, protein_id, from_aa, position, to_aa in mutation_query:
+            uniprot_id = protein_id_to_uniprot_id[protein_id]
+            mutations[uniprot_id].append(MutationSite(mutation_id, uniprot_id, from_aa, position, to_aa))
+
+    for uniprot_id in uniprot_ids:
+        protein = proteins.get(uniprot_id)
+        if protein is None:
+            yield ProteinAnnotation(uniprot_id, False)
+            continue
+
+        _, gene_name, protein_name, species = protein
+        yield ProteinAnnotation(
+            uniprot_id,
+            True,
+            gene_name=gene_name,
+            protein_name=protein_name,
+            species=species,
+            modifications=modifications[uniprot_id],
+            mutations=mutations[uniprot_id],
+        )
+
+
+def annotate_proteins(manager,
+                      uniprot_ids: Iterable[str],
+                      chunk_size: Optional[int] = None,
+                      ) -> Iterator[ProteinAnnotation]:
+    """Look up proteins and their modifications and mutations in chunks, giving an annotation for each identifier.
+
+    :param manager: A populated manager
+    :param uniprot_ids: UniProt identifiers. They're read a chunk at a time.
+    :param chunk_size: The number of identifiers per chunk. Defaults to
+     :data:`bio2bel_phosphosite.constants.QUERY_CHUNK_SIZE`.
+    :return: An annotation for each identifier, in the same order. Identifiers that are given more than once get an
+     annotation each time.
+    """
+    for chunk in _iter_chunks(uniprot_ids, chunk_size or QUERY_CHUNK_SIZE):
+        yield from _annotate_chunk(manager.session, chunk)
+
+
+def _get_modification_label(site: ModificationSite) -> str:
+    return f'{site.residue or ""}{site.position or ""}-{site.modification_type}'
+
+
+def _get_mutation_label(site: MutationSite) -> str:
+    return f'{site.from_aa or ""}{site.position or ""}{site.to_aa or ""}'
+
+
+def write_annotations_tsv(annotations: Iterable[ProteinAnnotation], file: TextIO) -> None:
+    """Write annotations as tab-separated values with a header."""
+    print(*ANNOTATION_TSV_COLUMNS, sep='\t', file=file)
+    for annotation in annotations:
+        print(
+            annotation.uniprot_id,
+            annotation.gene_name or '',
+            annotation.protein_name or '',
+            annotation.species or '',
+            ';'.join(_get_modification_label(site) for site in annotation.modifications),
+            ';'.join(_get_mutation_label(site) for site in annotation.mutations),
+            sep='\t',
+            file=file,
+        )
+
+
+def annotation_to_json(annotation: ProteinAnnotation) -> Mapping[str, Any]:
+    """Convert an annotation to a JSON-serializable dictionary, like it's written in the ``jsonl`` format."""
+    return dict(
+        uniprot_id=annotation.uniprot_id,
+        found=annotation.found,
+        gene_name=annotation.gene_name,
+        protein_name=annotation.protein_name,
+        species=annotation.species,
+        modifications=[
+            dict(residue=site.residue, position=site.position, modification_type=site.modification_type)
+            for site in annotation.modifications
+        ],
+        mutations=[
+            dict(from_aa=site.from_aa, position=site.position, to_aa=site.to_aa)
+            for site in annotation.mutations
+        ],
+    )
+
+
+def write_annotations_jsonl(annotations: Iterable[ProteinAnnotation], file: TextIO) -> None:
+    """Write annotations as one JSON object per line."""
+    for annotation in annotations:
+        print(json.dumps(annotation_to_json(annotation)), file=file)
+
+
+#: The writers for each annotation file format
+ANNOTATION_FILE_FORMATS: Mapping[str, Callable[[Iterable[ProteinAnnotation], TextIO], None]] = {
+    'tsv': write_annotations_tsv,
+    'jsonl': write_annotations_jsonl,
+}
+
+
+def write_protein_annotations(manager,
+                              uniprot_ids: Iterable[str],
+                              file: TextIO,
+                              fmt: str = 'tsv',
+                              chunk_size: Optional[int] = None,
+                              ) -> Mapping[str, float]:
+    """Look up proteins in chunks and stream their annotations to a file as they're made.
+
+    :param manager: A populated manager
+    :param uniprot_ids: UniProt identifiers. They're read a chunk at a time.
+    :param file: A writable file-like object
+    :param fmt: One of ``tsv`` or ``jsonl``
+    :param chunk_size: The number of identifiers per chunk
+    :return: The number of identifiers looked up, found, and missing, the number of modifications and mutations
+     written, the seconds it took, and the identifiers per second
+    """
+    writer = ANNOTATION_FILE_FORMATS.get(fmt)
+    if writer is None:
+        raise ValueError(f'unknown format {fmt!r}. Use one of {", ".join(ANNOTATION_FILE_FORMATS)}')
+
+    rv = dict(identifiers=0, found=0, missing=0, modifications=0, mutations=0)
+
+    def count(annotations: Iterable[ProteinAnnotation]) -> Iterator[ProteinAnnotation]:
+        for annotation in annotations:
+            rv['identifiers'] += 1
+            rv['found' if annotation.found else 'missing'] += 1
+            rv['modifications'] += len(annotation.modifications)
+            rv['mutations'] += len(annotation.mutations)
+            yield annotation
+
+    t = time.time()
+    writer(count(annotate_proteins(manager, uniprot_ids, chunk_size=chunk_size)), file)
+    rv['seconds'] = time.time() - t
+    rv['identifiers_per_second'] = rv['identifiers'] / rv['seconds'] if rv['seconds'] else None
+
+    log.info('done looking up %d proteins in %.2f seconds', rv['identifiers'], rv['seconds'])
+    return rv
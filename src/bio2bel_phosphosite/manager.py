@@ -1,22 +1,52 @@
 # -*- coding: utf-8 -*-
 
+import io
 import logging
-from typing import List, Mapping, Optional
-
+import os
 import time
-from sqlalchemy import and_, func
-from tqdm import tqdm
-
-from bio2bel import AbstractManager
-from bio2bel.manager.bel_manager import BELManagerMixin
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from itertools import chain
+from operator import attrgetter
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Set, TYPE_CHECKING, TextIO, Tuple
+from urllib.request import urlretrieve
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Index, and_, bindparam, func, inspect, select
+from sqlalchemy.orm import aliased
+
+from bio2bel import AbstractManager, make_downloader
+from bio2bel.manager.bel_manager import BELManagerMixin, add_cli_to_bel
 from bio2bel.manager.flask_manager import FlaskMixin
-from pybel import BELGraph
-from .constants import MODULE_NAME, PROTEIN_NAMESPACE
-from .models import Base, Modification, ModificationType, Mutation, MutationEffect, Protein, Species
+from .commands import add_cli_export_bel, add_cli_write_bel_shards
+from .constants import (
+    BULK_INSERT_BATCH_SIZE, DISEASE_ASSOCIATED_SITES_PATH, DISEASE_ASSOCIATED_SITES_URL, EXPORT_BATCH_SIZE, MODULE_NAME,
+    NODE_CACHE_SIZE, PTMVAR_PATH, PTMVAR_URL, QUERY_CHUNK_SIZE, READ_CHUNK_SIZE, REGULATORY_SITES_PATH,
+    REGULATORY_SITES_URL, STATISTICS_CACHE_TTL, STREAM_NODE_CACHE_SIZE,
+)
+from .filters import SiteFilter
+from .instrumentation import Instrumentation
+from .loaders import Loader, get_loader
+from .lookup import ProteinAnnotation, annotate_proteins, write_protein_annotations
+from .models import (
+    Base, Dataset, DiseaseAssociation, Modification, ModificationType, Mutation, MutationEffect, Protein,
+    RegulatoryEffect, RegulatorySite, Species, Statistic,
+)
 from .parsers import (
-    get_acetylation_df, get_o_galnac_df, get_o_glcnac_df, get_phosphorylation_df, get_ptmvar_df, get_sumoylation_df,
-    get_ubiquinitation_df,
+    DISEASE_ASSOCIATED_SITES_USECOLS, MODIFICATION_SITE_DATASETS, REGULATORY_SITES_USECOLS, get_acetylation_df,
+    get_disease_associated_sites_df, get_modification_site_bytes, get_o_galnac_df, get_o_glcnac_df,
+    get_phosphorylation_df, get_ptmvar_df, get_regulatory_sites_df, get_sumoylation_df, get_ubiquinitation_df,
+    parse_mod_rsd, parse_regulatory_effects, read_modification_site_chunks, read_modification_site_df,
 )
+from .parsers.cache import get_sha256
+from .site_index import SiteIndex
+from .snapshot import write_snapshot
+from .statistics import STATISTIC_NAMES, Statistics, compute_statistics, refresh_statistics
+
+if TYPE_CHECKING:
+    from pybel import BELGraph
 
 __all__ = ['Manager']
 
@@ -38,18 +68,143 @@ _pmod_map = {
     'Methylation': 'Me',
 }
 
+#: The modification type that each modification site data set is loaded as
+_modification_site_dataset_types = {
+    'phosphorylation': 'Ph',
+    'acetylation': 'Ac',
+    'sumoylation': 'Sumo',
+    'ubiquitination': 'Ub',
+    'o_galnac': 'OGlyco',
+    'o_glcnac': 'OGlyco',
+}
+
+#: The URL and cache path of each data set that's loaded
+_datasets = dict(
+    MODIFICATION_SITE_DATASETS,
+    ptmvar=(PTMVAR_URL, PTMVAR_PATH),
+    regulatory_sites=(REGULATORY_SITES_URL, REGULATORY_SITES_PATH),
+    disease_associated_sites=(DISEASE_ASSOCIATED_SITES_URL, DISEASE_ASSOCIATED_SITES_PATH),
+)
+
+#: The models that refer to modifications, which keep them from being deleted when a site data set retracts them
+_modification_referrers = [MutationEffect, RegulatorySite, RegulatoryEffect, DiseaseAssociation]
+
+#: The models that are loaded from each data set that annotates modification sites, in the order they're deleted
+_site_annotation_models = {
+    'regulatory_sites': [RegulatoryEffect, RegulatorySite],
+    'disease_associated_sites': [DiseaseAssociation],
+}
+
+#: The statistics that change when each data set of site annotations is replaced
+_site_annotation_statistics = {
+    'regulatory_sites': ['regulatory_sites', 'regulatory_effects'],
+    'disease_associated_sites': ['disease_associations'],
+}
+
+#: The category of the regulatory effects in each column of the regulatory sites data set
+_regulatory_effect_columns = {
+    'function': 'ON_FUNCTION',
+    'process': 'ON_PROCESS',
+}
+
+#: The columns that identify an entry in PTMVar: a mutation followed by the modification it affects
+_ptmvar_key = ['ACC_ID', 'WT_AA', 'MUT_RSD#', 'VAR_AA', 'MOD_AA', 'MOD_RSD', 'modification_type']
+
+#: The columns that identify a modification. The O-GalNAc and O-GlcNAc data sets are both loaded as OGlyco and share
+#: some sites, which are stored once.
+_modification_key = ['protein_id', 'residue', 'position', 'modification_type_id']
+
+#: The species of all proteins in PTMVar, which only has human variants
+_ptmvar_species = 'human'
+
 _ptmvar_rows = ['UPID', 'ACC_ID', 'dbSNP', 'WT_AA', 'MUT_RSD#', 'VAR_AA', 'VAR_TYPE', 'MOD_RSD', 'MOD_AA', 'MOD_TYPE',
                 'VAR_POSITION']
 
 
-def _parse_mod(s):
-    """Parses the modification string. Follows the format Letter + Integer + Dash + Code
+def _prepare_modification_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse the ``MOD_RSD`` column of a modification site data frame.
 
-    :param s:
+    It's split into ``residue``, ``position``, and ``modification_type`` columns.
+
+    Entries that can not be parsed, or whose modification code is unknown, are reported together in a single warning
+    and dropped.
+
+    :param df: A data frame from one of the modification site data sets
     """
-    residue = s[0]
-    position, modification_type = s[1:].split('-')
-    return residue, int(position), _pmod_map[modification_type]
+    if 'modification_type' in df.columns:  # already prepared, e.g., in a worker process
+        return df
+
+    parsed = parse_mod_rsd(df.MOD_RSD)
+    modification_type = parsed.code.map(_pmod_map)
+
+    malformed = modification_type.isna()
+    if malformed.any():
+        log.warning(
+            'skipping %d malformed MOD_RSD entries (e.g., %s)',
+            malformed.sum(),
+            ', '.join(df.MOD_RSD[malformed].astype(str).head(5)),
+        )
+
+    valid = ~malformed
+    return df[valid].assign(
+        residue=parsed.residue[valid],
+        position=parsed.position[valid].astype(int),
+        modification_type=modification_type[valid],
+    )
+
+
+def _parse_modification_site_bytes(data: bytes, site_filter: Optional[SiteFilter] = None) -> pd.DataFrame:
+    """Parse, filter, and prepare the decompressed contents of a modification site file. Runs in a worker process."""
+    df = read_modification_site_df(io.BytesIO(data))
+    if site_filter is not None:
+        df = site_filter.filter_df(df)
+    return _prepare_modification_df(df)
+
+
+def _filter_chunks(chunks: Iterable[pd.DataFrame], site_filter: Optional[SiteFilter]) -> Iterable[pd.DataFrame]:
+    """Drop the rows of other species and proteins from each chunk as it's read."""
+    if site_filter is None:
+        return chunks
+    return (site_filter.filter_df(chunk) for chunk in chunks)
+
+
+def _get_ptmvar_df(url: Optional[str] = None) -> pd.DataFrame:
+    """Get the columns of the PTMVar data set that are loaded, without the lines whose identifiers don't match.
+
+    An ``ORGANISM`` column is added, so the proteins that are only in PTMVar are stored with their species like the
+    ones from the modification site data sets, and can be filtered by it.
+    """
+    df = get_ptmvar_df(url=url, usecols=_ptmvar_rows).assign(ORGANISM=_ptmvar_species)
+
+    mismatched = df.UPID != df.ACC_ID
+    if mismatched.any():
+        log.warning(
+            'skipping %d lines with non-matching identifiers (e.g., %s)',
+            mismatched.sum(),
+            ', '.join(f'{upid}/{acc_id}' for upid, acc_id in df.loc[mismatched, ['UPID', 'ACC_ID']].head(5).values),
+        )
+        df = df[~mismatched]
+
+    return df
+
+
+def _get_release_path(url: Optional[str], data_url: str, data_path: str, force_download: bool = False) -> str:
+    """Get a local copy of a data set file, downloading it to the data directory if needed.
+
+    :param url: The URL (or file path) given for the data set, if any
+    :param data_url: The default URL of the data set
+    :param data_path: The path in the data directory where the data set is downloaded
+    :param force_download: If true, downloads the data set even if it was downloaded before
+    """
+    if url is not None and os.path.isfile(url):
+        return url
+
+    if url is None or url == data_url:
+        return make_downloader(data_url, data_path)(force_download=force_download)
+
+    log.info('downloading %s to %s', url, data_path)
+    urlretrieve(url, data_path)
+    return data_path
 
 
 class Manager(AbstractManager, BELManagerMixin, FlaskMixin):
@@ -58,7 +213,10 @@ class Manager(AbstractManager, BELManagerMixin, FlaskMixin):
     _base = Base
     module_name = MODULE_NAME
     _base = Base
-    flask_admin_models = [Protein, Modification, Mutation, MutationEffect, ModificationType, Species]
+    flask_admin_models = [
+        Protein, Modification, Mutation, MutationEffect, ModificationType, Species, RegulatorySite, RegulatoryEffect,
+        DiseaseAssociation, Dataset, Statistic,
+    ]
     edge_model = [MutationEffect, Mutation, Modification]
 
     def __init__(self, *args, **kwargs):
@@ -69,6 +227,128 @@ class Manager(AbstractManager, BELManagerMixin, FlaskMixin):
         self.uniprot_id_to_protein = {}
         self.modifications = {}
         self.mutations = {}
+        self._site_index = None
+        self._statistics = None
+        self._statistics_expires = 0.0
+
+        #: The number of seconds the statistics read from the database are reused. See :attr:`statistics`.
+        self.statistics_ttl = STATISTICS_CACHE_TTL
+
+        #: The instrumentation that's active, if any. See :meth:`instrument`.
+        self.instrumentation: Optional[Instrumentation] = None
+
+        #: The loader the bulk inserts are written with. See :meth:`_use_loader`.
+        self._loader = Loader()
+
+    @contextmanager
+    def instrument(self) -> Iterable[Instrumentation]:
+        """Measure the time, rows, SQL statements, and memory of each phase of the work done in the context.
+
+        Example usage:
+
+        .. code-block:: python
+
+            manager = Manager()
+            with manager.instrument() as instrumentation:
+                manager.populate()
+                manager.to_bel()
+            print(instrumentation.report())
+
+        See :mod:`bio2bel_phosphosite.instrumentation` for what's in the report.
+        """
+        instrumentation = Instrumentation()
+        instrumentation.attach(self.engine)
+        previous, self.instrumentation = self.instrumentation, instrumentation
+        try:
+            yield instrumentation
+        finally:
+            self.instrumentation = previous
+            instrumentation.detach()
+
+    def _phase(self, name: str):
+        """Measure the code in the context as the given phase, if instrumenting."""
+        if self.instrumentation is None:
+            return nullcontext()
+        return self.instrumentation.phase(name)
+
+    def _add_rows(self, n: int) -> None:
+        """Count rows towards the current phase, if instrumenting."""
+        if self.instrumentation is not None:
+            self.instrumentation.add_rows(n)
+
+    def _iterate(self, name: str, iterable: Iterable, count=len) -> Iterable:
+        """Measure getting each element of the iterable as the given phase, if instrumenting."""
+        if self.instrumentation is None:
+            return iterable
+        return self.instrumentation.iterate(name, iterable, count=count)
+
+    @property
+    def site_index(self) -> SiteIndex:
+        """The in-memory index of modification and mutation sites, loaded on first use and again after populating.
+
+        Example usage:
+
+        .. code-block:: python
+
+            manager = Manager()
+            # modifications within three residues of a variant on a protein
+            manager.site_index.modifications.within('P31749', 308, radius=3)
+            # the closest mutation to each of many sites
+            manager.site_index.mutations.nearest_batch([('P31749', 308), ('P31749', 473)])
+        """
+        if self._site_index is None:
+            log.info('loading site index')
+            t = time.time()
+            self._site_index = SiteIndex.from_session(self.session)
+            log.info('done loading %s in %.2f seconds', self._site_index, time.time() - t)
+        return self._site_index
+
+    @property
+    def statistics(self) -> Statistics:
+        """The counts of what's in the database.
+
+        They're read from the statistics table at most every :attr:`statistics_ttl` seconds.
+
+        The statistics are counted again and stored at the end of :meth:`populate` and :meth:`update`, and by
+        :meth:`refresh_statistics`. If they were never stored, like for a database populated by an older version,
+        they're counted without storing them, since reading the statistics shouldn't write to the database.
+        """
+        now = time.monotonic()
+        if self._statistics is not None and now < self._statistics_expires:
+            return self._statistics
+
+        statistics = Statistics.from_session(self.session)
+        if not statistics.is_complete():
+            log.info('statistics are missing, counting them. Use refresh_statistics() to store them.')
+            statistics = Statistics(compute_statistics(self.session))
+
+        self._statistics = statistics
+        self._statistics_expires = now + self.statistics_ttl
+        return statistics
+
+    def refresh_statistics(self,
+                           names: Optional[Iterable[str]] = None,
+                           modification_types: Optional[Iterable[str]] = None,
+                           ) -> None:
+        """Count the rows in the database again and store the counts in the statistics table.
+
+        :param names: The statistics to count, like ``modifications``. Defaults to all of them. See
+         :data:`bio2bel_phosphosite.statistics.STATISTIC_NAMES`.
+        :param modification_types: If given, only the modifications of these types are counted again
+        """
+        with self._phase('statistics'):
+            t = time.time()
+            n = refresh_statistics(self.session, names=names, modification_types=modification_types)
+            self.session.commit()
+            self._add_rows(n)
+            log.info('done counting %d statistics in %.2f seconds', n, time.time() - t)
+
+        self._statistics = None
+
+    def drop_all(self, check_first: bool = True):
+        """Drop all tables and forget the statistics read from them."""
+        super().drop_all(check_first=check_first)
+        self._statistics = None
 
     def is_populated(self) -> bool:
         """Check if the database is already populated."""
@@ -128,15 +408,26 @@ class Manager(AbstractManager, BELManagerMixin, FlaskMixin):
         self.session.add(protein)
         return protein
 
-    def get_mutation(self, uniprot_id: str, from_aa: str, position: int, to_aa: str) -> Optional[Mutation]:
+    def _query_mutation(self, uniprot_id: str, from_aa: str, position: int, to_aa: str):
         return self.session.query(Mutation).join(Protein).filter(and_(
             Protein.uniprot_id == uniprot_id,
             Mutation.from_aa == from_aa,
             Mutation.to_aa == to_aa,
             Mutation.position == position
-        )).one_or_none()
+        ))
+
+    def get_mutation(self, uniprot_id: str, from_aa: str, position: int, to_aa: str) -> Optional[Mutation]:
+        return self._query_mutation(uniprot_id, from_aa, position, to_aa).one_or_none()
+
+    def get_or_create_mutation(self, uniprot_id: str, from_aa: str, position: int, to_aa: str, **kwargs) -> Mutation:
+        """Get a mutation from the cache or the database, or make a new one.
 
-    def get_or_create_mutation(self, uniprot_id: str, from_aa: str, position: int, to_aa: str) -> Mutation:
+        :param uniprot_id: The UniProt identifier
+        :param from_aa: The wild type amino acid
+        :param position: Position
+        :param to_aa: The variant amino acid
+        :param kwargs: Additional attributes for a new mutation, like ``var_type`` and ``dbsnp``
+        """
         _tuple = (uniprot_id, from_aa, position, to_aa)
         mutation = self.mutations.get(_tuple)
         if mutation is not None:
@@ -147,27 +438,31 @@ class Manager(AbstractManager, BELManagerMixin, FlaskMixin):
             self.mutations[_tuple] = mutation
             return mutation
 
-        mutation = self.modifications[_tuple] = Mutation(
+        mutation = self.mutations[_tuple] = Mutation(
             protein=self.get_or_create_protein(uniprot_id),
             from_aa=from_aa,
             position=position,
             to_aa=to_aa,
+            **kwargs
         )
         self.session.add(mutation)
         return mutation
 
+    def _query_modification(self, uniprot_id: str, residue: str, position: int, modification_type: str):
+        return self.session.query(Modification).join(Protein).join(ModificationType).filter(and_(
+            Protein.uniprot_id == uniprot_id,
+            Modification.residue == residue,
+            Modification.position == position,
+            ModificationType.name == modification_type
+        ))
+
     def get_modification(self,
                          uniprot_id: str,
                          residue: str,
                          position: int,
                          modification_type: str,
                          ) -> Optional[Modification]:
-        return self.session.query(Modification).join(Protein).join(ModificationType).filter(and_(
-            Protein.uniprot_id == uniprot_id,
-            Modification.residue == residue,
-            Modification.position == position,
-            ModificationType.name == modification_type
-        )).one_or_none()
+        return self._query_modification(uniprot_id, residue, position, modification_type).one_or_none()
 
     def get_or_create_modification(self,
                                    uniprot_id: str,
@@ -175,7 +470,8 @@ class Manager(AbstractManager, BELManagerMixin, FlaskMixin):
                                    position: int,
                                    modification_type: str,
                                    ) -> Modification:
-        """
+        """Get a modification from the cache or the database, or make a new one.
+
         :param uniprot_id: The UniProt identifier
         :param residue: Amino acid
         :param position: Position
@@ -201,86 +497,427 @@ class Manager(AbstractManager, BELManagerMixin, FlaskMixin):
         self.session.add(modification)
         return modification
 
-    def _populate_modification_df(self, df):
-        log.info('building models')
-        for organism_name, organism_df in tqdm(df.groupby('ORGANISM'), desc='Species'):
+    def _get_protein_ids(self, uniprot_ids: Iterable[str]) -> pd.Series:
+        """Look up the database identifiers of the given proteins with chunked ``IN`` queries.
 
-            species = self.get_or_create_species(organism_name)
+        :param uniprot_ids: UniProt identifiers
+        :return: A series of database identifiers indexed by UniProt identifier. Proteins that aren't stored yet
+         are omitted.
+        """
+        uniprot_ids = list(uniprot_ids)
+
+        rv = {}
+        for start in range(0, len(uniprot_ids), QUERY_CHUNK_SIZE):
+            chunk = uniprot_ids[start:start + QUERY_CHUNK_SIZE]
+            rv.update(
+                self.session.query(Protein.uniprot_id, Protein.id)
+                .filter(Protein.uniprot_id.in_(chunk))
+            )
+
+        return pd.Series(rv, dtype='int64')
+
+    def _get_or_create_species_ids(self, names: Iterable[str]) -> Mapping[str, int]:
+        """Get the database identifiers of the given species, inserting the missing ones in one statement."""
+        names = set(names)
+        if not names:
+            return {}
+
+        rv = dict(self.session.query(Species.name, Species.id).filter(Species.name.in_(names)))
+
+        missing = names - set(rv)
+        if missing:
+            self._write_df(Species, pd.DataFrame(dict(name=sorted(missing))))
+            rv.update(self.session.query(Species.name, Species.id).filter(Species.name.in_(missing)))
+
+        return rv
+
+    def _get_or_create_modification_type_ids(self, names: Iterable[str]) -> Mapping[str, int]:
+        """Get the database identifiers of the given modification types, inserting the missing ones in one statement.
+
+        Unlike :meth:`get_or_create_modification_type`, this reads plain identifiers with Core queries each time, so
+        nothing is kept from sessions that were closed, like the one :meth:`populate` closes when it's done.
+        """
+        names = set(names)
+        if not names:
+            return {}
+
+        rv = dict(
+            self.session.query(ModificationType.name, ModificationType.id)
+            .filter(ModificationType.name.in_(names))
+        )
+
+        missing = names - set(rv)
+        if missing:
+            self._write_df(ModificationType, pd.DataFrame(dict(name=sorted(missing))))
+            rv.update(
+                self.session.query(ModificationType.name, ModificationType.id)
+                .filter(ModificationType.name.in_(missing))
+            )
+
+        return rv
+
+    def _get_or_create_protein_ids(self, df: pd.DataFrame, batch_size: Optional[int] = None) -> np.ndarray:
+        """Make sure the species and proteins in a modification site data frame are stored.
+
+        Proteins are deduplicated over the whole data frame, the missing ones are inserted in batches, and the
+        identifiers are mapped back onto the rows with :func:`pandas.factorize`. Like
+        :meth:`get_or_create_protein`, proteins that are already stored are not updated.
+
+        :param df: A data frame with an ``ACC_ID`` column, like the ones from the modification site data sets. The
+         ``ORGANISM``, ``GENE``, and ``PROTEIN`` columns are used for new proteins if they're available.
+        :param batch_size: The number of proteins per ``INSERT``
+        :return: An array of protein database identifiers aligned with the rows of the data frame
+        """
+        if batch_size is None:
+            batch_size = BULK_INSERT_BATCH_SIZE
 
-            organism_group = organism_df.groupby(['GENE', 'PROTEIN', 'ACC_ID'])
-            organism_group_it = tqdm(organism_group, total=len(organism_group), desc=organism_name, leave=False)
-            for (gene_name, protein_name, uniprot_id), protein_df in organism_group_it:
+        codes, uniprot_ids = pd.factorize(df.ACC_ID)
+        uniprot_id_to_protein_id = self._get_protein_ids(uniprot_ids)
 
-                protein = self.get_or_create_protein(
+        new_protein_df = (
+            df.loc[~df.ACC_ID.isin(uniprot_id_to_protein_id.index)]
+            .reindex(columns=['ORGANISM', 'GENE', 'PROTEIN', 'ACC_ID'])
+            .drop_duplicates('ACC_ID')
+        )
+
+        if len(new_protein_df.index):
+            species_ids = self._get_or_create_species_ids(new_protein_df.ORGANISM.dropna().unique())
+            new_protein_df = pd.DataFrame(dict(
+                uniprot_id=new_protein_df.ACC_ID,
+                gene_name=new_protein_df.GENE,
+                protein_name=new_protein_df.PROTEIN,
+                species_id=new_protein_df.ORGANISM.map(species_ids),
+            )).astype(object)
+            new_protein_df = new_protein_df.where(new_protein_df.notnull(), None)
+
+            log.debug('inserting %d proteins', len(new_protein_df.index))
+            self._write_df(Protein, new_protein_df, batch_size=batch_size)
+
+            uniprot_id_to_protein_id = pd.concat([
+                uniprot_id_to_protein_id,
+                self._get_protein_ids(new_protein_df.uniprot_id),
+            ])
+
+        return uniprot_id_to_protein_id.reindex(uniprot_ids).to_numpy()[codes]
+
+    def _populate_modification_df(self, df):
+        """Populate the modifications from a site data frame by building an ORM object for each row.
+
+        This is the original, unoptimized path that :meth:`_bulk_populate_modification_df` is measured against. Every
+        species, protein, and modification goes through its ``get_or_create_*`` method, so sites that are listed
+        twice or that are already stored aren't added again.
+        """
+        from tqdm import tqdm
+
+        with self._phase('build'):
+            df = _prepare_modification_df(df)
+            df = df.reindex(columns=['ORGANISM', 'GENE', 'PROTEIN', 'ACC_ID', 'residue', 'position',
+                                     'modification_type']).astype(object)
+            df = df.where(df.notnull(), None)
+
+            log.info('building models')
+            it = df.itertuples(index=False)
+            for organism_name, gene_name, protein_name, uniprot_id, residue, position, modification_type in tqdm(
+                    it, total=len(df.index), desc='Modifications'):
+                species = None if organism_name is None else self.get_or_create_species(organism_name)
+                self.get_or_create_protein(
                     uniprot_id,
                     gene_name=gene_name,
                     protein_name=protein_name,
                     species=species,
                 )
-
-                for mod in protein_df.MOD_RSD:
-                    residue, position, modification_type = _parse_mod(mod)
-
-                    modification = Modification(
-                        protein=protein,
-                        residue=residue,
-                        position=position,
-                        modification_type=self.get_or_create_modification_type(modification_type),
-                    )
-                    self.session.add(modification)
+                self.get_or_create_modification(uniprot_id, residue, int(position), modification_type)
+            self._add_rows(len(df.index))
 
         t = time.time()
         log.info('committing models')
-        self.session.commit()
+        with self._phase('commit'):
+            self.session.commit()
         log.info('done committing models in %.2f seconds', time.time() - t)
 
+    def _populate_modification_chunks(self, chunks: Iterable[pd.DataFrame]) -> None:
+        """Populate the modifications from a stream of site data frame chunks with ORM objects."""
+        for chunk in chunks:
+            self._populate_modification_df(chunk)
+
+    def _bulk_populate_modification_df(self, df: pd.DataFrame, batch_size: Optional[int] = None) -> None:
+        """Populate the modifications from a site data frame with batched Core inserts.
+
+        Species, proteins, and modification types are resolved before any modifications are written. The
+        modifications themselves never become ORM objects, but are sent in batches of ``batch_size`` rows
+        with an executemany ``INSERT``.
+
+        :param df: A data frame from one of the modification site data sets
+        :param batch_size: The number of modifications per ``INSERT``. Defaults to
+         :data:`bio2bel_phosphosite.constants.BULK_INSERT_BATCH_SIZE`.
+        """
+        self._bulk_populate_modification_chunks([df], batch_size=batch_size)
+
+    def _bulk_populate_modification_chunks(self,
+                                           chunks: Iterable[pd.DataFrame],
+                                           batch_size: Optional[int] = None,
+                                           ) -> None:
+        """Populate the modifications from a stream of site data frame chunks with batched Core inserts.
+
+        Only one chunk is held in memory at a time, so the memory needed doesn't grow with the size of the file.
+
+        :param chunks: Data frames from one of the modification site data sets, like the ones from
+         :func:`bio2bel_phosphosite.parsers.read_modification_site_chunks`
+        :param batch_size: The number of modifications per ``INSERT``
+        """
+        from tqdm import tqdm
+
+        log.info('inserting modifications')
+        t = time.time()
+
+        n_modifications = sum(
+            self._bulk_insert_modification_df(chunk, batch_size=batch_size)
+            for chunk in tqdm(chunks, desc='Chunks', leave=False)
+        )
+
+        with self._phase('commit'):
+            self.session.commit()
+        log.info('done inserting %d modifications in %.2f seconds', n_modifications, time.time() - t)
+
+    def _bulk_insert_modification_df(self, df: pd.DataFrame, batch_size: Optional[int] = None) -> int:
+        """Insert the modifications from a site data frame without committing.
+
+        :return: The number of modifications inserted
+        """
+        if batch_size is None:
+            batch_size = BULK_INSERT_BATCH_SIZE
+
+        with self._phase('build'):
+            modification_df = self._get_new_modification_df(df, batch_size=batch_size)
+            self._add_rows(len(modification_df.index))
+
+        with self._phase('flush'):
+            self._write_df(Modification, modification_df, batch_size=batch_size)
+            self._add_rows(len(modification_df.index))
+
+        return len(modification_df.index)
+
+    def _get_new_modification_df(self, df: pd.DataFrame, batch_size: Optional[int] = None) -> pd.DataFrame:
+        """Get the modifications of a site data frame that aren't stored yet, with each site only once.
+
+        While the lookup indexes are in place, the sites that are already stored are left out. While they're dropped
+        for a bulk load, looking those up for every chunk would scan the whole table, so the sites that came in an
+        earlier chunk or data set are merged by :meth:`create_indexes` instead.
+
+        :param df: A data frame from one of the modification site data sets
+        :param batch_size: The number of proteins per ``INSERT``
+        :return: A data frame with the columns in :data:`_modification_key`
+        """
+        rv = self._get_modification_site_df(df, batch_size=batch_size)
+
+        if self._has_lookup_indexes(Modification):
+            rv = self._get_stored_modification_ids(rv)
+            rv = rv[rv.id.isna()].drop(columns='id')
+
+        return rv.reset_index(drop=True)
+
+    def _get_modification_site_df(self, df: pd.DataFrame, batch_size: Optional[int] = None) -> pd.DataFrame:
+        """Get the modifications of a site data frame with each site only once, storing their proteins and types.
+
+        :param df: A data frame from one of the modification site data sets
+        :param batch_size: The number of proteins per ``INSERT``
+        :return: A data frame with the columns in :data:`_modification_key`
+        """
+        df = _prepare_modification_df(df)
+        protein_ids = self._get_or_create_protein_ids(df, batch_size=batch_size)
+        modification_type_ids = self._get_or_create_modification_type_ids(df.modification_type.unique())
+
+        return pd.DataFrame(dict(
+            protein_id=protein_ids,
+            residue=df.residue.to_numpy(),
+            position=df.position.to_numpy(),
+            modification_type_id=df.modification_type.map(modification_type_ids).to_numpy(),
+        )).drop_duplicates(_modification_key)
+
+    def _get_stored_modification_ids(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add an ``id`` column with the stored modification of each site, or a missing value if it's not stored.
+
+        :param df: A data frame with the columns in :data:`_modification_key`, like the ones from
+         :meth:`_get_modification_site_df`
+        """
+        stored_df = self._get_ids_by_protein(Modification, _modification_key, df.protein_id.unique())
+        return df.merge(stored_df, on=_modification_key, how='left')
+
+    def _get_ids_by_protein(self, model, key_columns: List[str], protein_ids: Iterable[int]) -> pd.DataFrame:
+        """Look up the rows of a model that belong to the given proteins with chunked ``IN`` queries.
+
+        :param model: A model with a ``protein_id`` column, like :class:`Modification` or :class:`Mutation`
+        :param key_columns: The names of the columns that identify a row, including ``protein_id``
+        :param protein_ids: Protein database identifiers
+        :return: A data frame with the ``id`` and key columns, with one row per key
+        """
+        protein_ids = [int(protein_id) for protein_id in protein_ids]
+        query_columns = [model.id] + [getattr(model, column) for column in key_columns]
+
+        rows = []
+        for start in range(0, len(protein_ids), QUERY_CHUNK_SIZE):
+            chunk = protein_ids[start:start + QUERY_CHUNK_SIZE]
+            rows.extend(self.session.query(*query_columns).filter(model.protein_id.in_(chunk)))
+
+        rv = pd.DataFrame(rows, columns=['id'] + key_columns)
+        return rv.sort_values('id').drop_duplicates(key_columns)
+
+    def _get_or_create_ids(self,
+                           model,
+                           df: pd.DataFrame,
+                           key_columns: List[str],
+                           batch_size: Optional[int] = None,
+                           ) -> np.ndarray:
+        """Make sure there's a row of the model for every distinct key in the data frame.
+
+        Existing rows are found with :meth:`_get_ids_by_protein`, and the missing ones are inserted in batches with the
+        values from the first row that has their key.
+
+        :param model: A model with a ``protein_id`` column, like :class:`Modification` or :class:`Mutation`
+        :param df: A data frame whose columns are named after the columns of the model
+        :param key_columns: The names of the columns that identify a row, including ``protein_id``
+        :param batch_size: The number of rows per ``INSERT``
+        :return: An array of database identifiers aligned with the rows of the data frame
+        """
+        if batch_size is None:
+            batch_size = BULK_INSERT_BATCH_SIZE
+
+        keys_df = df.drop_duplicates(key_columns)
+        ids_df = self._get_ids_by_protein(model, key_columns, keys_df.protein_id.unique())
+
+        new_df = keys_df.merge(ids_df, on=key_columns, how='left')
+        new_df = new_df[new_df.id.isna()].drop(columns='id').astype(object)
+        new_df = new_df.where(new_df.notnull(), None)
+
+        if len(new_df.index):
+            log.debug('inserting %d %s', len(new_df.index), model.__tablename__)
+            self._write_df(model, new_df, batch_size=batch_size)
+
+            ids_df = pd.concat([
+                ids_df,
+                self._get_ids_by_protein(model, key_columns, new_df.protein_id.unique()),
+            ]).drop_duplicates(key_columns)
+
+        return df[key_columns].merge(ids_df, on=key_columns, how='left').id.to_numpy()
+
+    def _get_or_create_modification_ids(self,
+                                        df: pd.DataFrame,
+                                        protein_ids: np.ndarray,
+                                        batch_size: Optional[int] = None,
+                                        ) -> np.ndarray:
+        """Make sure the modifications in a prepared modification site data frame are stored.
+
+        :param df: A data frame with ``residue``, ``position``, and ``modification_type`` columns, like the ones from
+         :func:`_prepare_modification_df`
+        :param protein_ids: The protein database identifiers aligned with the rows of the data frame
+        :param batch_size: The number of modifications per ``INSERT``
+        :return: An array of modification database identifiers aligned with the rows of the data frame
+        """
+        modification_type_ids = self._get_or_create_modification_type_ids(df.modification_type.unique())
+
+        return self._get_or_create_ids(
+            Modification,
+            pd.DataFrame(dict(
+                protein_id=protein_ids,
+                residue=df.residue.to_numpy(),
+                position=df.position.to_numpy(),
+                modification_type_id=df.modification_type.map(modification_type_ids).to_numpy(),
+            )),
+            key_columns=_modification_key,
+            batch_size=batch_size,
+        )
+
+    def _insert_df(self, model, df: pd.DataFrame, batch_size: Optional[int] = None) -> int:
+        """Insert the rows of a data frame whose columns are named after the columns of the model, without committing.
+
+        :return: The number of rows inserted
+        """
+        if batch_size is None:
+            batch_size = BULK_INSERT_BATCH_SIZE
+
+        df = df.astype(object)
+        df = df.where(df.notnull(), None)
+
+        with self._phase('flush'):
+            self._write_df(model, df, batch_size=batch_size)
+            self._add_rows(len(df.index))
+
+        return len(df.index)
+
+    def _write_df(self, model, df: pd.DataFrame, batch_size: Optional[int] = None) -> int:
+        """Write the rows of a data frame with the current loader, without committing.
+
+        The columns of the data frame are named after the columns of the model.
+
+        :return: The number of rows written
+        """
+        return self._loader.load(self.session, model.__table__, df, batch_size=batch_size)
+
+    @contextmanager
+    def _use_loader(self, loader: Loader) -> Iterable[None]:
+        """Write the bulk inserts in the context with the given loader, which prepares the database for it."""
+        previous, self._loader = self._loader, loader
+        try:
+            with loader.loading(self):
+                yield
+        finally:
+            self._loader = previous
+
     def count_residues(self) -> Mapping[str, int]:
         """Count the frequency of modification on each residue type."""
-        return dict(
-            self.session
-                .query(Modification.residue, func.count(Modification.residue))
-                .group_by(Modification.residue)
-                .all()
-        )
+        return self.statistics.count_residues()
 
     def count_modification_types(self) -> Mapping[str, int]:
         """Count the number of each modification type."""
-        return dict(
-            self.session
-                .query(ModificationType.name, func.count(ModificationType.name))
-                .join(Modification)
-                .group_by(ModificationType.name)
-                .all()
-        )
+        return self.statistics.count_modification_types()
 
     def count_proteins(self) -> int:
-        return self._count_model(Protein)
+        """Count the proteins."""
+        return self.statistics.count('proteins')
+
+    def count_proteins_by_species(self) -> Mapping[str, int]:
+        """Count the number of proteins of each species."""
+        return self.statistics.count_proteins_by_species()
 
     def count_species(self) -> int:
-        return self._count_model(Species)
+        """Count the species."""
+        return self.statistics.count('species')
 
     def list_species(self) -> List[Species]:
+        """List all species."""
         return self._list_model(Species)
 
     def count_modifications(self) -> int:
-        return self._count_model(Modification)
+        """Count the modifications."""
+        return self.statistics.count('modifications')
+
+    def count_modifications_by_species(self) -> Mapping[str, Mapping[str, int]]:
+        """Count the number of each modification type on the proteins of each species."""
+        return self.statistics.count_modifications_by_species()
 
     def count_mutations(self) -> int:
-        return self._count_model(Mutation)
+        """Count the mutations."""
+        return self.statistics.count('mutations')
 
     def count_mutation_effects(self) -> int:
-        return self._count_model(MutationEffect)
-
-    def summarize(self):
-        return dict(
-            proteins=self.count_proteins(),
-            species=self.count_species(),
-            modifications=self.count_modifications(),
-            residues=self.count_residues(),
-            modification_types=self.count_modification_types(),
-            mutations=self.count_mutations(),
-            mutation_effects=self.count_mutation_effects(),
-        )
+        """Count the mutation effects."""
+        return self.statistics.count('mutation_effects')
+
+    def count_regulatory_sites(self) -> int:
+        """Count the regulatory sites."""
+        return self.statistics.count('regulatory_sites')
+
+    def count_regulatory_effects(self) -> int:
+        """Count the effects of regulatory sites on functions and processes."""
+        return self.statistics.count('regulatory_effects')
+
+    def count_disease_associations(self) -> int:
+        """Count the disease associations of modifications."""
+        return self.statistics.count('disease_associations')
+
+    def summarize(self) -> Mapping[str, Any]:
+        """Summarize the database from the stored statistics, with breakdowns by species. See :attr:`statistics`."""
+        return self.statistics.summarize()
 
     def list_modifications(self) -> List[Modification]:
         """List all modifications."""
@@ -297,58 +934,461 @@ class Manager(AbstractManager, BELManagerMixin, FlaskMixin):
                                 o_galnac_url=None,
                                 o_glcnac_url=None,
                                 acetylation_url=None,
+                                bulk: bool = True,
+                                batch_size: Optional[int] = None,
+                                parallel: bool = False,
+                                max_workers: Optional[int] = None,
+                                chunksize: Optional[int] = None,
+                                site_filter: Optional[SiteFilter] = None,
                                 ) -> None:
-        log.info('phosphorylation')
-        phosphorylation_df = get_phosphorylation_df(url=phosphorylation_url)
-        self._populate_modification_df(phosphorylation_df)
-
-        log.info('acetylation')
-        acetylation_df = get_acetylation_df(url=acetylation_url)
-        self._populate_modification_df(acetylation_df)
+        if bulk:
+            populate_modification_chunks = partial(self._bulk_populate_modification_chunks, batch_size=batch_size)
+        else:
+            populate_modification_chunks = self._populate_modification_chunks
+
+        chunksize = chunksize or READ_CHUNK_SIZE
+
+        urls = dict(
+            phosphorylation=phosphorylation_url,
+            acetylation=acetylation_url,
+            sumoylation=sumoylation_url,
+            ubiquitination=ubiquitination_url,
+            o_galnac=o_galnac_url,
+            o_glcnac=o_glcnac_url,
+        )
+        if site_filter is not None:
+            # the data sets of other modification types aren't even read
+            urls = {
+                name: url
+                for name, url in urls.items()
+                if site_filter.allows_modification_type(_modification_site_dataset_types[name])
+            }
+
+        if parallel:
+            self._populate_modifications_concurrently(
+                populate_modification_chunks,
+                urls=urls,
+                max_workers=max_workers,
+                site_filter=site_filter,
+            )
+            return
+
+        getters = dict(
+            phosphorylation=get_phosphorylation_df,
+            acetylation=get_acetylation_df,
+            sumoylation=get_sumoylation_df,
+            ubiquitination=get_ubiquinitation_df,
+            o_galnac=get_o_galnac_df,
+            o_glcnac=get_o_glcnac_df,
+        )
+        for name, url in urls.items():
+            log.info('%s', name)
+            if url is None:
+                with self._phase('download'):
+                    url = _get_release_path(url, *_datasets[name])
+            chunks = getters[name](url=url, chunksize=chunksize)
+            chunks = self._iterate('parse', _filter_chunks(chunks, site_filter))
+            populate_modification_chunks(chunks)
+
+    def _populate_modifications_concurrently(self,
+                                             populate_modification_chunks: Callable[[Iterable[pd.DataFrame]], None],
+                                             urls: Mapping[str, Optional[str]],
+                                             max_workers: Optional[int] = None,
+                                             site_filter: Optional[SiteFilter] = None,
+                                             ) -> None:
+        """Acquire the modification site data sets concurrently and feed them to a single writer.
+
+        Each data set is downloaded and decompressed in its own thread, then parsed in a process pool. The data
+        frames are written by the calling thread, in the same order as the serial path. When instrumenting, the time
+        the calling thread waits for each data set counts as parsing, since its download and parse overlap with the
+        writing of the others.
+
+        :param populate_modification_chunks: The function that writes data frames to the database
+        :param urls: A dictionary from the keys of :data:`bio2bel_phosphosite.parsers.MODIFICATION_SITE_DATASETS` to
+         their URLs (or file paths). Values of :data:`None` use the cached download.
+        :param max_workers: The number of parsing processes. Defaults to the number of processors.
+        :param site_filter: If given, only the rows it keeps are parsed further, in the worker processes
+        """
+        t = time.time()
 
-        log.info('sumoylation')
-        sumoylation_df = get_sumoylation_df(url=sumoylation_url)
-        self._populate_modification_df(sumoylation_df)
+        with ThreadPoolExecutor(max_workers=len(urls)) as thread_pool, \
+                ProcessPoolExecutor(max_workers=max_workers) as process_pool:
+
+            def acquire(name: str, url: Optional[str]) -> pd.DataFrame:
+                data = get_modification_site_bytes(name, url=url)
+                return process_pool.submit(_parse_modification_site_bytes, data, site_filter).result()
+
+            futures = {
+                name: thread_pool.submit(acquire, name, url)
+                for name, url in urls.items()
+            }
+
+            for name, future in futures.items():
+                with self._phase('parse'):
+                    df = future.result()
+                    self._add_rows(len(df.index))
+                log.info('%s', name)
+                populate_modification_chunks([df])
+
+        log.info('done populating modifications concurrently in %.2f seconds', time.time() - t)
+
+    def _populate_ptmvar(self,
+                         url: Optional[str] = None,
+                         bulk: bool = True,
+                         batch_size: Optional[int] = None,
+                         site_filter: Optional[SiteFilter] = None,
+                         ) -> None:
+        """Download and populate the PTMVar data set.
+
+        :param url: The URL (or file path) of the PTMVar workbook
+        :param bulk: If true, resolves the mutations and modifications with a few set-based queries and writes
+         them with batched Core inserts instead of ORM objects
+        :param batch_size: The number of rows per ``INSERT`` when ``bulk`` is true
+        :param site_filter: If given, only the entries whose modifications it keeps are populated
+        """
+        if site_filter is not None and not site_filter.allows_species(_ptmvar_species):
+            log.info('skipping ptmvar, which only has %s proteins', _ptmvar_species)
+            return
 
-        log.info('ubiquitination')
-        ubiquination_df = get_ubiquinitation_df(url=ubiquitination_url)
-        self._populate_modification_df(ubiquination_df)
+        if url is None:
+            with self._phase('download'):
+                url = _get_release_path(url, *_datasets['ptmvar'])
 
-        log.info('o-galnac-ation')
-        o_galnac_df = get_o_galnac_df(url=o_galnac_url)
-        self._populate_modification_df(o_galnac_df)
+        with self._phase('parse'):
+            df = _get_ptmvar_df(url)
+            if site_filter is not None:
+                df = site_filter.filter_df(df.assign(modification_type=df.MOD_TYPE.map(_pmod_map)))
+                df = df.drop(columns='modification_type')
+            self._add_rows(len(df.index))
 
-        log.info('o-glcnac-ation')
-        o_glcnac_df = get_o_glcnac_df(url=o_glcnac_url)
-        self._populate_modification_df(o_glcnac_df)
+        if bulk:
+            self._bulk_populate_ptmvar_df(df, batch_size=batch_size)
+            return
 
-    def _populate_ptmvar(self, url: Optional[str] = None) -> None:
-        """Download and populate the PTMVar data set."""
-        df = get_ptmvar_df(url=url)
+        from tqdm import tqdm
 
         it = tqdm(df[_ptmvar_rows].itertuples(), total=len(df.index), desc='PTMVar')
 
-        for idx, upid, upid2, dbsnp, from_aa, mut_rsd, to_aa, var_type, mod_rsd, mod_aa, mod_type, var_position in it:
+        with self._phase('build'):
+            for (
+                idx, upid, upid2, dbsnp, from_aa, mut_rsd, to_aa, var_type, mod_rsd, mod_aa, mod_type, var_position
+            ) in it:
+                mutation = self.get_or_create_mutation(upid, from_aa, mut_rsd, to_aa, var_type=var_type, dbsnp=dbsnp)
+                modification = self.get_or_create_modification(upid, residue=mod_aa, position=mod_rsd,
+                                                               modification_type=_pmod_map[mod_type])
+
+                e = MutationEffect(
+                    mutation=mutation,
+                    modification=modification,
+                    var_position=var_position
+                )
+                self.session.add(e)
+            self._add_rows(len(df.index))
 
-            if upid != upid2:
-                log.warning('problem with line - non-matching identifiers %s and %s', upid, upid2)
-                continue
+        t = time.time()
+        log.info('committing models')
+        with self._phase('commit'):
+            self.session.commit()
+        log.info('done committing models in %.2f seconds', time.time() - t)
 
-            mutation = self.get_or_create_mutation(upid, from_aa, mut_rsd, to_aa, var_type=var_type, dbsnp=dbsnp)
-            modification = self.get_or_create_modification(upid, residue=mod_aa, position=mod_rsd,
-                                                           modification_type=_pmod_map[mod_type])
+    def _bulk_populate_ptmvar_df(self, df: pd.DataFrame, batch_size: Optional[int] = None) -> None:
+        """Populate the PTMVar data set with set-based lookups and batched Core inserts.
 
-            e = MutationEffect(
-                mutation=mutation,
-                modification=modification,
-                var_position=var_position
+        All distinct proteins, modifications, and mutations are resolved with a handful of chunked ``IN`` queries, the
+        missing ones are inserted in batches, and then the mutation effects are inserted in batches.
+
+        :param df: A data frame from :func:`bio2bel_phosphosite.parsers.get_ptmvar_df`
+        :param batch_size: The number of rows per ``INSERT``
+        """
+        if batch_size is None:
+            batch_size = BULK_INSERT_BATCH_SIZE
+
+        t = time.time()
+        with self._phase('build'):
+            log.info('resolving PTMVar proteins')
+            protein_ids = self._get_or_create_protein_ids(df, batch_size=batch_size)
+
+            modification_type_ids = self._get_or_create_modification_type_ids(df.MOD_TYPE.map(_pmod_map).unique())
+
+            log.info('resolving PTMVar modifications')
+            modification_ids = self._get_or_create_ids(
+                Modification,
+                pd.DataFrame(dict(
+                    protein_id=protein_ids,
+                    residue=df.MOD_AA.to_numpy(),
+                    position=df.MOD_RSD.astype(int).to_numpy(),
+                    modification_type_id=df.MOD_TYPE.map(_pmod_map).map(modification_type_ids).to_numpy(),
+                )),
+                key_columns=_modification_key,
+                batch_size=batch_size,
             )
-            self.session.add(e)
 
+            log.info('resolving PTMVar mutations')
+            mutation_ids = self._get_or_create_ids(
+                Mutation,
+                pd.DataFrame(dict(
+                    protein_id=protein_ids,
+                    from_aa=df.WT_AA.to_numpy(),
+                    position=df['MUT_RSD#'].astype(int).to_numpy(),
+                    to_aa=df.VAR_AA.to_numpy(),
+                    var_type=df.VAR_TYPE.to_numpy(),
+                    dbsnp=df.dbSNP.to_numpy(),
+                )),
+                key_columns=['protein_id', 'from_aa', 'position', 'to_aa'],
+                batch_size=batch_size,
+            )
+            self._add_rows(len(df.index))
+
+        log.info('inserting PTMVar mutation effects')
+        mutation_effect_df = pd.DataFrame(dict(
+            mutation_id=mutation_ids,
+            modification_id=modification_ids,
+            var_position=pd.to_numeric(df.VAR_POSITION, errors='coerce').to_numpy(),
+        )).astype(object)
+        mutation_effect_df = mutation_effect_df.where(mutation_effect_df.notnull(), None)
+
+        with self._phase('flush'):
+            self._write_df(MutationEffect, mutation_effect_df, batch_size=batch_size)
+            self._add_rows(len(mutation_effect_df.index))
+
+        with self._phase('commit'):
+            self.session.commit()
+        log.info('done inserting %d mutation effects in %.2f seconds', len(mutation_effect_df.index), time.time() - t)
+
+    @staticmethod
+    def _prepare_filtered_df(df: pd.DataFrame, site_filter: Optional[SiteFilter] = None) -> pd.DataFrame:
+        """Prepare a data frame that annotates modification sites, keeping only the rows that pass the filter.
+
+        The rows of other species and proteins are dropped before ``MOD_RSD`` is parsed and the rows of other
+        modification types after.
+        """
+        if site_filter is not None:
+            df = site_filter.filter_df(df)
+        df = _prepare_modification_df(df)
+        if site_filter is not None:
+            df = site_filter.filter_df(df)
+        return df.reset_index(drop=True)
+
+    def _populate_regulatory_sites(self,
+                                   url: Optional[str] = None,
+                                   batch_size: Optional[int] = None,
+                                   site_filter: Optional[SiteFilter] = None,
+                                   ) -> None:
+        """Download and populate the regulatory sites data set.
+
+        :param url: The URL (or file path) of the regulatory sites file
+        :param batch_size: The number of rows per ``INSERT``
+        :param site_filter: If given, only the sites it keeps are populated
+        """
+        if url is None:
+            with self._phase('download'):
+                url = _get_release_path(url, *_datasets['regulatory_sites'])
+
+        with self._phase('parse'):
+            df = get_regulatory_sites_df(url=url, usecols=REGULATORY_SITES_USECOLS)
+            self._add_rows(len(df.index))
+        self._bulk_populate_regulatory_site_df(df, batch_size=batch_size, site_filter=site_filter)
+
+    def _bulk_populate_regulatory_site_df(self,
+                                          df: pd.DataFrame,
+                                          batch_size: Optional[int] = None,
+                                          site_filter: Optional[SiteFilter] = None,
+                                          ) -> None:
+        """Populate the regulatory sites and the effects listed for them with batched Core inserts.
+
+        The modifications are resolved like in :meth:`_bulk_populate_ptmvar_df`, so sites that aren't in any of the
+        modification site data sets are added. The semicolon-separated effects in the ``ON_FUNCTION`` and
+        ``ON_PROCESS`` columns are split into one row each with
+        :func:`bio2bel_phosphosite.parsers.parse_regulatory_effects`, which keeps the PubMed identifiers of its site.
+
+        :param df: A data frame from :func:`bio2bel_phosphosite.parsers.get_regulatory_sites_df`
+        :param batch_size: The number of rows per ``INSERT``
+        :param site_filter: If given, only the sites it keeps are populated
+        """
         t = time.time()
-        log.info('committing models')
+        log.info('resolving regulatory site modifications')
+        with self._phase('build'):
+            df = self._prepare_filtered_df(df, site_filter)
+            protein_ids = self._get_or_create_protein_ids(df, batch_size=batch_size)
+            modification_ids = self._get_or_create_modification_ids(df, protein_ids, batch_size=batch_size)
+            self._add_rows(len(df.index))
+
+        log.info('inserting regulatory sites')
+        n_sites = self._insert_df(
+            RegulatorySite,
+            pd.DataFrame(dict(
+                modification_id=modification_ids,
+                domain=df.DOMAIN.to_numpy(),
+                on_function=df.ON_FUNCTION.to_numpy(),
+                on_process=df.ON_PROCESS.to_numpy(),
+                on_protein_interaction=df.ON_PROT_INTERACT.to_numpy(),
+                on_other_interaction=df.ON_OTHER_INTERACT.to_numpy(),
+                pmids=df.PMIDs.to_numpy(),
+                notes=df.NOTES.to_numpy(),
+            )),
+            batch_size=batch_size,
+        )
+
+        with self._phase('build'):
+            effect_df = pd.concat([
+                parse_regulatory_effects(df[column]).assign(category=category)
+                for category, column in _regulatory_effect_columns.items()
+            ])
+            effect_df['modification_id'] = modification_ids[effect_df.index.to_numpy()]
+            effect_df['pmids'] = df.PMIDs.to_numpy()[effect_df.index.to_numpy()]
+            effect_df = effect_df.drop_duplicates(['modification_id', 'category', 'name', 'direction', 'pmids'])
+        n_effects = self._insert_df(RegulatoryEffect, effect_df, batch_size=batch_size)
+
+        with self._phase('commit'):
+            self.session.commit()
+        log.info('done inserting %d regulatory sites with %d effects in %.2f seconds', n_sites, n_effects,
+                 time.time() - t)
+
+    def _populate_disease_associated_sites(self,
+                                           url: Optional[str] = None,
+                                           batch_size: Optional[int] = None,
+                                           site_filter: Optional[SiteFilter] = None,
+                                           ) -> None:
+        """Download and populate the disease-associated sites data set.
+
+        :param url: The URL (or file path) of the disease-associated sites file
+        :param batch_size: The number of rows per ``INSERT``
+        :param site_filter: If given, only the sites it keeps are populated
+        """
+        if url is None:
+            with self._phase('download'):
+                url = _get_release_path(url, *_datasets['disease_associated_sites'])
+
+        with self._phase('parse'):
+            df = get_disease_associated_sites_df(url=url, usecols=DISEASE_ASSOCIATED_SITES_USECOLS)
+            self._add_rows(len(df.index))
+        self._bulk_populate_disease_associated_site_df(df, batch_size=batch_size, site_filter=site_filter)
+
+    def _bulk_populate_disease_associated_site_df(self,
+                                                  df: pd.DataFrame,
+                                                  batch_size: Optional[int] = None,
+                                                  site_filter: Optional[SiteFilter] = None,
+                                                  ) -> None:
+        """Populate the disease associations of modifications with batched Core inserts.
+
+        :param df: A data frame from :func:`bio2bel_phosphosite.parsers.get_disease_associated_sites_df`
+        :param batch_size: The number of rows per ``INSERT``
+        :param site_filter: If given, only the sites it keeps are populated
+        """
+        t = time.time()
+        log.info('resolving disease-associated site modifications')
+        with self._phase('build'):
+            df = self._prepare_filtered_df(df[df.DISEASE.notna()], site_filter)
+            protein_ids = self._get_or_create_protein_ids(df, batch_size=batch_size)
+            modification_ids = self._get_or_create_modification_ids(df, protein_ids, batch_size=batch_size)
+            self._add_rows(len(df.index))
+
+        log.info('inserting disease associations')
+        n_associations = self._insert_df(
+            DiseaseAssociation,
+            pd.DataFrame(dict(
+                modification_id=modification_ids,
+                disease=df.DISEASE.str.strip().to_numpy(),
+                alteration=df.ALTERATION.to_numpy(),
+                pmids=df.PMIDs.to_numpy(),
+                notes=df.NOTES.to_numpy(),
+            )),
+            batch_size=batch_size,
+        )
+
+        with self._phase('commit'):
+            self.session.commit()
+        log.info('done inserting %d disease associations in %.2f seconds', n_associations, time.time() - t)
+
+    @staticmethod
+    def _get_lookup_indexes() -> List[Index]:
+        """Get the indexes on the lookup keys of modifications and mutations."""
+        return [
+            index
+            for model in (Modification, Mutation)
+            for index in sorted(model.__table__.indexes, key=attrgetter('name'))
+        ]
+
+    def _get_existing_index_names(self, table_name: str) -> Set[str]:
+        return {index['name'] for index in inspect(self.engine).get_indexes(table_name)}
+
+    def _has_lookup_indexes(self, model) -> bool:
+        """Check if the indexes on the lookup keys of the model exist, which they don't during a bulk load.
+
+        This is checked in the transaction of the session, since it's called between writes that aren't committed yet.
+        """
+        existing_index_names = {
+            index['name']
+            for index in inspect(self.session.connection()).get_indexes(model.__tablename__)
+        }
+        return all(index.name in existing_index_names for index in model.__table__.indexes)
+
+    def _deduplicate_modifications(self) -> int:
+        """Keep only the first stored modification of each site, so the unique index on the sites can be built.
+
+        The rows that refer to the other ones are pointed at the one that's kept.
+
+        :return: The number of modifications deleted
+        """
+        table = Modification.__table__
+        key = [table.c[column] for column in _modification_key]
+
+        first = (
+            select(key + [func.min(table.c.id).label('first_id')])
+            .group_by(*key)
+            .having(func.count() > 1)
+            .alias('first')
+        )
+        duplicates = self.session.execute(
+            select([table.c.id, first.c.first_id])
+            .select_from(table.join(first, and_(*(table.c[column] == first.c[column] for column in _modification_key))))
+            .where(table.c.id != first.c.first_id)
+        ).fetchall()
+        if not duplicates:
+            return 0
+
+        log.info('merging %d duplicate modifications', len(duplicates))
+        params = [dict(duplicate_id=duplicate_id, first_id=first_id) for duplicate_id, first_id in duplicates]
+        for model in _modification_referrers:
+            referrer = model.__table__
+            self.session.execute(
+                referrer.update()
+                .where(referrer.c.modification_id == bindparam('duplicate_id'))
+                .values(modification_id=bindparam('first_id')),
+                params,
+            )
+        self._delete_ids(Modification, [duplicate_id for duplicate_id, _ in duplicates])
         self.session.commit()
-        log.info('done committing models in %.2f seconds', time.time() - t)
+
+        return len(duplicates)
+
+    def create_indexes(self) -> None:
+        """Build the indexes on the lookup keys of modifications and mutations that don't exist yet.
+
+        This is also how databases made before the indexes were added get them. Since the index on the sites of
+        modifications is unique, the sites stored more than once are merged first.
+        """
+        self.session.commit()
+        for index in self._get_lookup_indexes():
+            if index.name in self._get_existing_index_names(index.table.name):
+                continue
+            if index.table is Modification.__table__:
+                with self._phase('index'):
+                    self._deduplicate_modifications()
+            log.info('building index %s', index.name)
+            t = time.time()
+            with self._phase('index'):
+                index.create(bind=self.engine)
+            log.info('done building index %s in %.2f seconds', index.name, time.time() - t)
+
+    def drop_indexes(self) -> None:
+        """Drop the indexes on the lookup keys of modifications and mutations, like before a bulk load."""
+        self.session.commit()
+        for index in self._get_lookup_indexes():
+            if index.name not in self._get_existing_index_names(index.table.name):
+                continue
+            log.info('dropping index %s', index.name)
+            index.drop(bind=self.engine)
 
     def populate(self,
                  phosphorylation_url=None,
@@ -358,8 +1398,20 @@ class Manager(AbstractManager, BELManagerMixin, FlaskMixin):
                  o_glcnac_url=None,
                  acetylation_url=None,
                  ptmvar_url=None,
+                 regulatory_sites_url=None,
+                 disease_associated_sites_url=None,
+                 bulk: bool = True,
+                 batch_size: Optional[int] = None,
+                 parallel: bool = False,
+                 max_workers: Optional[int] = None,
+                 chunksize: Optional[int] = None,
+                 defer_indexes: bool = True,
+                 species: Optional[Iterable[str]] = None,
+                 modification_types: Optional[Iterable[str]] = None,
+                 uniprot_ids: Optional[Iterable[str]] = None,
+                 loader: Optional[str] = None,
                  ) -> None:
-        """Downloads and populates data
+        """Download and populate the data.
 
         :param phosphorylation_url:
         :param sumoylation_url:
@@ -368,29 +1420,856 @@ class Manager(AbstractManager, BELManagerMixin, FlaskMixin):
         :param o_glcnac_url:
         :param acetylation_url:
         :param ptmvar_url:
+        :param regulatory_sites_url:
+        :param disease_associated_sites_url:
+        :param bulk: If true, writes modifications with batched Core inserts instead of ORM objects. The regulatory and
+         disease-associated sites are always written this way.
+        :param batch_size: The number of modifications per batch when ``bulk`` is true
+        :param parallel: If true, downloads and parses the modification site data sets concurrently
+        :param max_workers: The number of parsing processes when ``parallel`` is true
+        :param chunksize: The number of rows per chunk when streaming the modification site files with ``bulk``
+        :param defer_indexes: If true and ``bulk`` is true, the lookup indexes are dropped while the modifications are
+         inserted and built afterwards, which is faster than keeping them up to date row by row
+        :param species: If given, only populates the proteins of these species, like ``human``
+        :param modification_types: If given, only populates modifications of these types, like ``Ph``. The data sets
+         of other types aren't read.
+        :param uniprot_ids: If given, only populates these proteins
+        :param loader: How the bulk inserts are written. One of ``insert`` (the default), ``sqlite``, ``copy``, or
+         ``native``, which picks the fastest one for the database. See :mod:`bio2bel_phosphosite.loaders`.
+        """
+        site_filter = SiteFilter.from_values(
+            species=species,
+            modification_types=modification_types,
+            uniprot_ids=uniprot_ids,
+        )
+
+        # the models cached by an earlier populate or update belong to a session that was closed since
+        self._clear_caches()
+
+        with self._use_loader(get_loader(loader, self.engine)):
+            if bulk and defer_indexes:
+                self.drop_indexes()
+
+            self._populate_modifications(
+                phosphorylation_url=phosphorylation_url,
+                sumoylation_url=sumoylation_url,
+                ubiquitination_url=ubiquitination_url,
+                o_galnac_url=o_galnac_url,
+                o_glcnac_url=o_glcnac_url,
+                acetylation_url=acetylation_url,
+                bulk=bulk,
+                batch_size=batch_size,
+                parallel=parallel,
+                max_workers=max_workers,
+                chunksize=chunksize,
+                site_filter=site_filter,
+            )
+
+            # PTMVar is resolved against the modifications through the indexes
+            self.create_indexes()
+
+            self._populate_ptmvar(url=ptmvar_url, bulk=bulk, batch_size=batch_size, site_filter=site_filter)
+            self._populate_regulatory_sites(url=regulatory_sites_url, batch_size=batch_size, site_filter=site_filter)
+            self._populate_disease_associated_sites(url=disease_associated_sites_url, batch_size=batch_size,
+                                                    site_filter=site_filter)
+
+        # The site index is reloaded the next time it's used
+        self._site_index = None
+        self.refresh_statistics()
+
+        # Only part of each data set was loaded, so an update has to compare all of them
+        if site_filter is not None:
+            return
+
+        self._record_checksums(dict(
+            phosphorylation=phosphorylation_url,
+            acetylation=acetylation_url,
+            sumoylation=sumoylation_url,
+            ubiquitination=ubiquitination_url,
+            o_galnac=o_galnac_url,
+            o_glcnac=o_glcnac_url,
+            ptmvar=ptmvar_url,
+            regulatory_sites=regulatory_sites_url,
+            disease_associated_sites=disease_associated_sites_url,
+        ))
+
+    def get_checksums(self) -> Mapping[str, str]:
+        """Get the SHA-256 hash of the file each data set was last loaded from."""
+        return dict(self.session.query(Dataset.name, Dataset.sha256))
+
+    def _set_checksum(self, name: str, sha256: str) -> None:
+        dataset = self.session.query(Dataset).filter(Dataset.name == name).one_or_none()
+        if dataset is None:
+            self.session.add(Dataset(name=name, sha256=sha256))
+        else:
+            dataset.sha256 = sha256
+
+    def _record_checksums(self, urls: Mapping[str, Optional[str]]) -> None:
+        """Record the hashes of the local files the data sets were just loaded from, so an update can skip them."""
+        for name, url in urls.items():
+            _, data_path = _datasets[name]
+            path = url if url is not None else data_path
+            if os.path.isfile(path):
+                self._set_checksum(name, get_sha256(path))
+        self.session.commit()
+
+    def update(self,
+               phosphorylation_url=None,
+               sumoylation_url=None,
+               ubiquitination_url=None,
+               o_galnac_url=None,
+               o_glcnac_url=None,
+               acetylation_url=None,
+               ptmvar_url=None,
+               regulatory_sites_url=None,
+               disease_associated_sites_url=None,
+               force_download: bool = False,
+               batch_size: Optional[int] = None,
+               ) -> Mapping[str, str]:
+        """Bring the database up to date with a new PhosphoSitePlus release by only writing what changed.
+
+        Data sets whose files have the same hash as when they were last loaded are skipped. For the others, the
+        release is compared to what's stored:
+
+        - modification sites are keyed by protein, residue, and position within their modification type. New ones are
+          inserted and retracted ones are deleted, unless PTMVar still refers to them. Proteins are only updated if
+          their names or species changed.
+        - PTMVar entries are keyed by their mutation and the modification it affects. New ones are inserted and
+          retracted ones are deleted along with the mutations no longer used by any entry.
+        - regulatory and disease-associated sites have no key of their own, so all of the ones from a changed data set
+          are replaced.
+
+        :param force_download: If true, downloads the data sets to get the latest release. Ignored for data sets whose
+         URL is a local file.
+        :param batch_size: The number of rows per ``INSERT``
+        :return: A dictionary from the name of each data set to either ``'unchanged'`` or ``'updated'``
+        """
+        urls = dict(
+            phosphorylation=phosphorylation_url,
+            acetylation=acetylation_url,
+            sumoylation=sumoylation_url,
+            ubiquitination=ubiquitination_url,
+            o_galnac=o_galnac_url,
+            o_glcnac=o_glcnac_url,
+            ptmvar=ptmvar_url,
+            regulatory_sites=regulatory_sites_url,
+            disease_associated_sites=disease_associated_sites_url,
+        )
+        paths = {
+            name: _get_release_path(url, *_datasets[name], force_download=force_download)
+            for name, url in urls.items()
+        }
+        checksums = {name: get_sha256(path) for name, path in paths.items()}
+        stored_checksums = self.get_checksums()
+        rv = {
+            name: 'unchanged' if stored_checksums.get(name) == checksum else 'updated'
+            for name, checksum in checksums.items()
+        }
+        log.info('data sets: %s', rv)
+
+        # the models cached by an earlier populate or update belong to a session that was closed since
+        self._clear_caches()
+
+        t = time.time()
+
+        modification_types = {
+            modification_type
+            for name, modification_type in _modification_site_dataset_types.items()
+            if rv[name] == 'updated'
+        }
+
+        # PTMVar and the site annotations go first so the modifications that only they referred to are released
+        # before the modifications are compared, which means their types have to be compared even if their site data
+        # sets didn't change
+        # only the statistics of what changed are counted again
+        statistic_names = set()
+
+        if rv['ptmvar'] == 'updated':
+            log.info('updating ptmvar')
+            modification_types.update(self._update_ptmvar(_get_ptmvar_df(paths['ptmvar']), batch_size=batch_size))
+            self._set_checksum('ptmvar', checksums['ptmvar'])
+            self.session.commit()
+            statistic_names.update(('proteins', 'species', 'mutations', 'mutation_effects'))
+
+        for name in _site_annotation_models:
+            if rv[name] == 'updated':
+                log.info('updating %s', name)
+                modification_types.update(self._replace_site_annotations(name, paths[name], batch_size=batch_size))
+                self._set_checksum(name, checksums[name])
+                self.session.commit()
+                statistic_names.update(_site_annotation_statistics[name])
+
+        # proteins are compared with the first data set they're in, in the same order as they're populated
+        compared_uniprot_ids = set()
+        site_modification_types = list(dict.fromkeys(_modification_site_dataset_types.values()))
+        modification_types = [
+            modification_type
+            for modification_type in site_modification_types
+            if modification_type in modification_types
+        ] + sorted(modification_types.difference(site_modification_types))
+
+        if modification_types:
+            statistic_names.update(('proteins', 'species', 'modifications'))
+        # if any protein changed, its species might have, so its modifications of the other types are counted again too
+        species_changed = False
+
+        for modification_type in modification_types:
+            # data sets that are loaded as the same type, like O-GalNAc and O-GlcNAc, are compared to it together.
+            # Types that only come from PTMVar, like methylation, have none.
+            names = [
+                name
+                for name, dataset_modification_type in _modification_site_dataset_types.items()
+                if dataset_modification_type == modification_type
+            ]
+            log.info('updating %s modifications from %s', modification_type, ', '.join(names) or 'no data sets')
+            type_paths = [paths[name] for name in names]
+            if self._update_modifications(modification_type, type_paths, compared_uniprot_ids, batch_size=batch_size):
+                species_changed = True
+            for name in names:
+                self._set_checksum(name, checksums[name])
+            self.session.commit()
+
+        self._clear_caches()
+        if statistic_names:
+            self.refresh_statistics(
+                names=[name for name in STATISTIC_NAMES if name in statistic_names],
+                modification_types=None if species_changed else modification_types,
+            )
+        log.info('done updating in %.2f seconds', time.time() - t)
+        return rv
+
+    def _clear_caches(self) -> None:
+        """Forget the models and site index held in memory, after rows were deleted or the session was closed."""
+        self.session.expire_all()
+        self.name_to_modification_type.clear()
+        self.name_to_species.clear()
+        self.uniprot_id_to_protein.clear()
+        self.modifications.clear()
+        self.mutations.clear()
+        self._site_index = None
+        self._statistics = None
+
+    def _update_proteins(self, df: pd.DataFrame, batch_size: Optional[int] = None) -> int:
+        """Update the names and species of the stored proteins that changed in a modification site data frame.
+
+        :return: The number of proteins updated
+        """
+        if batch_size is None:
+            batch_size = BULK_INSERT_BATCH_SIZE
+
+        protein_df = df.drop_duplicates('ACC_ID')[['ACC_ID', 'ORGANISM', 'GENE', 'PROTEIN']].astype(object)
+        protein_df = protein_df.rename(columns={'ACC_ID': 'uniprot_id'})
+        uniprot_ids = protein_df.uniprot_id.tolist()
+
+        rows = []
+        for start in range(0, len(uniprot_ids), QUERY_CHUNK_SIZE):
+            chunk = uniprot_ids[start:start + QUERY_CHUNK_SIZE]
+            rows.extend(
+                self.session.query(
+                    Protein.id, Protein.uniprot_id, Protein.gene_name, Protein.protein_name, Species.name,
+                )
+                .outerjoin(Species)
+                .filter(Protein.uniprot_id.in_(chunk))
+            )
+        stored_df = pd.DataFrame(rows, columns=['id', 'uniprot_id', 'gene_name', 'protein_name', 'species_name'])
+
+        merged = protein_df.merge(stored_df, on='uniprot_id').fillna('')
+        is_changed = merged.GENE != merged.gene_name
+        is_changed |= merged.PROTEIN != merged.protein_name
+        is_changed |= merged.ORGANISM != merged.species_name
+        changed = merged[is_changed].replace('', None)
+        if changed.empty:
+            return 0
+
+        species_ids = self._get_or_create_species_ids(changed.ORGANISM.dropna().unique())
+        update = (
+            Protein.__table__.update().where(Protein.id == bindparam('_id'))
+            .values(
+                gene_name=bindparam('_gene_name'),
+                protein_name=bindparam('_protein_name'),
+                species_id=bindparam('_species_id'),
+            )
+        )
+        records = [
+            dict(
+                _id=int(protein_id),
+                _gene_name=gene_name,
+                _protein_name=protein_name,
+                _species_id=species_ids.get(organism),
+            )
+            for protein_id, gene_name, protein_name, organism in changed[['id', 'GENE', 'PROTEIN', 'ORGANISM']].values
+        ]
+        for start in range(0, len(records), batch_size):
+            self.session.execute(update, records[start:start + batch_size])
+
+        log.info('updated %d proteins', len(records))
+        return len(records)
+
+    def _update_modifications(self,
+                              modification_type: str,
+                              paths: Iterable[str],
+                              compared_uniprot_ids: Set[str],
+                              batch_size: Optional[int] = None,
+                              ) -> int:
+        """Make the stored modifications of one type match the modification site files of that type.
+
+        The files are read chunk by chunk. The sites of each chunk are looked up by the same key as populate uses, see
+        :meth:`_get_new_modification_df`, and the new ones are inserted right away, so only one chunk is held in
+        memory at a time. The stored modifications that no chunk had are deleted at the end.
+
+        Proteins that aren't stored yet are inserted. The stored ones are compared with the first chunk they're in
+        with :meth:`_update_proteins`, unless they're in ``compared_uniprot_ids`` already.
+
+        :param modification_type: The name of the modification type, like ``Ph``
+        :param paths: The modification site files loaded as this type. Types that only come from PTMVar, like
+         methylation, have none.
+        :param compared_uniprot_ids: The UniProt identifiers of the proteins that were compared already. The ones
+         compared here are added.
+        :param batch_size: The number of rows per ``INSERT``
+        :return: The number of proteins updated
+        """
+        modification_type_id = self._get_or_create_modification_type_ids([modification_type])[modification_type]
+        retracted_ids = {
+            modification_id
+            for modification_id, in self.session.query(Modification.id).filter(
+                Modification.modification_type_id == modification_type_id,
+            )
+        }
+
+        n_proteins = n_inserted = 0
+        for path in paths:
+            for chunk in read_modification_site_chunks(path, chunksize=READ_CHUNK_SIZE):
+                df = _prepare_modification_df(chunk)
+                n_proteins += self._update_proteins(df[~df.ACC_ID.isin(compared_uniprot_ids)], batch_size=batch_size)
+                compared_uniprot_ids.update(df.ACC_ID)
+
+                site_df = self._get_modification_site_df(df[df.modification_type == modification_type],
+                                                         batch_size=batch_size)
+                site_df = self._get_stored_modification_ids(site_df)
+                retracted_ids.difference_update(site_df.id.dropna().astype(int))
+
+                new_df = site_df.loc[site_df.id.isna(), _modification_key]
+                if len(new_df.index):
+                    n_inserted += self._insert_df(Modification, new_df, batch_size=batch_size)
+
+        n_deleted = self._delete_modifications(retracted_ids)
+        log.info('inserted %d and deleted %d %s modifications', n_inserted, n_deleted, modification_type)
+        return n_proteins
+
+    def _delete_modifications(self, modification_ids: Iterable[int]) -> int:
+        """Delete the modifications that no mutation effects, regulatory sites, or disease associations refer to.
+
+        :return: The number of modifications deleted
+        """
+        modification_ids = [int(modification_id) for modification_id in modification_ids]
+
+        referenced = set()
+        for start in range(0, len(modification_ids), QUERY_CHUNK_SIZE):
+            chunk = modification_ids[start:start + QUERY_CHUNK_SIZE]
+            for model in _modification_referrers:
+                query = self.session.query(model.modification_id).filter(model.modification_id.in_(chunk))
+                referenced.update(modification_id for modification_id, in query)
+
+        deleted_ids = [modification_id for modification_id in modification_ids if modification_id not in referenced]
+        self._delete_ids(Modification, deleted_ids)
+        return len(deleted_ids)
+
+    def _delete_ids(self, model, ids: List[int]) -> None:
+        """Delete rows of the model by their identifiers with chunked ``IN`` clauses."""
+        table = model.__table__
+        for start in range(0, len(ids), QUERY_CHUNK_SIZE):
+            self.session.execute(table.delete().where(table.c.id.in_(ids[start:start + QUERY_CHUNK_SIZE])))
+
+    def _update_ptmvar(self, df: pd.DataFrame, batch_size: Optional[int] = None) -> Set[str]:
+        """Make the stored mutation effects match a PTMVar data frame.
+
+        :return: The modification types of the modifications referred to by retracted mutation effects
+        """
+        df = df.assign(**{
+            'modification_type': df.MOD_TYPE.map(_pmod_map),
+            'MUT_RSD#': df['MUT_RSD#'].astype(int),
+            'MOD_RSD': df.MOD_RSD.astype(int),
+        })
+
+        stored_df = pd.DataFrame(
+            self.session.query(
+                MutationEffect.id, MutationEffect.mutation_id, Protein.uniprot_id, Mutation.from_aa,
+                Mutation.position, Mutation.to_aa, Modification.residue, Modification.position,
+                ModificationType.name,
+            )
+            .select_from(MutationEffect)
+            .join(Mutation, MutationEffect.mutation_id == Mutation.id)
+            .join(Protein, Mutation.protein_id == Protein.id)
+            .join(Modification, MutationEffect.modification_id == Modification.id)
+            .join(ModificationType, Modification.modification_type_id == ModificationType.id)
+            .all(),
+            columns=['id', 'mutation_id'] + _ptmvar_key,
+        ).astype({'MUT_RSD#': int, 'MOD_RSD': int})
+
+        diff = df[_ptmvar_key].drop_duplicates().merge(stored_df, on=_ptmvar_key, how='outer', indicator=True)
+        new_df = df.merge(diff.loc[diff._merge == 'left_only', _ptmvar_key], on=_ptmvar_key)
+        retracted_df = diff[diff._merge == 'right_only']
+
+        if len(new_df.index):
+            self._bulk_populate_ptmvar_df(new_df.drop(columns='modification_type'), batch_size=batch_size)
+
+        self._delete_ids(MutationEffect, retracted_df.id.astype(int).tolist())
+
+        # mutations only come from PTMVar, so the ones without effects left are retracted too
+        mutation_ids = retracted_df.mutation_id.astype(int).unique().tolist()
+        used = set()
+        for start in range(0, len(mutation_ids), QUERY_CHUNK_SIZE):
+            chunk = mutation_ids[start:start + QUERY_CHUNK_SIZE]
+            query = self.session.query(MutationEffect.mutation_id).filter(MutationEffect.mutation_id.in_(chunk))
+            used.update(mutation_id for mutation_id, in query)
+        self._delete_ids(Mutation, [mutation_id for mutation_id in mutation_ids if mutation_id not in used])
+
+        log.info('inserted %d and deleted %d mutation effects', len(new_df.index), len(retracted_df.index))
+        return set(retracted_df.modification_type)
+
+    def _replace_site_annotations(self, name: str, path: str, batch_size: Optional[int] = None) -> Set[str]:
+        """Replace the rows loaded from a data set that annotates modification sites with the ones in a new release.
+
+        :param name: Either ``'regulatory_sites'`` or ``'disease_associated_sites'``
+        :param path: The path of the new release
+        :return: The modification types of the modifications the replaced rows referred to
+        """
+        models = _site_annotation_models[name]
+
+        released = set()
+        for model in models:
+            released.update(
+                modification_type
+                for modification_type, in self.session.query(ModificationType.name)
+                .select_from(model)
+                .join(Modification, model.modification_id == Modification.id)
+                .join(ModificationType, Modification.modification_type_id == ModificationType.id)
+                .distinct()
+            )
+            self.session.execute(model.__table__.delete())
+
+        if name == 'regulatory_sites':
+            self._populate_regulatory_sites(url=path, batch_size=batch_size)
+        else:
+            self._populate_disease_associated_sites(url=path, batch_size=batch_size)
+
+        return released
+
+    @staticmethod
+    def _yield_filtered(query,
+                        batch_size: Optional[int] = None,
+                        site_filter: Optional[SiteFilter] = None,
+                        protein=Protein,
+                        modification_type=None,
+                        ) -> Iterable[tuple]:
+        """Stream the rows of a query, restricted to the species, proteins, and modification types of a filter.
+
+        :param protein: The protein model, or an alias of it, that the filter restricts
+        :param modification_type: The modification type model that the filter restricts. If none, the modification
+         types aren't restricted.
+        """
+        queries = [query] if site_filter is None else site_filter.filter_query(query, protein, modification_type)
+        return chain.from_iterable(query.yield_per(batch_size or EXPORT_BATCH_SIZE) for query in queries)
+
+    def _iter_protein_rows(self,
+                           batch_size: Optional[int] = None,
+                           site_filter: Optional[SiteFilter] = None,
+                           ) -> Iterable[tuple]:
+        """Stream rows of (UniProt identifier,) for all proteins.
+
+        :param batch_size: The number of rows fetched from the database at a time
+        :param site_filter: If given, only the proteins it keeps that have modifications of the types it keeps
+        """
+        query = self.session.query(Protein.uniprot_id)
+        if site_filter is not None and site_filter.modification_types is not None:
+            query = query.filter(Protein.id.in_(
+                select([Modification.protein_id]).where(
+                    Modification.modification_type_id.in_(site_filter.select_modification_type_ids())
+                )
+            ))
+        return self._yield_filtered(query, batch_size=batch_size, site_filter=site_filter)
+
+    def _iter_modification_rows(self,
+                                batch_size: Optional[int] = None,
+                                distinct: bool = False,
+                                site_filter: Optional[SiteFilter] = None,
+                                ) -> Iterable[tuple]:
+        """Stream flat rows of (UniProt identifier, modification type, residue, position) for all modifications.
+
+        :param batch_size: The number of rows fetched from the database at a time
+        :param distinct: If true, rows for modifications that are stored more than once, like the O-GalNAc and O-GlcNAc
+         sites that are both loaded as O-glycosylation, are only given once
+        :param site_filter: If given, only the modifications it keeps
+        """
+        query = (
+            self.session.query(Protein.uniprot_id, ModificationType.name, Modification.residue, Modification.position)
+            .select_from(Modification)
+            .join(Protein, Modification.protein_id == Protein.id)
+            .join(ModificationType, Modification.modification_type_id == ModificationType.id)
+        )
+        if distinct:
+            query = query.distinct()
+        return self._yield_filtered(query, batch_size=batch_size, site_filter=site_filter,
+                                    modification_type=ModificationType)
+
+    def _iter_mutation_rows(self,
+                            batch_size: Optional[int] = None,
+                            site_filter: Optional[SiteFilter] = None,
+                            ) -> Iterable[tuple]:
+        """Stream a flat row for each mutation.
+
+        The rows are (UniProt identifier, reference amino acid, position, variant amino acid).
+
+        :param batch_size: The number of rows fetched from the database at a time
+        :param site_filter: If given, only the mutations of the proteins it keeps that affect modifications of the
+         types it keeps
         """
-        self._populate_modifications(
-            phosphorylation_url=phosphorylation_url,
-            sumoylation_url=sumoylation_url,
-            ubiquitination_url=ubiquitination_url,
-            o_galnac_url=o_galnac_url,
-            o_glcnac_url=o_glcnac_url,
-            acetylation_url=acetylation_url,
+        query = (
+            self.session.query(Protein.uniprot_id, Mutation.from_aa, Mutation.position, Mutation.to_aa)
+            .select_from(Mutation)
+            .join(Protein, Mutation.protein_id == Protein.id)
         )
+        if site_filter is not None and site_filter.modification_types is not None:
+            query = query.filter(Mutation.id.in_(
+                select([MutationEffect.mutation_id]).where(MutationEffect.modification_id.in_(
+                    select([Modification.id]).where(
+                        Modification.modification_type_id.in_(site_filter.select_modification_type_ids())
+                    )
+                ))
+            ))
+        return self._yield_filtered(query, batch_size=batch_size, site_filter=site_filter)
+
+    def _iter_names(self, column, model, *criteria, batch_size: Optional[int] = None,
+                    site_filter: Optional[SiteFilter] = None) -> Iterable[tuple]:
+        """Stream rows of (name,) for each distinct value of a column of a model that refers to modifications.
+
+        :param criteria: Filters on the rows of the model whose values are kept
+        """
+        if site_filter is None:
+            return self.session.query(column).filter(*criteria).distinct().yield_per(batch_size or EXPORT_BATCH_SIZE)
+
+        query = (
+            self.session.query(column)
+            .filter(*criteria)
+            .select_from(model)
+            .join(Modification, model.modification_id == Modification.id)
+            .join(Protein, Modification.protein_id == Protein.id)
+            .join(ModificationType, Modification.modification_type_id == ModificationType.id)
+            .distinct()
+        )
+        # each chunk of proteins is distinct on its own, but not from the others
+        return list(dict.fromkeys(self._yield_filtered(query, batch_size=batch_size, site_filter=site_filter,
+                                                       modification_type=ModificationType)))
 
-        self._populate_ptmvar(url=ptmvar_url)
+    def _iter_regulatory_effect_names(self,
+                                      batch_size: Optional[int] = None,
+                                      site_filter: Optional[SiteFilter] = None,
+                                      ) -> Iterable[tuple]:
+        """Stream rows of (name,) for each distinct process that cited regulatory effects are on.
+
+        Functions aren't nodes of their own, see :func:`bio2bel_phosphosite.bel.add_regulatory_effect`.
+        """
+        return self._iter_names(
+            RegulatoryEffect.name,
+            RegulatoryEffect,
+            RegulatoryEffect.category == 'process',
+            RegulatoryEffect.pmids.isnot(None),
+            batch_size=batch_size,
+            site_filter=site_filter,
+        )
+
+    def _iter_disease_names(self,
+                            batch_size: Optional[int] = None,
+                            site_filter: Optional[SiteFilter] = None,
+                            ) -> Iterable[tuple]:
+        """Stream rows of (disease,) for each distinct disease that modifications are associated with in a citation."""
+        return self._iter_names(DiseaseAssociation.disease, DiseaseAssociation, DiseaseAssociation.pmids.isnot(None),
+                                batch_size=batch_size, site_filter=site_filter)
+
+    def _iter_mutation_effect_rows(self,
+                                   batch_size: Optional[int] = None,
+                                   site_filter: Optional[SiteFilter] = None,
+                                   ) -> Iterable[tuple]:
+        """Stream flat rows for all mutation effects.
+
+        Each row has the UniProt identifier, reference amino acid, position, and variant amino acid of the mutation
+        followed by the UniProt identifier, modification type, residue, and position of the modification.
+
+        :param batch_size: The number of rows fetched from the database at a time
+        :param site_filter: If given, only the effects on the modifications it keeps
+        """
+        mutation_protein = aliased(Protein)
+        modification_protein = aliased(Protein)
+        query = (
+            self.session.query(
+                mutation_protein.uniprot_id, Mutation.from_aa, Mutation.position, Mutation.to_aa,
+                modification_protein.uniprot_id, ModificationType.name, Modification.residue,
+                Modification.position,
+            )
+            .select_from(MutationEffect)
+            .join(Mutation, MutationEffect.mutation_id == Mutation.id)
+            .join(mutation_protein, Mutation.protein_id == mutation_protein.id)
+            .join(Modification, MutationEffect.modification_id == Modification.id)
+            .join(modification_protein, Modification.protein_id == modification_protein.id)
+            .join(ModificationType, Modification.modification_type_id == ModificationType.id)
+        )
+        return self._yield_filtered(query, batch_size=batch_size, site_filter=site_filter,
+                                    protein=modification_protein, modification_type=ModificationType)
+
+    def _iter_regulatory_effect_rows(self,
+                                     batch_size: Optional[int] = None,
+                                     site_filter: Optional[SiteFilter] = None,
+                                     ) -> Iterable[tuple]:
+        """Stream flat rows for all regulatory effects.
+
+        Each row has the UniProt identifier, modification type, residue, and position of the modification followed by
+        the category, name, direction, and PubMed identifiers of the effect.
+
+        :param batch_size: The number of rows fetched from the database at a time
+        :param site_filter: If given, only the effects of the modifications it keeps
+        """
+        query = (
+            self.session.query(
+                Protein.uniprot_id, ModificationType.name, Modification.residue, Modification.position,
+                RegulatoryEffect.category, RegulatoryEffect.name, RegulatoryEffect.direction,
+                RegulatoryEffect.pmids,
+            )
+            .select_from(RegulatoryEffect)
+            .join(Modification, RegulatoryEffect.modification_id == Modification.id)
+            .join(Protein, Modification.protein_id == Protein.id)
+            .join(ModificationType, Modification.modification_type_id == ModificationType.id)
+        )
+        return self._yield_filtered(query, batch_size=batch_size, site_filter=site_filter,
+                                    modification_type=ModificationType)
+
+    def _iter_disease_association_rows(self,
+                                       batch_size: Optional[int] = None,
+                                       site_filter: Optional[SiteFilter] = None,
+                                       ) -> Iterable[tuple]:
+        """Stream flat rows for all disease associations.
+
+        Each row has the UniProt identifier, modification type, residue, and position of the modification followed by
+        the disease, the alteration of the modification, and the PubMed identifiers of the association.
+
+        :param batch_size: The number of rows fetched from the database at a time
+        :param site_filter: If given, only the associations of the modifications it keeps
+        """
+        query = (
+            self.session.query(
+                Protein.uniprot_id, ModificationType.name, Modification.residue, Modification.position,
+                DiseaseAssociation.disease, DiseaseAssociation.alteration, DiseaseAssociation.pmids,
+            )
+            .select_from(DiseaseAssociation)
+            .join(Modification, DiseaseAssociation.modification_id == Modification.id)
+            .join(Protein, Modification.protein_id == Protein.id)
+            .join(ModificationType, Modification.modification_type_id == ModificationType.id)
+        )
+        return self._yield_filtered(query, batch_size=batch_size, site_filter=site_filter,
+                                    modification_type=ModificationType)
+
+    def to_bel(self,
+               batch_size: Optional[int] = None,
+               node_cache_size: Optional[int] = NODE_CACHE_SIZE,
+               species: Optional[Iterable[str]] = None,
+               modification_types: Optional[Iterable[str]] = None,
+               uniprot_ids: Optional[Iterable[str]] = None,
+               parallel: bool = False,
+               max_workers: Optional[int] = None,
+               ) -> 'BELGraph':
+        """Convert PhosphoSite knowledge to BEL.
+
+        Rather than loading every modification, mutation effect, regulatory effect, and disease association with their
+        related models, flat rows are streamed from joined queries and the BEL nodes are built from them directly. Nodes
+        are reused through a :class:`bio2bel_phosphosite.bel.NodeCache` for the duration of the export.
+
+        :param batch_size: The number of rows fetched from the database at a time
+        :param node_cache_size: The number of nodes of each kind kept for reuse. If none, keeps all of them.
+        :param species: If given, only exports the modifications on proteins of these species, like ``human``
+        :param modification_types: If given, only exports modifications of these types, like ``Ph``
+        :param uniprot_ids: If given, only exports the modifications on these proteins
+        :param parallel: If true, the proteins are split into partitions whose graphs are built in worker processes and
+         then merged. See :mod:`bio2bel_phosphosite.parallel`.
+        :param max_workers: The number of worker processes when ``parallel`` is true. Defaults to the number of
+         processors.
+        """
+        site_filter = SiteFilter.from_values(
+            species=species,
+            modification_types=modification_types,
+            uniprot_ids=uniprot_ids,
+        )
+
+        with self._phase('export'):
+            if parallel:
+                from .parallel import to_bel_parallel
+                graph = to_bel_parallel(self, max_workers=max_workers, site_filter=site_filter,
+                                        batch_size=batch_size, node_cache_size=node_cache_size)
+            else:
+                graph = self._to_bel(site_filter=site_filter, batch_size=batch_size, node_cache_size=node_cache_size)
+            self._add_rows(graph.number_of_edges())
+
+        return graph
+
+    def _to_bel(self,
+                site_filter: Optional[SiteFilter] = None,
+                batch_size: Optional[int] = None,
+                node_cache_size: Optional[int] = NODE_CACHE_SIZE,
+                ) -> 'BELGraph':
+        """Build the graph in this process. See :meth:`to_bel`."""
+        from pybel import BELGraph
+        from tqdm import tqdm
+
+        from .bel import (
+            BEL_GRAPH_NAME, BEL_GRAPH_VERSION, NodeCache, add_disease_association, add_modification,
+            add_mutation_effect, add_regulatory_effect,
+        )
 
-    def to_bel(self) -> BELGraph:
-        """Converts PhosphoSite knowledge to BEL"""
         graph = BELGraph(
-            name='PhosphositePlus Modifications',
-            version='1.0.0'  # need to get from data source itself
+            name=BEL_GRAPH_NAME,
+            version=BEL_GRAPH_VERSION,
         )
+        nodes = NodeCache(maxsize=node_cache_size)
+
+        def total(count):
+            """Count the rows for the progress bar, which can only be done cheaply without a filter."""
+            return count() if site_filter is None else None
+
+        rows = self._iter_modification_rows(batch_size=batch_size, site_filter=site_filter)
+        for row in tqdm(rows, total=total(self.count_modifications), desc='modifications'):
+            add_modification(graph, *row, nodes=nodes)
 
-        for m in tqdm(self.list_modifications(), total=self.count_modifications(), desc='modifications'):
-            m.add_as_relation(graph)
+        rows = self._iter_mutation_effect_rows(batch_size=batch_size, site_filter=site_filter)
+        for row in tqdm(rows, total=total(self.count_mutation_effects), desc='mutation effects'):
+            add_mutation_effect(graph, *row, nodes=nodes)
 
-        for me in tqdm(self.list_mutation_effects(), total=self.count_mutation_effects(), desc='mutation effects'):
-            me.add_as_relation(graph)
+        rows = self._iter_regulatory_effect_rows(batch_size=batch_size, site_filter=site_filter)
+        for row in tqdm(rows, total=total(self.count_regulatory_effects), desc='regulatory effects'):
+            add_regulatory_effect(graph, *row, nodes=nodes)
 
+        rows = self._iter_disease_association_rows(batch_size=batch_size, site_filter=site_filter)
+        for row in tqdm(rows, total=total(self.count_disease_associations), desc='disease associations'):
+            add_disease_association(graph, *row, nodes=nodes)
+
+        log.debug('node cache usage: %s', nodes.cache_info())
         return graph
+
+    def write_bel(self,
+                  file: TextIO,
+                  fmt: str = 'jsonl',
+                  batch_size: Optional[int] = None,
+                  node_cache_size: Optional[int] = STREAM_NODE_CACHE_SIZE,
+                  species: Optional[Iterable[str]] = None,
+                  modification_types: Optional[Iterable[str]] = None,
+                  uniprot_ids: Optional[Iterable[str]] = None,
+                  ) -> Mapping[str, int]:
+        """Stream PhosphoSite knowledge as BEL to a file without building a :class:`pybel.BELGraph`.
+
+        Edges are written as the rows are read, so the memory needed stays the same no matter how big the database
+        is. See :mod:`bio2bel_phosphosite.export` for the formats.
+
+        :param file: A writable file-like object
+        :param fmt: One of ``jsonl`` for node-link JSON lines, ``bel`` for BEL script, or ``tsv`` for an edge list
+        :param batch_size: The number of rows fetched from the database at a time
+        :param node_cache_size: The number of nodes of each kind kept for reuse
+        :param species: If given, only writes the modifications on proteins of these species, like ``human``
+        :param modification_types: If given, only writes modifications of these types, like ``Ph``
+        :param uniprot_ids: If given, only writes the modifications on these proteins
+        :return: The number of nodes and edges written
+        """
+        site_filter = SiteFilter.from_values(
+            species=species,
+            modification_types=modification_types,
+            uniprot_ids=uniprot_ids,
+        )
+        from .export import write_bel
+
+        with self._phase('export'):
+            rv = write_bel(self, file, fmt=fmt, batch_size=batch_size, node_cache_size=node_cache_size,
+                           site_filter=site_filter)
+            self._add_rows(rv['edges'])
+        return rv
+
+    def write_bel_shards(self,
+                         directory: str,
+                         max_workers: Optional[int] = None,
+                         n_partitions: Optional[int] = None,
+                         batch_size: Optional[int] = None,
+                         species: Optional[Iterable[str]] = None,
+                         modification_types: Optional[Iterable[str]] = None,
+                         uniprot_ids: Optional[Iterable[str]] = None,
+                         ) -> List[Tuple[str, int, int]]:
+        """Build PhosphoSite knowledge as BEL in worker processes and write it to the directory.
+
+        A node-link JSON graph is written for each partition of the proteins.
+
+        :param directory: The directory the shards are written to. It's made if it doesn't exist.
+        :param max_workers: The number of worker processes. Defaults to the number of processors.
+        :param n_partitions: The number of shards. Defaults to a few per worker.
+        :param batch_size: The number of rows fetched from the database at a time
+        :param species: If given, only writes the modifications on proteins of these species, like ``human``
+        :param modification_types: If given, only writes modifications of these types, like ``Ph``
+        :param uniprot_ids: If given, only writes the modifications on these proteins
+        :return: The path, number of nodes, and number of edges of each shard
+        """
+        site_filter = SiteFilter.from_values(
+            species=species,
+            modification_types=modification_types,
+            uniprot_ids=uniprot_ids,
+        )
+        from .parallel import write_bel_shards
+
+        with self._phase('export'):
+            rv = write_bel_shards(self, directory, max_workers=max_workers, n_partitions=n_partitions,
+                                  site_filter=site_filter, batch_size=batch_size)
+            self._add_rows(sum(number_of_edges for _, _, number_of_edges in rv))
+        return rv
+
+    def write_snapshot(self, path: str) -> int:
+        """Write a compact, read-only snapshot of the proteins, modifications, mutations, and statistics.
+
+        It can be memory-mapped with :meth:`bio2bel_phosphosite.snapshot.Snapshot.load` and queried like the manager.
+        See :mod:`bio2bel_phosphosite.snapshot`.
+
+        :param path: The path of the snapshot file
+        :return: The size of the snapshot in bytes
+        """
+        with self._phase('export'):
+            return write_snapshot(self, path)
+
+    def annotate_proteins(self,
+                          uniprot_ids: Iterable[str],
+                          chunk_size: Optional[int] = None,
+                          ) -> Iterable[ProteinAnnotation]:
+        """Look up proteins with their modifications and mutations in chunks, instead of one query per protein.
+
+        :param uniprot_ids: UniProt identifiers. They're read a chunk at a time.
+        :param chunk_size: The number of identifiers per chunk
+        :return: An annotation for each identifier, in the same order, including ones that aren't in the database.
+         See :mod:`bio2bel_phosphosite.lookup`.
+        """
+        return self._iterate('lookup', annotate_proteins(self, uniprot_ids, chunk_size=chunk_size), count=lambda _: 1)
+
+    def write_protein_annotations(self,
+                                  uniprot_ids: Iterable[str],
+                                  file: TextIO,
+                                  fmt: str = 'tsv',
+                                  chunk_size: Optional[int] = None,
+                                  ) -> Mapping[str, float]:
+        """Look up proteins in chunks and stream their modifications and mutations to a file.
+
+        :param uniprot_ids: UniProt identifiers. They're read a chunk at a time.
+        :param file: A writable file-like object
+        :param fmt: One of ``tsv`` or ``jsonl``. See :mod:`bio2bel_phosphosite.lookup`.
+        :param chunk_size: The number of identifiers per chunk
+        :return: The number of identifiers looked up, found, and missing, and their throughput
+        """
+        with self._phase('lookup'):
+            rv = write_protein_annotations(self, uniprot_ids, file, fmt=fmt, chunk_size=chunk_size)
+            self._add_rows(rv['identifiers'])
+        return rv
+
+    @staticmethod
+    def _cli_add_to_bel(main):
+        """Add the commands that write BEL, including ones that stream it and write it in shards."""
+        add_cli_to_bel(main)
+        add_cli_export_bel(main)
+        return add_cli_write_bel_shards(main)
@@ -2,16 +2,19 @@
 
 """Database model for Bio2BEL Phosphosite."""
 
-from sqlalchemy import Column, ForeignKey, Index, Integer, String
+from datetime import datetime
+from typing import List, TYPE_CHECKING
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import backref, relationship
 
-from pybel import BELGraph
-from pybel.constants import HAS_VARIANT, REGULATES
-from pybel.dsl import pmod, protein, protein_substitution
-from pybel.language import amino_acid_dict
 from .constants import MODULE_NAME, PROTEIN_NAMESPACE
 
+if TYPE_CHECKING:
+    from pybel import BELGraph
+    from pybel.dsl import protein
+
 __all__ = [
     'Base',
     'Species',
@@ -20,6 +23,11 @@ __all__ = [
     'MutationEffect',
     'Mutation',
     'ModificationType',
+    'RegulatorySite',
+    'RegulatoryEffect',
+    'DiseaseAssociation',
+    'Dataset',
+    'Statistic',
 ]
 
 Base = declarative_base()
@@ -30,6 +38,11 @@ MODIFICATION_TYPE_TABLE_NAME = f'{MODULE_NAME}_modificationType'
 MODIFICATION_TABLE_NAME = f'{MODULE_NAME}_modification'
 MUTATION_TABLE_NAME = f'{MODULE_NAME}_mutation'
 MUTATION_MODIFICATION_TABLE_NAME = f'{MODULE_NAME}_mutation_modification'
+REGULATORY_SITE_TABLE_NAME = f'{MODULE_NAME}_regulatory_site'
+REGULATORY_EFFECT_TABLE_NAME = f'{MODULE_NAME}_regulatory_effect'
+DISEASE_ASSOCIATION_TABLE_NAME = f'{MODULE_NAME}_disease_association'
+DATASET_TABLE_NAME = f'{MODULE_NAME}_dataset'
+STATISTIC_TABLE_NAME = f'{MODULE_NAME}_statistic'
 
 
 class Species(Base):
@@ -64,12 +77,10 @@ class Protein(Base):
             return f'{self.uniprot_id} ({self.gene_name})'
         return self.uniprot_id
 
-    def as_bel(self) -> protein:
+    def as_bel(self) -> 'protein':
         """Returns this model as a BEL entity."""
-        return protein(
-            namespace='uniprot',
-            name=str(self.uniprot_id),
-        )
+        from .bel import protein_to_bel
+        return protein_to_bel(self.uniprot_id)
 
 
 class ModificationType(Base):
@@ -89,6 +100,10 @@ class Modification(Base):
     """Represents a protein with a post-translational modification."""
 
     __tablename__ = MODIFICATION_TABLE_NAME
+    __table_args__ = (
+        Index(f'ix_{MODIFICATION_TABLE_NAME}_site', 'protein_id', 'residue', 'position', 'modification_type_id',
+              unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
 
@@ -105,20 +120,16 @@ class Modification(Base):
     def type(self):
         return self.modification_type.name
 
-    def as_bel(self) -> protein:
-        parent = self.protein.as_bel()
-        variant = pmod(
-            name=self.modification_type.name,
-            position=self.position,
-            code=amino_acid_dict[self.residue.upper()],
-        )
-        return parent.with_variants(variant)
+    def as_bel(self) -> 'protein':
+        from .bel import modification_to_bel
+        return modification_to_bel(self.protein.uniprot_id, self.modification_type.name, self.residue, self.position)
 
-    def add_as_relation(self, graph: BELGraph) -> str:
+    def add_as_relation(self, graph: 'BELGraph') -> str:
         """Add this modification to the graph."""
-        return graph.add_has_variant(self.protein.as_bel(), self.as_bel())
-
-    Index('idx_mod', 'type', 'protein_id', 'residue', 'position')
+        from .bel import modification_variant
+        parent = self.protein.as_bel()
+        variant = modification_variant(self.modification_type.name, self.residue, self.position)
+        return graph.add_has_variant(parent, parent.with_variants(variant))
 
     def _mod_only(self):
         return f'{self.residue}{self.position} {self.modification_type}'
@@ -131,6 +142,9 @@ class Mutation(Base):
     """Keeps track of proteins that have an amino acid substitution."""
 
     __tablename__ = MUTATION_TABLE_NAME
+    __table_args__ = (
+        Index(f'ix_{MUTATION_TABLE_NAME}_substitution', 'protein_id', 'from_aa', 'position', 'to_aa', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
 
@@ -145,17 +159,18 @@ class Mutation(Base):
     to_aa = Column(String(1))
 
     def get_protein_substitution(self):
+        from pybel.dsl import protein_substitution
         return protein_substitution(self.from_aa, self.position, self.to_aa)
 
-    def as_bel(self) -> protein:
+    def as_bel(self) -> 'protein':
         """Return this mutated protein"""
-        parent = self.protein.as_bel()
-        modification = self.get_protein_substitution()
-        return parent.with_variants(modification)
+        from .bel import mutation_to_bel
+        return mutation_to_bel(self.protein.uniprot_id, self.from_aa, self.position, self.to_aa)
 
-    def add_as_relation(self, graph: BELGraph) -> str:
+    def add_as_relation(self, graph: 'BELGraph') -> str:
         """Add this modification to the graph."""
-        return graph.add_has_variant(self.protein.as_bel(), self.as_bel())
+        parent = self.protein.as_bel()
+        return graph.add_has_variant(parent, parent.with_variants(self.get_protein_substitution()))
 
     def __repr__(self):
         return f'{self.protein} {self.from_aa}{self.position}{self.to_aa}'
@@ -176,15 +191,152 @@ class MutationEffect(Base):
 
     var_position = Column(Integer, doc='Distance of mutation to modification position')
 
-    def add_as_relation(self, graph: BELGraph) -> str:
+    def add_as_relation(self, graph: 'BELGraph') -> str:
         """Add the association between this mutation and modification as an edge."""
+        from pybel.constants import REGULATES
+        from .bel import MUTATION_EFFECT_CITATION, MUTATION_EFFECT_EVIDENCE
         return graph.add_qualified_edge(
             u=self.mutation.as_bel(),
             v=self.modification.as_bel(),
             relation=REGULATES,
-            evidence='PhosphoSitePlus',
-            citation='15174125',
+            evidence=MUTATION_EFFECT_EVIDENCE,
+            citation=MUTATION_EFFECT_CITATION,
             annotations={
                 'bio2bel': 'phosphositeplus',
             }
         )
+
+
+class RegulatorySite(Base):
+    """Represents what PhosphoSitePlus knows about the regulatory role of a modification."""
+
+    __tablename__ = REGULATORY_SITE_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    modification_id = Column(Integer, ForeignKey(f'{MODIFICATION_TABLE_NAME}.id'), nullable=False, index=True)
+    modification = relationship(Modification, backref=backref('regulatory_sites', lazy='dynamic'))
+
+    domain = Column(String(255), nullable=True)
+    on_function = Column(Text, nullable=True, doc='The molecular functions affected, like "activity, induced"')
+    on_process = Column(Text, nullable=True, doc='The biological processes affected, like "apoptosis, inhibited"')
+    on_protein_interaction = Column(Text, nullable=True, doc='The protein interactions affected')
+    on_other_interaction = Column(Text, nullable=True, doc='The other interactions affected')
+    pmids = Column(Text, nullable=True, doc='The PubMed identifiers of the sources, separated by semicolons')
+    notes = Column(Text, nullable=True)
+
+    def __repr__(self):
+        """Show the modification at the site."""
+        return f'{self.modification} regulatory site'
+
+
+class RegulatoryEffect(Base):
+    """Represents a molecular function or biological process that a modification affects."""
+
+    __tablename__ = REGULATORY_EFFECT_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    modification_id = Column(Integer, ForeignKey(f'{MODIFICATION_TABLE_NAME}.id'), nullable=False, index=True)
+    modification = relationship(Modification, backref=backref('regulatory_effects', lazy='dynamic'))
+
+    category = Column(String(32), nullable=False, doc="Either 'function' or 'process'")
+    name = Column(String(255), nullable=False)
+    direction = Column(String(32), nullable=True, doc="How it's affected, like 'induced' or 'inhibited'")
+    pmids = Column(Text, nullable=True, doc='The PubMed identifiers of the regulatory site, separated by semicolons')
+
+    def add_as_relation(self, graph: 'BELGraph') -> List[str]:
+        """Add the effect of the modification on the function or process as one edge per citation."""
+        from .bel import add_regulatory_effect
+        modification = self.modification
+        return add_regulatory_effect(
+            graph,
+            modification.protein.uniprot_id,
+            modification.modification_type.name,
+            modification.residue,
+            modification.position,
+            self.category,
+            self.name,
+            self.direction,
+            self.pmids,
+        )
+
+    def __repr__(self):
+        """Show the modification and what it affects."""
+        if self.direction:
+            return f'{self.modification} {self.name}, {self.direction}'
+        return f'{self.modification} {self.name}'
+
+
+class DiseaseAssociation(Base):
+    """Represents a disease that an alteration of a modification is associated with."""
+
+    __tablename__ = DISEASE_ASSOCIATION_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    modification_id = Column(Integer, ForeignKey(f'{MODIFICATION_TABLE_NAME}.id'), nullable=False, index=True)
+    modification = relationship(Modification, backref=backref('disease_associations', lazy='dynamic'))
+
+    disease = Column(String(255), nullable=False)
+    alteration = Column(String(255), nullable=True, doc="How the modification is altered, like 'increased'")
+    pmids = Column(Text, nullable=True, doc='The PubMed identifiers of the sources, separated by semicolons')
+    notes = Column(Text, nullable=True)
+
+    def add_as_relation(self, graph: 'BELGraph') -> List[str]:
+        """Add the association between the modification and the disease as one edge per citation."""
+        from .bel import add_disease_association
+        modification = self.modification
+        return add_disease_association(
+            graph,
+            modification.protein.uniprot_id,
+            modification.modification_type.name,
+            modification.residue,
+            modification.position,
+            self.disease,
+            self.alteration,
+            self.pmids,
+        )
+
+    def __repr__(self):
+        """Show the modification and the disease it's associated with."""
+        return f'{self.modification} {self.disease}'
+
+
+class Dataset(Base):
+    """Represents a PhosphoSitePlus data set that's been loaded, so an unchanged release can be skipped."""
+
+    __tablename__ = DATASET_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    name = Column(String(255), unique=True, nullable=False, index=True)
+    sha256 = Column(String(64), nullable=False, doc='The SHA-256 hash of the file the data set was loaded from')
+    updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        """Show the data set and the start of its hash."""
+        return f'{self.name} ({self.sha256[:8]})'
+
+
+class Statistic(Base):
+    """Represents a count of some rows in the database, kept so summarizing doesn't have to scan the tables.
+
+    Counts that are broken down have a row for each combination of the species, modification type, and residue they're
+    broken down by. The others leave those columns empty.
+    """
+
+    __tablename__ = STATISTIC_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    name = Column(String(255), nullable=False, index=True, doc='What is counted, like modifications')
+    species = Column(String(255), doc='The name of the species counted')
+    modification_type = Column(String(255), doc='The name of the modification type counted')
+    residue = Column(String(3), doc='The residue counted')
+    count = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        """Show the statistic, what it's counted over, and its count."""
+        parts = ', '.join(part for part in (self.species, self.modification_type, self.residue) if part is not None)
+        return f'{self.name} ({parts}): {self.count}' if parts else f'{self.name}: {self.count}'
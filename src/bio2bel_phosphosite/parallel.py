@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+"""Build BEL from the database in worker processes.
+
+Adding nodes and edges to a :class:`pybel.BELGraph` is bound by one processor, so for big databases the proteins
+are split into partitions of consecutive database identifiers. For each partition, the calling process streams the
+flat rows of its modifications, mutation effects, regulatory effects, and disease associations out of the database,
+and a worker process builds a graph from those plain tuples with the builders from :mod:`bio2bel_phosphosite.bel`.
+The calling process reads the next partitions while the workers are busy.
+
+Each row belongs to the partition of the protein that has the modification, so no edge is built twice. The graphs of
+the partitions are either merged into one graph or written as shards of node-link JSON with :func:`pybel.to_json_file`,
+which can be read back with :func:`pybel.from_json_path`.
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pybel
+from pybel import BELGraph
+
+from .bel import (
+    BEL_GRAPH_NAME, BEL_GRAPH_VERSION, NodeCache, add_disease_association, add_modification, add_mutation_effect,
+    add_regulatory_effect,
+)
+from .constants import NODE_CACHE_SIZE
+from .filters import SiteFilter
+from .models import Protein
+
+__all__ = [
+    'get_protein_id_ranges',
+    'to_bel_parallel',
+    'write_bel_shards',
+]
+
+log = logging.getLogger(__name__)
+
+#: The number of partitions per worker by default, so a worker that gets a dense partition doesn't hold up the rest
+PARTITIONS_PER_WORKER = 4
+
+#: The flat rows of one partition: modifications, mutation effects, regulatory effects, and disease associations
+PartitionRows = Tuple[List[tuple], List[tuple], List[tuple], List[tuple]]
+
+
+def get_protein_id_ranges(manager,
+                          n_partitions: int,
+                          site_filter: Optional[SiteFilter] = None,
+                          ) -> List[Tuple[int, int]]:
+    """Split the proteins into partitions of about the same number of proteins by their database identifiers.
+
+    :param manager: A populated manager
+    :param n_partitions: The number of partitions. Fewer are made if there are fewer proteins.
+    :param site_filter: If given, only the proteins it keeps are split
+    :return: A list of half-open ranges of protein database identifiers, which is empty if there are no proteins
+    """
+    query = manager.session.query(Protein.id)
+    queries = [query] if site_filter is None else site_filter.filter_query(query, Protein)
+    protein_ids = np.sort(np.fromiter((protein_id for query in queries for protein_id, in query), dtype=np.int64))
+    if not len(protein_ids):
+        return []
+
+    return [
+        (int(chunk[0]), int(chunk[-1]) + 1)
+        for chunk in np.array_split(protein_ids, min(n_partitions, len(protein_ids)))
+    ]
+
+
+def _get_partition_rows(manager, site_filter: SiteFilter, batch_size: Optional[int] = None) -> PartitionRows:
+    """Read the flat rows of one partition of the database."""
+    return (
+        list(manager._iter_modification_rows(batch_size=batch_size, site_filter=site_filter)),
+        list(manager._iter_mutation_effect_rows(batch_size=batch_size, site_filter=site_filter)),
+        list(manager._iter_regulatory_effect_rows(batch_size=batch_size, site_filter=site_filter)),
+        list(manager._iter_disease_association_rows(batch_size=batch_size, site_filter=site_filter)),
+    )
+
+
+def _build_graph(index: int, rows: PartitionRows, node_cache_size: Optional[int] = NODE_CACHE_SIZE) -> BELGraph:
+    """Build the graph of one partition from its flat rows. Runs in a worker process."""
+    modification_rows, mutation_effect_rows, regulatory_effect_rows, disease_association_rows = rows
+
+    graph = BELGraph(
+        name=BEL_GRAPH_NAME,
+        version=BEL_GRAPH_VERSION,
+    )
+    nodes = NodeCache(maxsize=node_cache_size)
+
+    for row in modification_rows:
+        add_modification(graph, *row, nodes=nodes)
+
+    for row in mutation_effect_rows:
+        add_mutation_effect(graph, *row, nodes=nodes)
+
+    for row in regulatory_effect_rows:
+        add_regulatory_effect(graph, *row, nodes=nodes)
+
+    for row in disease_association_rows:
+        add_disease_association(graph, *row, nodes=nodes)
+
+    return graph
+
+
+def _write_shard(index: int,
+                 rows: PartitionRows,
+                 directory: str,
+                 node_cache_size: Optional[int] = NODE_CACHE_SIZE,
+                 ) -> Tuple[str, int, int]:
+    """Build the graph of one partition and write it to a file in the directory. Runs in a worker process.
+
+    :return: The path, number of nodes, and number of edges of the shard
+    """
+    graph = _build_graph(index, rows, node_cache_size=node_cache_size)
+    path = os.path.join(directory, f'phosphositeplus-{index:04d}.bel.json')
+    with open(path, 'w') as file:
+        pybel.to_json_file(graph, file)
+    return path, graph.number_of_nodes(), graph.number_of_edges()
+
+
+def _map_partitions(manager,
+                    build: Callable[[int, PartitionRows], Any],
+                    max_workers: int,
+                    n_partitions: Optional[int] = None,
+                    site_filter: Optional[SiteFilter] = None,
+                    batch_size: Optional[int] = None,
+                    ) -> Iterable[Any]:
+    """Read each partition and run a function on its rows in a process pool, yielding the results in order.
+
+    At most two partitions per worker are read ahead, so the rows waiting for a worker don't pile up in memory.
+
+    :param build: A function that takes the number of the partition and its rows. It has to be picklable.
+    """
+    if n_partitions is None:
+        n_partitions = PARTITIONS_PER_WORKER * max_workers
+
+    base_filter = site_filter or SiteFilter()
+    protein_id_ranges = get_protein_id_ranges(manager, n_partitions, site_filter=site_filter)
+    log.info('building BEL in %d partitions with %d workers', len(protein_id_ranges), max_workers)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as process_pool:
+        futures = deque()
+        for index, protein_id_range in enumerate(protein_id_ranges):
+            if len(futures) >= 2 * max_workers:
+                yield futures.popleft().result()
+
+            partition_filter = base_filter._replace(protein_id_range=protein_id_range)
+            rows = _get_partition_rows(manager, partition_filter, batch_size=batch_size)
+            futures.append(process_pool.submit(build, index, rows))
+
+        while futures:
+            yield futures.popleft().result()
+
+
+def to_bel_parallel(manager,
+                    max_workers: Optional[int] = None,
+                    n_partitions: Optional[int] = None,
+                    site_filter: Optional[SiteFilter] = None,
+                    batch_size: Optional[int] = None,
+                    node_cache_size: Optional[int] = NODE_CACHE_SIZE,
+                    ) -> BELGraph:
+    """Build the graphs of partitions of the database in worker processes and merge them into one graph.
+
+    :param manager: A populated manager
+    :param max_workers: The number of worker processes. Defaults to the number of processors.
+    :param n_partitions: The number of partitions of the proteins. Defaults to a few per worker.
+    :param site_filter: If given, only the parts of the database it keeps are converted
+    :param batch_size: The number of rows fetched from the database at a time
+    :param node_cache_size: The number of nodes of each kind each worker keeps for reuse
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+
+    t = time.time()
+    graph = BELGraph(
+        name=BEL_GRAPH_NAME,
+        version=BEL_GRAPH_VERSION,
+    )
+
+    subgraphs = _map_partitions(manager, partial(_build_graph, node_cache_size=node_cache_size), max_workers,
+                                n_partitions=n_partitions, site_filter=site_filter, batch_size=batch_size)
+
+    # merged in order, so the graph is the same no matter which worker finishes first
+    for subgraph in subgraphs:
+        graph.add_nodes_from(subgraph.nodes(data=True))
+        graph.add_edges_from(subgraph.edges(keys=True, data=True))
+
+    log.info('done building BEL with %d workers in %.2f seconds', max_workers, time.time() - t)
+    return graph
+
+
+def write_bel_shards(manager,
+                     directory: str,
+                     max_workers: Optional[int] = None,
+                     n_partitions: Optional[int] = None,
+                     site_filter: Optional[SiteFilter] = None,
+                     batch_size: Optional[int] = None,
+                     node_cache_size: Optional[int] = NODE_CACHE_SIZE,
+                     ) -> List[Tuple[str, int, int]]:
+    """Build the graphs of partitions of the database in worker processes and write each to its own file.
+
+    Since the graphs never come back to the calling process, this is faster than :func:`to_bel_parallel` and the
+    calling process doesn't have to hold the whole graph.
+
+    :param manager: A populated manager
+    :param directory: The directory the shards are written to. It's made if it doesn't exist.
+    :param max_workers: The number of worker processes. Defaults to the number of processors.
+    :param n_partitions: The number of partitions of the proteins, and therefore of shards. Defaults to a few per
+     worker.
+    :param site_filter: If given, only the parts of the database it keeps are converted
+    :param batch_size: The number of rows fetched from the database at a time
+    :param node_cache_size: The number of nodes of each kind each worker keeps for reuse
+    :return: The path, number of nodes, and number of edges of each shard
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    os.makedirs(directory, exist_ok=True)
+
+    t = time.time()
+    write_shard = partial(_write_shard, directory=directory, node_cache_size=node_cache_size)
+    rv = list(_map_partitions(manager, write_shard, max_workers, n_partitions=n_partitions, site_filter=site_filter,
+                              batch_size=batch_size))
+
+    log.info('done writing %d BEL shards with %d workers in %.2f seconds', len(rv), max_workers, time.time() - t)
+    return rv
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+"""A columnar cache of parsed data frames.
+
+Parsing the PhosphoSitePlus downloads is much slower than reading them back from an uncompressed
+`Arrow IPC <https://arrow.apache.org/docs/format/Columnar.html#ipc-file-format>`_ (Feather v2) file, which can also be
+memory-mapped. Parsed data frames for files downloaded to :data:`bio2bel_phosphosite.constants.DATA_DIR` are stored
+next to them and are reused as long as the download is unchanged, judged first by its modification time and size, then
+by its SHA-256 hash.
+
+This requires :mod:`pyarrow`, which can be installed with the ``cache`` extra like:
+
+.. code-block:: sh
+
+    pip install bio2bel_phosphosite[cache]
+
+Without it, everything is parsed from the downloads every time.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+from typing import Callable, Iterable, List, Optional
+
+import pandas as pd
+
+from ..constants import DATA_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover
+    pa = feather = None
+
+__all__ = [
+    'get_cached_df',
+    'iter_cached_chunks',
+    'clear_cached',
+    'get_sha256',
+    'get_usecols_variant',
+]
+
+log = logging.getLogger(__name__)
+
+
+def _is_cacheable(source_path: Optional[str]) -> bool:
+    """Check if parsed data from the source can be cached."""
+    if pa is None or source_path is None or not os.path.isfile(source_path):
+        return False
+    return os.path.dirname(os.path.abspath(source_path)) == os.path.abspath(DATA_DIR)
+
+
+def _get_paths(source_path: str, variant: str):
+    """Get the paths of the cached table and its metadata."""
+    prefix = f'{source_path}.{variant}'
+    return f'{prefix}.arrow', f'{prefix}.json'
+
+
+def get_sha256(path: str) -> str:
+    """Hash the file in blocks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(2 ** 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def get_usecols_variant(usecols: Optional[Iterable[str]] = None, prefix: str = 'df') -> str:
+    """Name a variant after the columns that are read, so tables with different columns are cached separately."""
+    if usecols is None:
+        return prefix
+    return f'{prefix}-' + hashlib.md5(','.join(usecols).encode('utf-8')).hexdigest()[:8]
+
+
+def _is_valid(source_path: str, variant: str) -> bool:
+    """Check if the cached table exists and was made from the current version of the source."""
+    table_path, metadata_path = _get_paths(source_path, variant)
+    if not os.path.exists(table_path) or not os.path.exists(metadata_path):
+        return False
+
+    with open(metadata_path) as file:
+        metadata = json.load(file)
+
+    stat = os.stat(source_path)
+    if metadata['mtime'] == stat.st_mtime and metadata['size'] == stat.st_size:
+        return True
+
+    if metadata['sha256'] != get_sha256(source_path):
+        return False
+
+    # The contents are the same, so remember the new modification time to skip hashing next time
+    _write_metadata(source_path, variant, sha256=metadata['sha256'])
+    return True
+
+
+def _write_metadata(source_path: str, variant: str, sha256: Optional[str] = None) -> None:
+    """Record the fingerprint of the source that a cached table was made from."""
+    _, metadata_path = _get_paths(source_path, variant)
+    stat = os.stat(source_path)
+    with open(metadata_path, 'w') as file:
+        json.dump(
+            dict(
+                mtime=stat.st_mtime,
+                size=stat.st_size,
+                sha256=sha256 or get_sha256(source_path),
+            ),
+            file,
+        )
+
+
+def clear_cached(source_path: str) -> None:
+    """Remove all cached tables made from the source."""
+    for path in glob.glob(f'{glob.escape(source_path)}.*.arrow') + glob.glob(f'{glob.escape(source_path)}.*.json'):
+        log.info('removing cached %s', path)
+        os.remove(path)
+
+
+def get_cached_df(source_path: Optional[str],
+                  variant: str,
+                  parse: Callable[[], pd.DataFrame],
+                  force: bool = False,
+                  ) -> pd.DataFrame:
+    """Get a parsed data frame from the cache, or parse and cache it.
+
+    :param source_path: The path of the file being parsed
+    :param variant: A name for what is parsed from the file, in case there are several
+    :param parse: A function that parses the file
+    :param force: If true, removes any cached tables for the source first
+    """
+    if not _is_cacheable(source_path):
+        return parse()
+
+    if force:
+        clear_cached(source_path)
+
+    table_path, _ = _get_paths(source_path, variant)
+    if _is_valid(source_path, variant):
+        log.info('using cached %s', table_path)
+        return feather.read_feather(table_path, memory_map=True)
+
+    rv = parse()
+    try:
+        feather.write_feather(rv, table_path, compression='uncompressed')
+    except (pa.ArrowException, ValueError):
+        log.warning('could not cache %s', table_path, exc_info=True)
+        if os.path.exists(table_path):
+            os.remove(table_path)
+    else:
+        _write_metadata(source_path, variant)
+    return rv
+
+
+def iter_cached_chunks(source_path: Optional[str],
+                       variant: str,
+                       iter_chunks: Callable[[], Iterable[pd.DataFrame]],
+                       columns: List[str],
+                       chunksize: int,
+                       categories: Iterable[str] = (),
+                       force: bool = False,
+                       ) -> Iterable[pd.DataFrame]:
+    """Stream chunks from the cache, or stream them from the parser while caching them.
+
+    :param source_path: The path of the file being parsed
+    :param variant: A name for what is parsed from the file, in case there are several
+    :param iter_chunks: A function that streams data frames from the file
+    :param columns: The columns of the chunks, which are all stored as strings
+    :param chunksize: The number of rows per chunk when reading from the cache
+    :param categories: Columns that are turned back into categoricals when reading from the cache
+    :param force: If true, removes any cached tables for the source first
+    """
+    if not _is_cacheable(source_path):
+        yield from iter_chunks()
+        return
+
+    if force:
+        clear_cached(source_path)
+
+    table_path, _ = _get_paths(source_path, variant)
+    if _is_valid(source_path, variant):
+        log.info('using cached %s', table_path)
+        with pa.memory_map(table_path) as source:
+            table = pa.ipc.open_file(source).read_all()
+            for start in range(0, table.num_rows, chunksize):
+                chunk = table.slice(start, chunksize).to_pandas()
+                yield chunk.astype({column: 'category' for column in categories})
+        return
+
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    temporary_path = f'{table_path}.tmp'
+    try:
+        with pa.OSFile(temporary_path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+            for chunk in iter_chunks():
+                writer.write_table(pa.Table.from_pandas(
+                    chunk[columns].astype(object),
+                    schema=schema,
+                    preserve_index=False,
+                ))
+                yield chunk
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+    os.replace(temporary_path, table_path)
+    _write_metadata(source_path, variant)
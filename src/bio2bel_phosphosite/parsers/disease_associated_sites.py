@@ -1,31 +1,47 @@
 # -*- coding: utf-8 -*-
 
+from functools import partial
+
 import pandas as pd
 
 from bio2bel import make_downloader
+from .cache import get_cached_df, get_usecols_variant
 from ..constants import DISEASE_ASSOCIATED_SITES_PATH, DISEASE_ASSOCIATED_SITES_URL
 
 __all__ = [
     'download_disease_associated_sites',
     'get_disease_associated_sites_df',
+    'DISEASE_ASSOCIATED_SITES_USECOLS',
+]
+
+#: The columns of the disease-associated sites file that are loaded into the database
+DISEASE_ASSOCIATED_SITES_USECOLS = [
+    'DISEASE', 'ALTERATION', 'GENE', 'PROTEIN', 'ACC_ID', 'ORGANISM', 'MOD_RSD', 'PMIDs', 'NOTES',
 ]
 
 download_disease_associated_sites = make_downloader(DISEASE_ASSOCIATED_SITES_URL, DISEASE_ASSOCIATED_SITES_PATH)
 
 
-def get_disease_associated_sites_df(url=None, cache=True, force_download=False):
-    """Gets the modifications site flat file
+def get_disease_associated_sites_df(url=None, cache=True, force_download=False, usecols=None):
+    """Get the disease-associated sites flat file.
 
     :param Optional[str] url: The URL (or file path) to download.
     :param bool cache: If true, the data is downloaded to the file system, else it is loaded from the internet
     :param bool force_download: If true, overwrites a previously cached file
+    :param Optional[list[str]] usecols: If given, only loads these columns
     :rtype: pandas.DataFrame
     """
     if url is None and cache:
         url = download_disease_associated_sites(force_download=force_download)
 
-    return pd.read_csv(
-        url or DISEASE_ASSOCIATED_SITES_URL,
+    url = url or DISEASE_ASSOCIATED_SITES_URL
+    read = partial(
+        pd.read_csv,
+        url,
         skiprows=2,
-        sep='\t'
+        sep='\t',
+        usecols=usecols,
+        dtype={'ORGANISM': 'category', 'PMIDs': str},
     )
+
+    return get_cached_df(url, get_usecols_variant(usecols), read, force=force_download)
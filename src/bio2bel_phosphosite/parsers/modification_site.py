@@ -1,42 +1,121 @@
 # -*- coding: utf-8 -*-
 
+import gzip
+import os
+from functools import partial
+from typing import Iterable
+from urllib.request import urlopen
+
 import pandas as pd
 
 from bio2bel import make_downloader
+from .cache import get_cached_df, iter_cached_chunks
 from ..constants import (
     ACETYLATION_PATH, ACETYLATION_URL, O_GALNAC_PATH, O_GALNAC_URL, O_GLCNAC_PATH, O_GLCNAC_URL, PHOSPHORYLATION_PATH,
     PHOSPHORYLATION_URL, SUMOYLATION_PATH, SUMOYLATION_URL, UBIQUITINATION_PATH, UBIQUITINATION_URL,
 )
 
 __all__ = [
+    'MODIFICATION_SITE_DATASETS',
     'get_phosphorylation_df',
     'get_acetylation_df',
     'get_ubiquinitation_df',
     'get_o_galnac_df',
     'get_o_glcnac_df',
     'get_sumoylation_df',
+    'get_modification_site_bytes',
+    'read_modification_site_df',
+    'read_modification_site_chunks',
+    'parse_mod_rsd',
 ]
 
+#: The URL and cache path of each modification site data set, in the order they are loaded
+MODIFICATION_SITE_DATASETS = {
+    'phosphorylation': (PHOSPHORYLATION_URL, PHOSPHORYLATION_PATH),
+    'acetylation': (ACETYLATION_URL, ACETYLATION_PATH),
+    'sumoylation': (SUMOYLATION_URL, SUMOYLATION_PATH),
+    'ubiquitination': (UBIQUITINATION_URL, UBIQUITINATION_PATH),
+    'o_galnac': (O_GALNAC_URL, O_GALNAC_PATH),
+    'o_glcnac': (O_GLCNAC_URL, O_GLCNAC_PATH),
+}
+
+#: Matches entries in the ``MOD_RSD`` column, like ``S15-p``: a residue, its position, a dash, and a modification code
+MOD_RSD_PATTERN = r'^(?P<residue>[A-Za-z])(?P<position>\d+)-(?P<code>\w+)$'
+
+#: The columns of the modification site files that are needed to populate the database
+MODIFICATION_SITE_USECOLS = ['GENE', 'PROTEIN', 'ACC_ID', 'MOD_RSD', 'ORGANISM']
+
+#: The types of the columns in :data:`MODIFICATION_SITE_USECOLS`
+MODIFICATION_SITE_DTYPES = {
+    'GENE': str,
+    'PROTEIN': str,
+    'ACC_ID': str,
+    'MOD_RSD': str,
+    'ORGANISM': 'category',
+}
+
+_gzip_magic = b'\x1f\x8b'
+
+
+def read_modification_site_df(path_or_buffer) -> pd.DataFrame:
+    """Read a modification site flat file.
+
+    :param path_or_buffer: A path, URL, or file-like object to pass to :func:`pandas.read_csv`
+    """
+    return pd.read_csv(
+        path_or_buffer,
+        skiprows=2,
+        sep='\t'
+    )
+
+
+def read_modification_site_chunks(path_or_buffer, chunksize: int) -> Iterable[pd.DataFrame]:
+    """Stream a modification site flat file as typed chunks that only have the columns needed for the database.
+
+    :param path_or_buffer: A path, URL, or file-like object to pass to :func:`pandas.read_csv`
+    :param chunksize: The number of rows per chunk
+    """
+    with pd.read_csv(
+        path_or_buffer,
+        skiprows=2,
+        sep='\t',
+        usecols=MODIFICATION_SITE_USECOLS,
+        dtype=MODIFICATION_SITE_DTYPES,
+        chunksize=chunksize,
+    ) as reader:
+        yield from reader
+
 
 def make_modification_df_getter(data_url, data_path):
     download_function = make_downloader(data_url, data_path)
 
-    def get_modifications_df(url=None, cache=True, force_download=False):
+    def get_modifications_df(url=None, cache=True, force_download=False, chunksize=None):
         """Gets the modifications site flat file
 
         :param Optional[str] url: The URL (or file path) to download.
         :param bool cache: If true, the data is downloaded to the file system, else it is loaded from the internet
         :param bool force_download: If true, overwrites a previously cached file
-        :rtype: pandas.DataFrame
+        :param Optional[int] chunksize: If given, streams typed chunks with only the columns needed for the database
+         instead of loading the whole file. See :func:`read_modification_site_chunks`.
+        :rtype: pandas.DataFrame or iter[pandas.DataFrame]
         """
         if url is None and cache:
             url = download_function(force_download=force_download)
 
-        return pd.read_csv(
-            url or data_url,
-            skiprows=2,
-            sep='\t'
-        )
+        url = url or data_url
+
+        if chunksize is not None:
+            return iter_cached_chunks(
+                url,
+                'sites',
+                partial(read_modification_site_chunks, url, chunksize=chunksize),
+                columns=MODIFICATION_SITE_USECOLS,
+                chunksize=chunksize,
+                categories=['ORGANISM'],
+                force=force_download,
+            )
+
+        return get_cached_df(url, 'df', partial(read_modification_site_df, url), force=force_download)
 
     return get_modifications_df
 
@@ -47,3 +126,48 @@ get_ubiquinitation_df = make_modification_df_getter(UBIQUITINATION_URL, UBIQUITI
 get_o_galnac_df = make_modification_df_getter(O_GALNAC_URL, O_GALNAC_PATH)
 get_o_glcnac_df = make_modification_df_getter(O_GLCNAC_URL, O_GLCNAC_PATH)
 get_sumoylation_df = make_modification_df_getter(SUMOYLATION_URL, SUMOYLATION_PATH)
+
+
+def get_modification_site_bytes(name, url=None, cache=True, force_download=False):
+    """Get the decompressed contents of a modification site flat file.
+
+    :param str name: The key of the data set in :data:`MODIFICATION_SITE_DATASETS`
+    :param Optional[str] url: The URL (or file path) to download.
+    :param bool cache: If true, the data is downloaded to the file system, else it is loaded from the internet
+    :param bool force_download: If true, overwrites a previously cached file
+    :rtype: bytes
+    """
+    data_url, data_path = MODIFICATION_SITE_DATASETS[name]
+
+    if url is None and cache:
+        url = make_downloader(data_url, data_path)(force_download=force_download)
+
+    url = url or data_url
+    if os.path.exists(url):
+        with open(url, 'rb') as file:
+            data = file.read()
+    else:
+        with urlopen(url) as response:
+            data = response.read()
+
+    if data[:2] == _gzip_magic:
+        data = gzip.decompress(data)
+
+    return data
+
+
+def parse_mod_rsd(mod_rsd: pd.Series) -> pd.DataFrame:
+    """Split a whole ``MOD_RSD`` column into its parts in one pass.
+
+    :param mod_rsd: A column of modification strings like ``S15-p``
+    :return: A data frame with the same index and the columns ``residue``, ``position``, and ``code``. Entries that
+     do not match :data:`MOD_RSD_PATTERN` have missing values in all three.
+
+    >>> parse_mod_rsd(pd.Series(['S15-p', 'K120-ub'])).values.tolist()
+    [['S', 15, 'p'], ['K', 120, 'ub']]
+    """
+    rv = mod_rsd.astype(str).str.strip().str.extract(MOD_RSD_PATTERN)
+    rv['residue'] = rv['residue'].str.upper().astype('category')
+    rv['position'] = pd.to_numeric(rv['position']).astype('Int64')
+    rv['code'] = rv['code'].astype('category')
+    return rv
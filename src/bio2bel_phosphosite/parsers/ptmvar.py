@@ -51,10 +51,11 @@ CLASS II (flanking change)	variant +/- 5 AAs from the modification site
 """
 
 import zipfile
-
-import pandas as pd
+from functools import partial
 
 from bio2bel import make_downloader
+from .cache import get_cached_df, get_usecols_variant
+from .xlsx import read_xlsx_sheet
 from ..constants import PTMVAR_PATH, PTMVAR_URL
 
 __all__ = [
@@ -75,26 +76,39 @@ _map_mod_types = {
 download_ptmvar = make_downloader(PTMVAR_URL, PTMVAR_PATH)
 
 
-def get_ptmvar_df(url=None, cache=True, force_download=False):
+def get_ptmvar_df(url=None, cache=True, force_download=False, usecols=None):
     """Gets the PTMVar excel sheet
 
     :param Optional[str] url: The URL (or file path) to download.
     :param bool cache: If true, the data is downloaded to the file system, else it is loaded from the internet
     :param bool force_download: If true, overwrites a previously cached file
+    :param Optional[list[str]] usecols: If given, only these columns are read
     :rtype: pandas.DataFrame
     """
     if url is None and cache:
         url = download_ptmvar(force_download=force_download)
 
-    with zipfile.ZipFile(url) as zf:
+    return get_cached_df(
+        url,
+        get_usecols_variant(usecols),
+        partial(_read_ptmvar, url, usecols=usecols),
+        force=force_download,
+    )
+
+
+def _read_ptmvar(path, usecols=None):
+    """Stream the data sheet of the PTMVar workbook from the zip archive."""
+    with zipfile.ZipFile(path) as zf:
         with zf.open('PTMVar.xlsx') as f:
-            rv = pd.read_excel(
+            rv = read_xlsx_sheet(
                 f,
-                sheet_name=1,
+                sheet_index=1,
                 skiprows=6,
+                usecols=usecols,
             )
 
-    # remove weird forward quote
-    rv['VAR_POSITION'] = rv['VAR_POSITION'].apply(lambda x: x.strip("'"))
+    if 'VAR_POSITION' in rv.columns:
+        # remove weird forward quote
+        rv['VAR_POSITION'] = rv['VAR_POSITION'].str.strip("'")
 
     return rv
@@ -1,30 +1,115 @@
 # -*- coding: utf-8 -*-
 
+from functools import partial
+from typing import Iterable
+
 import pandas as pd
 
 from bio2bel import make_downloader
+from .cache import get_cached_df, get_usecols_variant, iter_cached_chunks
 from ..constants import REGULATORY_SITES_PATH, REGULATORY_SITES_URL
 
 __all__ = [
-    'download_regulatory_sites'
+    'download_regulatory_sites',
+    'get_regulatory_sites_df',
+    'parse_regulatory_effects',
+    'read_regulatory_sites_chunks',
+    'REGULATORY_SITES_USECOLS',
+]
+
+#: The columns of the regulatory sites file that are loaded into the database
+REGULATORY_SITES_USECOLS = [
+    'GENE', 'PROTEIN', 'ACC_ID', 'ORGANISM', 'MOD_RSD', 'DOMAIN', 'ON_FUNCTION', 'ON_PROCESS', 'ON_PROT_INTERACT',
+    'ON_OTHER_INTERACT', 'PMIDs', 'NOTES',
 ]
 
 download_regulatory_sites = make_downloader(REGULATORY_SITES_URL, REGULATORY_SITES_PATH)
 
 
-def get_regulatory_sites_df(url=None, cache=True, force_download=False):
-    """Gets the modifications site flat file
+def read_regulatory_sites_chunks(path_or_buffer, chunksize: int, usecols=None) -> Iterable[pd.DataFrame]:
+    """Stream a regulatory sites flat file as chunks of text columns.
+
+    :param path_or_buffer: A path, URL, or file-like object to pass to :func:`pandas.read_csv`
+    :param chunksize: The number of rows per chunk
+    :param Optional[list[str]] usecols: The columns to load. Defaults to :data:`REGULATORY_SITES_USECOLS`.
+    """
+    usecols = usecols or REGULATORY_SITES_USECOLS
+    with pd.read_csv(
+        path_or_buffer,
+        skiprows=2,
+        sep='\t',
+        usecols=usecols,
+        dtype={column: 'category' if column == 'ORGANISM' else str for column in usecols},
+        chunksize=chunksize,
+    ) as reader:
+        yield from reader
+
+
+def get_regulatory_sites_df(url=None, cache=True, force_download=False, chunksize=None, usecols=None):
+    """Get the regulatory sites flat file.
 
     :param Optional[str] url: The URL (or file path) to download.
     :param bool cache: If true, the data is downloaded to the file system, else it is loaded from the internet
     :param bool force_download: If true, overwrites a previously cached file
-    :rtype: pandas.DataFrame
+    :param Optional[int] chunksize: If given, streams chunks of this many rows instead of loading the whole file. See
+     :func:`read_regulatory_sites_chunks`.
+    :param Optional[list[str]] usecols: If given, only loads these columns
+    :rtype: pandas.DataFrame or iter[pandas.DataFrame]
     """
     if url is None and cache:
         url = download_regulatory_sites(force_download=force_download)
 
-    return pd.read_csv(
-        url or REGULATORY_SITES_URL,
+    url = url or REGULATORY_SITES_URL
+
+    if chunksize is not None:
+        return iter_cached_chunks(
+            url,
+            get_usecols_variant(usecols, prefix='sites'),
+            partial(read_regulatory_sites_chunks, url, chunksize=chunksize, usecols=usecols),
+            columns=usecols or REGULATORY_SITES_USECOLS,
+            chunksize=chunksize,
+            categories=['ORGANISM'],
+            force=force_download,
+        )
+
+    read = partial(
+        pd.read_csv,
+        url,
         skiprows=2,
-        sep='\t'
+        sep='\t',
+        usecols=usecols,
+        dtype={'ORGANISM': 'category', 'PMIDs': str},
     )
+    return get_cached_df(url, get_usecols_variant(usecols), read, force=force_download)
+
+
+def parse_regulatory_effects(series: pd.Series) -> pd.DataFrame:
+    """Split a column of effects like ``ON_FUNCTION`` or ``ON_PROCESS`` into one row per effect.
+
+    Each cell lists effects separated by semicolons, where each effect is a name optionally followed by a comma and
+    the direction it's affected in.
+
+    >>> series = pd.Series(['apoptosis, inhibited; cell growth, induced', None, 'protein conformation'])
+    >>> parse_regulatory_effects(series)
+                       name  direction
+    0             apoptosis  inhibited
+    0           cell growth    induced
+    2  protein conformation       None
+
+    :return: A data frame with the ``name`` and ``direction`` of each effect, indexed by the position of its row in
+     the original series
+    """
+    effects = series.dropna().astype(str).str.split(';').explode().str.strip()
+    effects = effects[effects.notna() & (effects != '')]
+
+    parts = effects.str.rsplit(',', n=1, expand=True)
+    if parts.empty:
+        return pd.DataFrame({'name': pd.Series(dtype=object), 'direction': pd.Series(dtype=object)})
+
+    rv = pd.DataFrame({'name': parts[0].str.strip()})
+    if 1 in parts.columns:
+        direction = parts[1].str.strip()
+        rv['direction'] = direction.where(direction.notna() & (direction != ''), None)
+    else:
+        rv['direction'] = None
+    return rv
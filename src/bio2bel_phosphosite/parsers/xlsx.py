@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+"""A minimal streaming reader for the worksheets of Office Open XML (``.xlsx``) workbooks.
+
+Unlike :func:`pandas.read_excel`, only the requested worksheet is parsed, it is parsed incrementally with
+:func:`xml.etree.ElementTree.iterparse`, and the cells of columns that aren't requested are skipped.
+"""
+
+import posixpath
+import zipfile
+from typing import BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from xml.etree.ElementTree import iterparse
+
+import pandas as pd
+
+__all__ = [
+    'iter_xlsx_rows',
+    'read_xlsx_sheet',
+]
+
+_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_RELATIONSHIP = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_RELATIONSHIP = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_digits = '0123456789'
+
+
+def _column_index(letters: str) -> int:
+    """Convert column letters to a zero-based index, like ``AB`` to 27."""
+    rv = 0
+    for letter in letters:
+        rv = rv * 26 + ord(letter) - ord('A') + 1
+    return rv - 1
+
+
+def _get_sheet_path(archive: zipfile.ZipFile, sheet_index: int) -> str:
+    """Get the path of the worksheet at the given position in the workbook."""
+    with archive.open('xl/_rels/workbook.xml.rels') as file:
+        targets = {
+            element.get('Id'): element.get('Target')
+            for _, element in iterparse(file)
+            if element.tag == f'{_PACKAGE_RELATIONSHIP}Relationship'
+        }
+
+    with archive.open('xl/workbook.xml') as file:
+        relationship_ids = [
+            element.get(f'{_RELATIONSHIP}id')
+            for _, element in iterparse(file)
+            if element.tag == f'{_MAIN}sheet'
+        ]
+
+    target = targets[relationship_ids[sheet_index]]
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join('xl', target))
+
+
+def _read_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    """Read the table of strings that cells refer to by index."""
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+
+    rv = []
+    with archive.open('xl/sharedStrings.xml') as file:
+        for _, element in iterparse(file):
+            if element.tag == f'{_MAIN}si':
+                # rich text is split over several runs
+                rv.append(''.join(t.text or '' for t in element.iter(f'{_MAIN}t')))
+                element.clear()
+    return rv
+
+
+def _parse_number(text: str) -> Union[int, float]:
+    """Parse a numeric cell, keeping integers as integers like :mod:`openpyxl` does."""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _decode_cell(cell, shared_strings: Sequence[str]) -> Optional[object]:
+    """Get the value of a cell element from its type, or none if the cell is empty.
+
+    :param cell: A ``c`` element of a worksheet
+    :param shared_strings: The table of strings from :func:`_read_shared_strings`
+    """
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter(f'{_MAIN}t'))
+
+    value = cell.find(f'{_MAIN}v')
+    if value is None or value.text is None:
+        return
+    if cell_type == 's':
+        return shared_strings[int(value.text)]
+    if cell_type == 'n':
+        return _parse_number(value.text)
+    if cell_type == 'b':
+        return value.text == '1'
+    # formula strings, errors, and dates in ISO 8601 are kept as text
+    return value.text
+
+
+def iter_xlsx_rows(file: Union[str, BinaryIO],
+                   sheet_index: int = 0,
+                   columns: Optional[Iterable[int]] = None,
+                   ) -> Iterable[Tuple[int, Dict[int, object]]]:
+    """Stream the rows of a worksheet.
+
+    :param file: A path to a workbook or a file-like object containing one
+    :param sheet_index: The zero-based position of the worksheet in the workbook
+    :param columns: If given, only the zero-based indexes of the columns whose values are returned
+    :return: An iterable of pairs of the one-based row number and a dictionary from zero-based column indexes to the
+     values of the non-empty cells in that row
+    """
+    columns = None if columns is None else set(columns)
+    letters_to_column = {}
+    row_number = 0
+
+    with zipfile.ZipFile(file) as archive:
+        shared_strings = _read_shared_strings(archive)
+
+        with archive.open(_get_sheet_path(archive, sheet_index)) as sheet:
+            for _, element in iterparse(sheet):
+                if element.tag != f'{_MAIN}row':
+                    continue
+
+                # the references are optional, in which case the rows and cells follow the ones before them
+                reference = element.get('r')
+                row_number = row_number + 1 if reference is None else int(reference)
+
+                values = {}
+                column = -1
+                for cell in element.iter(f'{_MAIN}c'):
+                    reference = cell.get('r')
+                    if reference is None:
+                        column += 1
+                    else:
+                        letters = reference.rstrip(_digits)
+                        column = letters_to_column.get(letters)
+                        if column is None:
+                            column = letters_to_column[letters] = _column_index(letters)
+                    if columns is not None and column not in columns:
+                        continue
+
+                    value = _decode_cell(cell, shared_strings)
+                    if value is not None:
+                        values[column] = value
+
+                yield row_number, values
+                element.clear()
+
+
+def _deduplicate(names: Sequence[str]) -> List[str]:
+    """Rename duplicate column names like :func:`pandas.read_excel`, so ``VAR``, ``VAR`` becomes ``VAR``, ``VAR.1``."""
+    counts = {}
+    rv = []
+    for name in names:
+        if name in counts:
+            counts[name] += 1
+            rv.append(f'{name}.{counts[name]}')
+        else:
+            counts[name] = 0
+            rv.append(name)
+    return rv
+
+
+def read_xlsx_sheet(file: Union[str, BinaryIO],
+                    sheet_index: int = 0,
+                    skiprows: int = 0,
+                    usecols: Optional[Sequence[str]] = None,
+                    ) -> pd.DataFrame:
+    """Read a worksheet whose header is on the row after ``skiprows`` into a data frame.
+
+    :param file: A path to a workbook or a file-like object containing one
+    :param sheet_index: The zero-based position of the worksheet in the workbook
+    :param skiprows: The number of rows before the header
+    :param usecols: If given, only the columns with these names are read
+    """
+    header_row_number, header = _read_header(file, sheet_index=sheet_index, skiprows=skiprows)
+    names = _deduplicate([str(header[column]) for column in sorted(header)])
+    name_to_column = dict(zip(names, sorted(header)))
+    if usecols is None:
+        usecols = names
+
+    columns = [name_to_column[name] for name in usecols]
+    data = {column: [] for column in columns}
+
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    for row_number, values in iter_xlsx_rows(file, sheet_index=sheet_index, columns=columns):
+        if row_number <= header_row_number:
+            continue
+        for column in columns:
+            data[column].append(values.get(column))
+
+    return pd.DataFrame({
+        name: data[column]
+        for name, column in zip(usecols, columns)
+    })
+
+
+def _read_header(file: Union[str, BinaryIO], sheet_index: int, skiprows: int) -> Tuple[int, Dict[int, object]]:
+    """Read the first non-empty row after ``skiprows``, stopping as soon as it's found."""
+    rows = iter_xlsx_rows(file, sheet_index=sheet_index)
+    try:
+        for row_number, values in rows:
+            if skiprows < row_number and values:
+                return row_number, values
+    finally:
+        rows.close()
+    raise ValueError(f'no rows after the first {skiprows}')
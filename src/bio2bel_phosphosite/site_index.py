@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+
+"""An in-memory index of the positions of modifications and mutations on each protein.
+
+It answers questions like "which modification sites lie within five residues of this variant" without going to the
+database. The sites of each kind are held in arrays sorted by protein then position, where the sort key of a site is
+the protein's number times :data:`POSITION_RANGE` plus its position. A window on one protein is then a contiguous run
+of the keys that's found with two binary searches, and thousands of probes can be answered at once with
+:func:`numpy.searchsorted`.
+
+>>> import pandas as pd
+>>> sites = SiteArray(ModificationSite, pd.DataFrame([
+...     (1, 'P12345', 'S', 10, 'Ph'),
+...     (2, 'P12345', 'T', 15, 'Ph'),
+...     (3, 'Q67890', 'Y', 12, 'Ph'),
+... ], columns=ModificationSite._fields))
+>>> [site.id for site in sites.within('P12345', 12, radius=3)]
+[1, 2]
+>>> sites.nearest('P12345', 14)
+(ModificationSite(id=2, uniprot_id='P12345', residue='T', position=15, modification_type='Ph'), 1)
+"""
+
+from typing import Iterable, NamedTuple, Optional, Tuple, Type, Union
+
+import numpy as np
+import pandas as pd
+
+from .models import Modification, ModificationType, Mutation, Protein
+
+__all__ = [
+    'ModificationSite',
+    'MutationSite',
+    'SiteArray',
+    'SiteIndex',
+]
+
+#: Positions have to be non-negative and less than this to be indexed
+POSITION_RANGE = 2 ** 32
+
+#: Probes are either a data frame with ``uniprot_id`` and ``position`` columns or pairs of them
+Probes = Union[pd.DataFrame, Iterable[Tuple[str, int]]]
+
+
+class ModificationSite(NamedTuple):
+    """A post-translational modification on a protein."""
+
+    id: int
+    uniprot_id: str
+    residue: str
+    position: int
+    modification_type: str
+
+
+class MutationSite(NamedTuple):
+    """An amino acid substitution on a protein."""
+
+    id: int
+    uniprot_id: str
+    from_aa: str
+    position: int
+    to_aa: str
+
+
+def _check_radius(radius: int) -> None:
+    if radius < 0:
+        raise ValueError(f'radius must not be negative, got {radius}')
+
+
+def _get_probe_df(probes: Probes) -> pd.DataFrame:
+    if isinstance(probes, pd.DataFrame):
+        return probes[['uniprot_id', 'position']]
+    return pd.DataFrame(list(probes), columns=['uniprot_id', 'position'])
+
+
+class SiteArray:
+    """The sites of one kind, sorted by protein and position."""
+
+    def __init__(self, site_class: Type[NamedTuple], df: pd.DataFrame):
+        """Index the sites in a data frame.
+
+        :param site_class: The type of the sites, like :class:`ModificationSite`
+        :param df: A data frame with a column for each field of the site class. Rows without a position are skipped.
+        """
+        self.site_class = site_class
+
+        df = df[df.position.notna()]
+        df = df[(0 <= df.position) & (df.position < POSITION_RANGE)]
+        codes, uniprot_ids = pd.factorize(df.uniprot_id, sort=True)
+        self.uniprot_id_to_code = {uniprot_id: code for code, uniprot_id in enumerate(uniprot_ids)}
+
+        keys = codes.astype(np.int64) * POSITION_RANGE + df.position.to_numpy(np.int64)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.columns = [
+            df.position.to_numpy(np.int64)[order] if field == 'position' else df[field].to_numpy()[order]
+            for field in site_class._fields
+        ]
+        self._positions = self.columns[site_class._fields.index('position')]
+
+    def __len__(self) -> int:
+        """Count the sites."""
+        return len(self.keys)
+
+    def _get_sites(self, start: int, stop: int) -> list:
+        return [
+            self.site_class(*values)
+            for values in zip(*(column[start:stop].tolist() for column in self.columns))
+        ]
+
+    def within(self, uniprot_id: str, position: int, radius: int = 0) -> list:
+        """Get the sites on the protein whose positions are at most ``radius`` residues from ``position``.
+
+        :param uniprot_id: The UniProt identifier of the protein
+        :param position: The position on the protein
+        :param radius: The largest distance from the position
+        :return: The sites, ordered by position
+        :raises ValueError: If the radius is negative
+        """
+        _check_radius(radius)
+        code = self.uniprot_id_to_code.get(uniprot_id)
+        if code is None:
+            return []
+
+        base = code * POSITION_RANGE
+        start = self.keys.searchsorted(base + max(position - radius, 0), side='left')
+        stop = self.keys.searchsorted(base + min(position + radius, POSITION_RANGE - 1), side='right')
+        return self._get_sites(start, stop)
+
+    def nearest(self, uniprot_id: str, position: int) -> Optional[Tuple[NamedTuple, int]]:
+        """Get the closest site on the protein to ``position`` and its distance, preferring the earlier one on ties.
+
+        :param uniprot_id: The UniProt identifier of the protein
+        :param position: The position on the protein
+        :return: A pair of the site and its distance, or none if the protein has no sites
+        """
+        code = self.uniprot_id_to_code.get(uniprot_id)
+        if code is None:
+            return
+
+        base = code * POSITION_RANGE
+        index = int(self.keys.searchsorted(base + min(max(position, 0), POSITION_RANGE - 1), side='left'))
+
+        candidates = []
+        if 0 < index and base <= self.keys[index - 1]:
+            candidates.append(index - 1)
+        if index < len(self.keys) and self.keys[index] < base + POSITION_RANGE:
+            candidates.append(index)
+        if not candidates:
+            return
+
+        index = min(candidates, key=lambda i: abs(int(self._positions[i]) - position))
+        return self._get_sites(index, index + 1)[0], abs(int(self._positions[index]) - position)
+
+    def _locate(self, probes: Probes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the sort key base and position of each probe, and whether its protein has sites."""
+        probe_df = _get_probe_df(probes)
+        codes = probe_df.uniprot_id.map(self.uniprot_id_to_code)
+        known = codes.notna().to_numpy()
+        bases = codes.fillna(0).to_numpy(np.int64) * POSITION_RANGE
+        positions = probe_df.position.to_numpy(np.int64)
+        return bases, positions, known
+
+    def _get_site_df(self, probe_indexes: np.ndarray, site_indexes: np.ndarray, distances: np.ndarray) -> pd.DataFrame:
+        rv = pd.DataFrame({'probe': probe_indexes, 'distance': distances})
+        for field, column in zip(self.site_class._fields, self.columns):
+            rv[field] = column[site_indexes]
+        return rv
+
+    def within_batch(self, probes: Probes, radius: int = 0) -> pd.DataFrame:
+        """Get the sites within ``radius`` residues of each of many probes at once.
+
+        :param probes: Pairs of UniProt identifiers and positions, or a data frame with ``uniprot_id`` and
+         ``position`` columns
+        :param radius: The largest distance from each probe's position
+        :return: A data frame with one row per probe and matching site. It has the probe's number in the ``probe``
+         column, the site's position minus the probe's in the ``distance`` column, then the fields of the site.
+        :raises ValueError: If the radius is negative
+        """
+        _check_radius(radius)
+        bases, positions, known = self._locate(probes)
+
+        starts = self.keys.searchsorted(bases + np.clip(positions - radius, 0, POSITION_RANGE - 1), side='left')
+        stops = self.keys.searchsorted(bases + np.clip(positions + radius, 0, POSITION_RANGE - 1), side='right')
+        counts = np.where(known, stops - starts, 0)
+
+        probe_indexes = np.repeat(np.arange(len(counts)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        site_indexes = np.repeat(starts, counts) + offsets
+
+        return self._get_site_df(probe_indexes, site_indexes, self._positions[site_indexes] - positions[probe_indexes])
+
+    def nearest_batch(self, probes: Probes) -> pd.DataFrame:
+        """Get the closest site to each of many probes at once.
+
+        :param probes: Pairs of UniProt identifiers and positions, or a data frame with ``uniprot_id`` and
+         ``position`` columns
+        :return: A data frame like the one from :meth:`within_batch` with one row for each probe whose protein has
+         sites, which is empty if there are no sites at all
+        """
+        bases, positions, known = self._locate(probes)
+        if not len(self.keys):
+            no_indexes = np.array([], dtype=np.int64)
+            return self._get_site_df(no_indexes, no_indexes, no_indexes)
+
+        indexes = self.keys.searchsorted(bases + np.clip(positions, 0, POSITION_RANGE - 1), side='left')
+
+        left = np.clip(indexes - 1, 0, len(self.keys) - 1)
+        right = np.clip(indexes, 0, len(self.keys) - 1)
+        has_left = known & (0 < indexes) & (bases <= self.keys[left])
+        has_right = known & (indexes < len(self.keys)) & (self.keys[right] < bases + POSITION_RANGE)
+
+        left_distances = np.where(has_left, np.abs(self._positions[left] - positions), np.iinfo(np.int64).max)
+        right_distances = np.where(has_right, np.abs(self._positions[right] - positions), np.iinfo(np.int64).max)
+        site_indexes = np.where(left_distances <= right_distances, left, right)
+
+        probe_indexes = np.flatnonzero(has_left | has_right)
+        site_indexes = site_indexes[probe_indexes]
+        return self._get_site_df(probe_indexes, site_indexes, self._positions[site_indexes] - positions[probe_indexes])
+
+
+class SiteIndex:
+    """The modification and mutation sites on each protein."""
+
+    def __init__(self, modifications: SiteArray, mutations: SiteArray):
+        """Build an index from the arrays of sites of each kind."""
+        self.modifications = modifications
+        self.mutations = mutations
+
+    @classmethod
+    def from_session(cls, session) -> 'SiteIndex':
+        """Load all modifications and mutations with a position from the database."""
+        modification_query = (
+            session.query(Modification.id, Protein.uniprot_id, Modification.residue, Modification.position,
+                          ModificationType.name)
+            .select_from(Modification)
+            .join(Protein, Modification.protein_id == Protein.id)
+            .join(ModificationType, Modification.modification_type_id == ModificationType.id)
+            .filter(Modification.position.isnot(None))
+        )
+        mutation_query = (
+            session.query(Mutation.id, Protein.uniprot_id, Mutation.from_aa, Mutation.position, Mutation.to_aa)
+            .select_from(Mutation)
+            .join(Protein, Mutation.protein_id == Protein.id)
+            .filter(Mutation.position.isnot(None))
+        )
+
+        return cls(
+            modifications=SiteArray(
+                ModificationSite,
+                pd.DataFrame(modification_query.all(), columns=ModificationSite._fields),
+            ),
+            mutations=SiteArray(
+                MutationSite,
+                pd.DataFrame(mutation_query.all(), columns=MutationSite._fields),
+            ),
+        )
+
+    def __repr__(self):
+        """Show the number of sites of each kind."""
+        return f'<SiteIndex modifications={len(self.modifications)} mutations={len(self.mutations)}>'
+
+    def modifications_near_mutations(self, radius: int) -> pd.DataFrame:
+        """Pair each mutation with the modifications within ``radius`` residues of it, like PTMVar does.
+
+        :return: A data frame with the ``mutation_id``, the ``modification_id``, and the ``distance`` from the
+         mutation to the modification
+        """
+        columns = self.mutations.site_class._fields
+        mutation_df = pd.DataFrame(dict(zip(columns, self.mutations.columns)))
+        rv = self.modifications.within_batch(mutation_df, radius=radius)
+        return pd.DataFrame(dict(
+            mutation_id=mutation_df.id.to_numpy()[rv.probe.to_numpy()],
+            modification_id=rv.id.to_numpy(),
+            distance=rv.distance.to_numpy(),
+        ))
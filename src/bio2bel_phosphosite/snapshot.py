@@ -0,0 +1,467 @@
+# -*- coding: utf-8 -*-
+
+"""A compact, read-only snapshot of the database that's memory-mapped instead of queried.
+
+Analyses that only read PhosphoSitePlus don't need an ORM instance and a session for every protein and site. A
+snapshot keeps the same data in a few flat arrays:
+
+- the UniProt identifiers of the proteins, sorted and stored once each as fixed-width bytes, so a protein is found
+  with a binary search and the other arrays refer to it by its number
+- the position of each modification and mutation as a 32-bit integer, and its residues and modification type as
+  8-bit codes into small vocabularies
+- per-protein offsets into the site arrays, like a compressed sparse row matrix, so the sites of a protein are the
+  slice between two offsets, sorted by position
+
+The file starts with a JSON header that has the vocabularies, the :mod:`bio2bel_phosphosite.statistics`, and where
+each array is, and every array starts at an aligned offset. :meth:`Snapshot.load` maps the file instead of reading it,
+so loading takes milliseconds no matter how big it is, and processes that load the same file share its pages.
+
+Example usage:
+
+.. code-block:: python
+
+    manager = Manager()
+    manager.write_snapshot('phosphosite.snapshot')
+
+    snapshot = Snapshot.load('phosphosite.snapshot')
+    snapshot.summarize()
+    snapshot.get_modifications('P31749')
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .models import Modification, ModificationType, Mutation, Protein, Species
+from .site_index import ModificationSite, MutationSite, SiteArray, SiteIndex
+from .statistics import Statistics, compute_statistics
+
+__all__ = [
+    'SNAPSHOT_VERSION',
+    'ProteinRecord',
+    'Snapshot',
+    'write_snapshot',
+]
+
+log = logging.getLogger(__name__)
+
+#: The first bytes of a snapshot file
+SNAPSHOT_MAGIC = b'PSPSNAP\x00'
+
+#: The version of the snapshot format. Snapshots of other versions can't be loaded.
+SNAPSHOT_VERSION = 1
+
+#: Every array starts at a multiple of this many bytes from the start of the file
+_ALIGNMENT = 64
+
+#: The code of a missing residue, amino acid, or species
+MISSING_CODE = 255
+
+#: The position of a site that has none
+MISSING_POSITION = -1
+
+
+class ProteinRecord(NamedTuple):
+    """A protein in a snapshot."""
+
+    uniprot_id: str
+    gene_name: Optional[str]
+    species: Optional[str]
+
+
+def _encode(values: pd.Series) -> Tuple[np.ndarray, List[str]]:
+    """Replace the values with 8-bit codes into a sorted vocabulary. Missing values get :data:`MISSING_CODE`."""
+    codes, vocabulary = pd.factorize(values, sort=True)
+    if MISSING_CODE <= len(vocabulary):
+        raise ValueError(f'too many distinct values for 8-bit codes: {len(vocabulary)}')
+    return np.where(codes < 0, MISSING_CODE, codes).astype(np.uint8), vocabulary.tolist()
+
+
+def _encode_strings(values: Iterable[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate strings as UTF-8, with the offset of each one. Missing strings are empty."""
+    encoded = [(value or '').encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _get_offsets(protein_indexes: np.ndarray, n_proteins: int) -> np.ndarray:
+    """Get where the sites of each protein start in sorted site arrays, with the total at the end."""
+    offsets = np.zeros(n_proteins + 1, dtype=np.int64)
+    np.cumsum(np.bincount(protein_indexes, minlength=n_proteins), out=offsets[1:])
+    return offsets
+
+
+def _get_positions(positions: pd.Series) -> np.ndarray:
+    return positions.fillna(MISSING_POSITION).to_numpy(np.int64).astype(np.int32)
+
+
+def _decode_array(vocabulary: List[str], codes: np.ndarray) -> np.ndarray:
+    """Replace 8-bit codes with their values in the vocabulary, and :data:`MISSING_CODE` with none."""
+    values = np.full(MISSING_CODE + 1, None, dtype=object)
+    values[:len(vocabulary)] = vocabulary
+    return values[codes]
+
+
+def _get_arrays(session) -> Tuple[Mapping[str, np.ndarray], Mapping[str, List[str]]]:
+    """Read the proteins, modifications, and mutations from the database into arrays and their vocabularies."""
+    protein_df = pd.DataFrame(
+        session.query(Protein.id, Protein.uniprot_id, Protein.gene_name, Species.name)
+        .outerjoin(Species, Protein.species_id == Species.id)
+        .all(),
+        columns=['id', 'uniprot_id', 'gene_name', 'species'],
+    ).sort_values('uniprot_id', ignore_index=True)
+    protein_index = pd.Index(protein_df.id)
+
+    modification_df = pd.DataFrame(
+        session.query(Modification.protein_id, Modification.residue, Modification.position, ModificationType.name)
+        .join(ModificationType, Modification.modification_type_id == ModificationType.id)
+        .all(),
+        columns=['protein_id', 'residue', 'position', 'modification_type'],
+    )
+    mutation_df = pd.DataFrame(
+        session.query(Mutation.protein_id, Mutation.from_aa, Mutation.position, Mutation.to_aa).all(),
+        columns=['protein_id', 'from_aa', 'position', 'to_aa'],
+    )
+
+    species_codes, species = _encode(protein_df.species)
+    gene_name_bytes, gene_name_offsets = _encode_strings(protein_df.gene_name)
+    arrays = dict(
+        uniprot_ids=protein_df.uniprot_id.to_numpy(dtype=np.bytes_),
+        protein_species=species_codes,
+        gene_name_bytes=gene_name_bytes,
+        gene_name_offsets=gene_name_offsets,
+    )
+
+    modification_df['protein'] = protein_index.get_indexer(modification_df.protein_id)
+    residue_codes, residues = _encode(modification_df.residue)
+    modification_type_codes, modification_types = _encode(modification_df.modification_type)
+    modification_df = modification_df.assign(
+        residue=residue_codes,
+        position=_get_positions(modification_df.position),
+        modification_type=modification_type_codes,
+    )
+    modification_df = modification_df.sort_values(['protein', 'position', 'modification_type', 'residue'])
+    arrays.update(
+        modification_offsets=_get_offsets(modification_df.protein.to_numpy(), len(protein_df.index)),
+        modification_positions=modification_df.position.to_numpy(np.int32),
+        modification_residues=modification_df.residue.to_numpy(np.uint8),
+        modification_types=modification_df.modification_type.to_numpy(np.uint8),
+    )
+
+    # both ends of a substitution share a vocabulary, so it's the amino acids
+    mutation_df['protein'] = protein_index.get_indexer(mutation_df.protein_id)
+    amino_acid_codes, amino_acids = _encode(pd.concat([mutation_df.from_aa, mutation_df.to_aa], ignore_index=True))
+    mutation_df = mutation_df.assign(
+        from_aa=amino_acid_codes[:len(mutation_df.index)],
+        position=_get_positions(mutation_df.position),
+        to_aa=amino_acid_codes[len(mutation_df.index):],
+    )
+    mutation_df = mutation_df.sort_values(['protein', 'position', 'from_aa', 'to_aa'])
+    arrays.update(
+        mutation_offsets=_get_offsets(mutation_df.protein.to_numpy(), len(protein_df.index)),
+        mutation_positions=mutation_df.position.to_numpy(np.int32),
+        mutation_from_aa=mutation_df.from_aa.to_numpy(np.uint8),
+        mutation_to_aa=mutation_df.to_aa.to_numpy(np.uint8),
+    )
+
+    vocabularies = dict(
+        species=species,
+        residues=residues,
+        modification_types=modification_types,
+        amino_acids=amino_acids,
+    )
+    return arrays, vocabularies
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def write_snapshot(manager, path: str) -> int:
+    """Write a snapshot of the database.
+
+    The snapshot is written next to the path and then moved over it, so processes that have the old snapshot mapped
+    keep reading the old one.
+
+    :param manager: A populated manager
+    :param path: The path of the snapshot file
+    :return: The size of the snapshot in bytes
+    """
+    t = time.time()
+    arrays, vocabularies = _get_arrays(manager.session)
+
+    header = dict(
+        version=SNAPSHOT_VERSION,
+        vocabularies=vocabularies,
+        statistics=compute_statistics(manager.session),
+        arrays={},
+    )
+    # the offsets are relative to the end of the header, so they don't depend on its length
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        header['arrays'][name] = dict(dtype=array.dtype.str, shape=list(array.shape), offset=offset)
+        offset = _align(offset + array.nbytes)
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(len(SNAPSHOT_MAGIC) + 8 + len(header_bytes))
+
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(SNAPSHOT_MAGIC)
+        file.write(len(header_bytes).to_bytes(8, 'little'))
+        file.write(header_bytes)
+        for name, array in arrays.items():
+            file.seek(data_start + header['arrays'][name]['offset'])
+            file.write(array.tobytes())
+        size = file.tell()
+    os.replace(temporary_path, path)
+
+    log.info('done writing a %.1f MB snapshot to %s in %.2f seconds', size / 2 ** 20, path, time.time() - t)
+    return size
+
+
+class Snapshot:
+    """A read-only snapshot of the database, answering the same questions as the manager without a session."""
+
+    def __init__(self, header: Mapping[str, Any], arrays: Mapping[str, np.ndarray]):
+        """Build from a snapshot's header and arrays. Use :meth:`load` to read a file."""
+        self.header = header
+        self.statistics = Statistics(tuple(row) for row in header['statistics'])
+
+        vocabularies = header['vocabularies']
+        self._species = vocabularies['species']
+        self._residues = vocabularies['residues']
+        self._modification_types = vocabularies['modification_types']
+        self._amino_acids = vocabularies['amino_acids']
+
+        self.uniprot_ids = arrays['uniprot_ids']
+        self._protein_species = arrays['protein_species']
+        self._gene_name_bytes = arrays['gene_name_bytes']
+        self._gene_name_offsets = arrays['gene_name_offsets']
+
+        self.modification_offsets = arrays['modification_offsets']
+        self.modification_positions = arrays['modification_positions']
+        self.modification_residues = arrays['modification_residues']
+        self.modification_types = arrays['modification_types']
+
+        self.mutation_offsets = arrays['mutation_offsets']
+        self.mutation_positions = arrays['mutation_positions']
+        self.mutation_from_aa = arrays['mutation_from_aa']
+        self.mutation_to_aa = arrays['mutation_to_aa']
+
+        self._site_index = None
+
+    @classmethod
+    def load(cls, path: str) -> 'Snapshot':
+        """Map a snapshot file into memory. Nothing is read until it's used."""
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(buffer[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+            raise ValueError(f'not a snapshot: {path}')
+
+        header_start = len(SNAPSHOT_MAGIC) + 8
+        header_length = int.from_bytes(bytes(buffer[len(SNAPSHOT_MAGIC):header_start]), 'little')
+        header = json.loads(bytes(buffer[header_start:header_start + header_length]))
+        if header['version'] != SNAPSHOT_VERSION:
+            raise ValueError(f'snapshot version {header["version"]} is not supported: {path}')
+
+        data_start = _align(header_start + header_length)
+        arrays = {}
+        for name, info in header['arrays'].items():
+            dtype = np.dtype(info['dtype'])
+            start = data_start + info['offset']
+            size = int(np.prod(info['shape'], dtype=np.int64)) * dtype.itemsize
+            arrays[name] = buffer[start:start + size].view(dtype).reshape(info['shape'])
+
+        return cls(header, arrays)
+
+    def __repr__(self):
+        """Show the number of proteins and modifications in the snapshot."""
+        return f'<Snapshot proteins={len(self.uniprot_ids)} modifications={len(self.modification_positions)}>'
+
+    def _get_protein_index(self, uniprot_id: str) -> Optional[int]:
+        key = uniprot_id.encode('utf-8')
+        index = int(self.uniprot_ids.searchsorted(key))
+        if index < len(self.uniprot_ids) and self.uniprot_ids[index] == key:
+            return index
+
+    def _decode(self, vocabulary: List[str], code: int) -> Optional[str]:
+        return None if code == MISSING_CODE else vocabulary[code]
+
+    def _get_position(self, positions: np.ndarray, index: int) -> Optional[int]:
+        position = int(positions[index])
+        return None if position == MISSING_POSITION else position
+
+    def is_populated(self) -> bool:
+        """Check if the snapshot has any modifications."""
+        return 0 < self.count_modifications()
+
+    def get_protein_by_uniprot_id(self, uniprot_id: str) -> Optional[ProteinRecord]:
+        """Get a protein by its UniProt identifier."""
+        index = self._get_protein_index(uniprot_id)
+        if index is None:
+            return
+
+        start, stop = self._gene_name_offsets[index:index + 2]
+        gene_name = bytes(self._gene_name_bytes[start:stop]).decode('utf-8') or None
+        return ProteinRecord(uniprot_id, gene_name, self._decode(self._species, self._protein_species[index]))
+
+    def _get_modification_site(self, uniprot_id: str, index: int) -> ModificationSite:
+        return ModificationSite(
+            index,
+            uniprot_id,
+            self._decode(self._residues, self.modification_residues[index]),
+            self._get_position(self.modification_positions, index),
+            self._modification_types[self.modification_types[index]],
+        )
+
+    def _get_mutation_site(self, uniprot_id: str, index: int) -> MutationSite:
+        return MutationSite(
+            index,
+            uniprot_id,
+            self._decode(self._amino_acids, self.mutation_from_aa[index]),
+            self._get_position(self.mutation_positions, index),
+            self._decode(self._amino_acids, self.mutation_to_aa[index]),
+        )
+
+    def _get_range(self, offsets: np.ndarray, uniprot_id: str) -> range:
+        index = self._get_protein_index(uniprot_id)
+        if index is None:
+            return range(0)
+        return range(int(offsets[index]), int(offsets[index + 1]))
+
+    def get_modifications(self, uniprot_id: str) -> List[ModificationSite]:
+        """Get the modifications of a protein, sorted by position. Their identifiers are their numbers in the snapshot.
+
+        :param uniprot_id: The UniProt identifier of the protein
+        """
+        return [
+            self._get_modification_site(uniprot_id, index)
+            for index in self._get_range(self.modification_offsets, uniprot_id)
+        ]
+
+    def get_mutations(self, uniprot_id: str) -> List[MutationSite]:
+        """Get the mutations of a protein, sorted by position. Their identifiers are their numbers in the snapshot.
+
+        :param uniprot_id: The UniProt identifier of the protein
+        """
+        return [
+            self._get_mutation_site(uniprot_id, index)
+            for index in self._get_range(self.mutation_offsets, uniprot_id)
+        ]
+
+    def _find(self, offsets: np.ndarray, positions: np.ndarray, uniprot_id: str, position: int) -> range:
+        """Get the sites of the protein at the position with two binary searches in its slice."""
+        sites = self._get_range(offsets, uniprot_id)
+        start = sites.start + int(positions[sites.start:sites.stop].searchsorted(position, side='left'))
+        stop = sites.start + int(positions[sites.start:sites.stop].searchsorted(position, side='right'))
+        return range(start, stop)
+
+    def get_modification(self,
+                         uniprot_id: str,
+                         residue: str,
+                         position: int,
+                         modification_type: str,
+                         ) -> Optional[ModificationSite]:
+        """Get a modification by its protein, residue, position, and type."""
+        for index in self._find(self.modification_offsets, self.modification_positions, uniprot_id, position):
+            site = self._get_modification_site(uniprot_id, index)
+            if site.residue == residue and site.modification_type == modification_type:
+                return site
+
+    def get_mutation(self, uniprot_id: str, from_aa: str, position: int, to_aa: str) -> Optional[MutationSite]:
+        """Get a mutation by its protein, position, and amino acids."""
+        for index in self._find(self.mutation_offsets, self.mutation_positions, uniprot_id, position):
+            site = self._get_mutation_site(uniprot_id, index)
+            if site.from_aa == from_aa and site.to_aa == to_aa:
+                return site
+
+    def _get_site_df(self, offsets: np.ndarray, fields: Mapping[str, Any]) -> pd.DataFrame:
+        counts = np.diff(offsets)
+        return pd.DataFrame(dict(
+            id=np.arange(offsets[-1]),
+            uniprot_id=np.repeat(self.uniprot_ids.astype(str), counts),
+            **fields,
+        ))
+
+    @property
+    def site_index(self) -> SiteIndex:
+        """Get an index of the sites in the snapshot, like :attr:`bio2bel_phosphosite.Manager.site_index`.
+
+        It's built on first use. The identifiers of the sites are their numbers in the snapshot.
+        """
+        if self._site_index is not None:
+            return self._site_index
+
+        self._site_index = SiteIndex(
+            modifications=SiteArray(ModificationSite, self._get_site_df(self.modification_offsets, dict(
+                residue=_decode_array(self._residues, self.modification_residues),
+                position=np.where(self.modification_positions == MISSING_POSITION, np.nan, self.modification_positions),
+                modification_type=_decode_array(self._modification_types, self.modification_types),
+            ))),
+            mutations=SiteArray(MutationSite, self._get_site_df(self.mutation_offsets, dict(
+                from_aa=_decode_array(self._amino_acids, self.mutation_from_aa),
+                position=np.where(self.mutation_positions == MISSING_POSITION, np.nan, self.mutation_positions),
+                to_aa=_decode_array(self._amino_acids, self.mutation_to_aa),
+            ))),
+        )
+        return self._site_index
+
+    def count_residues(self) -> Mapping[str, int]:
+        """Count the frequency of modification on each residue type."""
+        return self.statistics.count_residues()
+
+    def count_modification_types(self) -> Mapping[str, int]:
+        """Count the number of each modification type."""
+        return self.statistics.count_modification_types()
+
+    def count_proteins(self) -> int:
+        """Count the proteins."""
+        return self.statistics.count('proteins')
+
+    def count_proteins_by_species(self) -> Mapping[str, int]:
+        """Count the number of proteins of each species."""
+        return self.statistics.count_proteins_by_species()
+
+    def count_species(self) -> int:
+        """Count the species."""
+        return self.statistics.count('species')
+
+    def count_modifications(self) -> int:
+        """Count the modifications."""
+        return self.statistics.count('modifications')
+
+    def count_modifications_by_species(self) -> Mapping[str, Mapping[str, int]]:
+        """Count the number of each modification type on the proteins of each species."""
+        return self.statistics.count_modifications_by_species()
+
+    def count_mutations(self) -> int:
+        """Count the mutations."""
+        return self.statistics.count('mutations')
+
+    def count_mutation_effects(self) -> int:
+        """Count the mutation effects."""
+        return self.statistics.count('mutation_effects')
+
+    def count_regulatory_sites(self) -> int:
+        """Count the regulatory sites."""
+        return self.statistics.count('regulatory_sites')
+
+    def count_regulatory_effects(self) -> int:
+        """Count the effects of regulatory sites on functions and processes."""
+        return self.statistics.count('regulatory_effects')
+
+    def count_disease_associations(self) -> int:
+        """Count the disease associations of modifications."""
+        return self.statistics.count('disease_associations')
+
+    def summarize(self) -> Mapping[str, Any]:
+        """Summarize the snapshot like :meth:`bio2bel_phosphosite.Manager.summarize`."""
+        return self.statistics.summarize()
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+"""Counts of what's in the database, kept in a table so summarizing it is one small read.
+
+Counting the modifications by residue and by type means grouping the biggest table, which takes seconds on a whole
+release, so the counts are computed when the database is populated or updated and stored as
+:class:`bio2bel_phosphosite.models.Statistic` rows. The proteins are counted for each species and the modifications
+for each species, modification type, and residue, so the totals and breakdowns all come from the same rows.
+
+>>> statistics = Statistics([
+...     ('modifications', 'human', 'Ph', 'S', 3),
+...     ('modifications', 'human', 'Ac', 'K', 1),
+...     ('modifications', 'mouse', 'Ph', 'T', 2),
+...     ('proteins', 'human', None, None, 2),
+... ])
+>>> statistics.count('modifications')
+6
+>>> statistics.count_residues()
+{'K': 1, 'S': 3, 'T': 2}
+>>> statistics.count_modifications_by_species()
+{'human': {'Ac': 1, 'Ph': 3}, 'mouse': {'Ph': 2}}
+"""
+
+from collections import Counter, defaultdict
+from typing import Any, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func
+
+from .models import (
+    DiseaseAssociation, Modification, ModificationType, Mutation, MutationEffect, Protein, RegulatoryEffect,
+    RegulatorySite, Species, Statistic,
+)
+
+__all__ = [
+    'STATISTIC_NAMES',
+    'Statistics',
+    'compute_statistics',
+    'refresh_statistics',
+]
+
+#: A statistic's name, species, modification type, residue, and count
+StatisticRow = Tuple[str, Optional[str], Optional[str], Optional[str], int]
+
+#: The models whose rows are only counted in total
+_total_models = {
+    'species': Species,
+    'mutations': Mutation,
+    'mutation_effects': MutationEffect,
+    'regulatory_sites': RegulatorySite,
+    'regulatory_effects': RegulatoryEffect,
+    'disease_associations': DiseaseAssociation,
+}
+
+#: The names of all statistics
+STATISTIC_NAMES = ['proteins', 'modifications', *_total_models]
+
+
+def _none_last(key: Optional[str]) -> Tuple[bool, str]:
+    """Sort missing keys, like the species of proteins that have none, after the others."""
+    return key is None, key or ''
+
+
+def _sorted_dict(counts: Mapping[Optional[str], Any]) -> Mapping[Optional[str], Any]:
+    return {
+        key: counts[key]
+        for key in sorted(counts, key=_none_last)
+    }
+
+
+def _count_proteins(session) -> List[StatisticRow]:
+    query = (
+        session.query(Species.name, func.count(Protein.id))
+        .select_from(Protein)
+        .outerjoin(Species, Protein.species_id == Species.id)
+        .group_by(Species.name)
+    )
+    return [
+        ('proteins', species, None, None, count)
+        for species, count in query
+    ]
+
+
+def _count_modifications(session, modification_types: Optional[Iterable[str]] = None) -> List[StatisticRow]:
+    query = (
+        session.query(Species.name, ModificationType.name, Modification.residue, func.count(Modification.id))
+        .select_from(Modification)
+        .join(Protein, Modification.protein_id == Protein.id)
+        .join(ModificationType, Modification.modification_type_id == ModificationType.id)
+        .outerjoin(Species, Protein.species_id == Species.id)
+        .group_by(Species.name, ModificationType.name, Modification.residue)
+    )
+    if modification_types is not None:
+        query = query.filter(ModificationType.name.in_(sorted(modification_types)))
+
+    return [
+        ('modifications', species, modification_type, residue, count)
+        for species, modification_type, residue, count in query
+    ]
+
+
+def compute_statistics(session,
+                       names: Optional[Iterable[str]] = None,
+                       modification_types: Optional[Iterable[str]] = None,
+                       ) -> List[StatisticRow]:
+    """Count the rows in the database.
+
+    :param session: A session on a database
+    :param names: The statistics to count. Defaults to all of them. See :data:`STATISTIC_NAMES`.
+    :param modification_types: If given, only the modifications of these types are counted
+    """
+    rv = []
+    for name in (STATISTIC_NAMES if names is None else names):
+        if name == 'proteins':
+            rv.extend(_count_proteins(session))
+        elif name == 'modifications':
+            rv.extend(_count_modifications(session, modification_types=modification_types))
+        else:
+            rv.append((name, None, None, None, session.query(func.count(_total_models[name].id)).scalar()))
+    return rv
+
+
+def refresh_statistics(session,
+                       names: Optional[Iterable[str]] = None,
+                       modification_types: Optional[Iterable[str]] = None,
+                       ) -> int:
+    """Count the rows in the database again and replace the stored statistics with the new counts, without committing.
+
+    :param session: A session on a database
+    :param names: The statistics to count. Defaults to all of them. See :data:`STATISTIC_NAMES`.
+    :param modification_types: If given, only the counts of the modifications of these types are replaced
+    :return: The number of statistic rows stored
+    """
+    names = STATISTIC_NAMES if names is None else list(names)
+    rows = compute_statistics(session, names=names, modification_types=modification_types)
+
+    for name in names:
+        query = session.query(Statistic).filter(Statistic.name == name)
+        if name == 'modifications' and modification_types is not None:
+            query = query.filter(Statistic.modification_type.in_(sorted(modification_types)))
+        query.delete(synchronize_session=False)
+
+    if rows:
+        session.execute(Statistic.__table__.insert(), [
+            dict(name=name, species=species, modification_type=modification_type, residue=residue, count=count)
+            for name, species, modification_type, residue, count in rows
+        ])
+
+    return len(rows)
+
+
+class Statistics:
+    """The stored counts of what's in the database."""
+
+    def __init__(self, rows: Iterable[StatisticRow]):
+        """Build from the rows of the statistics table.
+
+        :param rows: Tuples of a statistic's name, species, modification type, residue, and count
+        """
+        self.totals = Counter()
+        self.proteins = Counter()
+        self.modifications = Counter()
+
+        for name, species, modification_type, residue, count in rows:
+            self.totals[name] += count
+            if name == 'proteins':
+                self.proteins[species] += count
+            elif name == 'modifications':
+                self.modifications[species, modification_type, residue] += count
+
+    @classmethod
+    def from_session(cls, session) -> 'Statistics':
+        """Read the statistics table."""
+        return cls(session.query(
+            Statistic.name,
+            Statistic.species,
+            Statistic.modification_type,
+            Statistic.residue,
+            Statistic.count,
+        ))
+
+    def is_complete(self) -> bool:
+        """Check if all statistics were counted. The proteins and modifications have no rows when there are none."""
+        return all(name in self.totals for name in _total_models)
+
+    def count(self, name: str) -> int:
+        """Get the total of a statistic, like ``modifications``."""
+        return self.totals[name]
+
+    def _group_modifications(self, get_key) -> Mapping[str, int]:
+        rv = Counter()
+        for key, count in self.modifications.items():
+            rv[get_key(*key)] += count
+        return _sorted_dict(rv)
+
+    def count_residues(self) -> Mapping[str, int]:
+        """Count the modifications on each residue."""
+        return self._group_modifications(lambda species, modification_type, residue: residue)
+
+    def count_modification_types(self) -> Mapping[str, int]:
+        """Count the modifications of each type."""
+        return self._group_modifications(lambda species, modification_type, residue: modification_type)
+
+    def count_proteins_by_species(self) -> Mapping[str, int]:
+        """Count the proteins of each species."""
+        return _sorted_dict(self.proteins)
+
+    def count_modifications_by_species(self) -> Mapping[str, Mapping[str, int]]:
+        """Count the modifications of each type on the proteins of each species."""
+        rv = defaultdict(Counter)
+        for (species, modification_type, _), count in self.modifications.items():
+            rv[species][modification_type] += count
+
+        return _sorted_dict({
+            species: _sorted_dict(counts)
+            for species, counts in rv.items()
+        })
+
+    def summarize(self) -> Mapping[str, Any]:
+        """Summarize the database like :meth:`bio2bel_phosphosite.Manager.summarize`."""
+        return dict(
+            proteins=self.count('proteins'),
+            species=self.count('species'),
+            modifications=self.count('modifications'),
+            residues=self.count_residues(),
+            modification_types=self.count_modification_types(),
+            mutations=self.count('mutations'),
+            mutation_effects=self.count('mutation_effects'),
+            regulatory_sites=self.count('regulatory_sites'),
+            regulatory_effects=self.count('regulatory_effects'),
+            disease_associations=self.count('disease_associations'),
+            proteins_by_species=self.count_proteins_by_species(),
+            modifications_by_species=self.count_modifications_by_species(),
+        )
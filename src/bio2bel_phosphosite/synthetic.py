@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+
+"""Generators for synthetic files that have the same layout as the PhosphoSitePlus downloads.
+
+They are used for benchmarking and for exercising the loaders without network access.
+"""
+
+import gzip
+import io
+import os
+import random
+import zipfile
+from typing import Iterable, Mapping
+from xml.sax.saxutils import escape
+
+__all__ = [
+    'MODIFICATION_SITE_DATASET_CODES',
+    'MODIFICATION_SITE_COLUMNS',
+    'PTMVAR_COLUMNS',
+    'REGULATORY_SITES_COLUMNS',
+    'DISEASE_ASSOCIATED_SITES_COLUMNS',
+    'write_modification_site_file',
+    'write_ptmvar_file',
+    'write_regulatory_sites_file',
+    'write_disease_associated_sites_file',
+    'write_synthetic_release',
+]
+
+#: The modification code used in the synthetic file for each modification site data set
+MODIFICATION_SITE_DATASET_CODES = {
+    'phosphorylation': 'p',
+    'acetylation': 'ac',
+    'sumoylation': 'sm',
+    'ubiquitination': 'ub',
+    'o_galnac': 'ga',
+    'o_glcnac': 'gl',
+}
+
+#: The header of the PhosphoSitePlus modification site data sets
+MODIFICATION_SITE_COLUMNS = [
+    'GENE', 'PROTEIN', 'ACC_ID', 'HU_CHR_LOC', 'MOD_RSD', 'SITE_GRP_ID', 'ORGANISM', 'MW_kD', 'DOMAIN',
+    'SITE_+/-7_AA', 'LT_LIT', 'MS_LIT', 'MS_CST', 'CST_CAT#',
+]
+
+#: The residues that can carry each modification code
+_code_to_residues = {
+    'p': 'STY',
+    'ac': 'K',
+    'sm': 'K',
+    'ub': 'K',
+    'ga': 'ST',
+    'gl': 'ST',
+}
+
+#: The header of the data sheet in the PTMVar workbook
+PTMVAR_COLUMNS = [
+    'GENE', 'UPID', 'CHR_LOC', 'VAR', 'dbSNP', 'AA_CHANGE', 'WT_AA', 'MUT_RSD#', 'VAR_AA', 'VAR_TYPE', 'DISEASE(S)',
+    'MUT_SOURCE', 'PROTEIN', 'ACC_ID', 'MOD_RSD', 'MOD_AA', 'CONSERVATION', 'MOD_TYPE', 'SITE_GRP_ID',
+    'MOD-SITE_SEQ', 'VAR_POSITION', 'VAR_SITE_SEQ', 'VAR_CLASS', 'LTP_LIT', 'MS2_LIT', 'CST_CS',
+]
+
+#: The residues that can carry each modification type in PTMVar
+_ptmvar_type_to_residues = {
+    'Phosphorylation': 'STY',
+    'Acetylation': 'K',
+    'Ubiquitylation': 'K',
+    'Sumoylation': 'K',
+    'Methylation': 'KR',
+}
+
+#: The header of the PhosphoSitePlus regulatory sites data set
+REGULATORY_SITES_COLUMNS = [
+    'GENE', 'PROTEIN', 'PROT_TYPE', 'ACC_ID', 'GENE_ID', 'HU_CHR_LOC', 'ORGANISM', 'MOD_RSD', 'SITE_GRP_ID',
+    'SITE_+/-7_AA', 'DOMAIN', 'ON_FUNCTION', 'ON_PROCESS', 'ON_PROT_INTERACT', 'ON_OTHER_INTERACT', 'PMIDs',
+    'LT_LIT', 'MS_LIT', 'MS_CST', 'NOTES',
+]
+
+#: The header of the PhosphoSitePlus disease-associated sites data set
+DISEASE_ASSOCIATED_SITES_COLUMNS = [
+    'DISEASE', 'ALTERATION', 'GENE', 'PROTEIN', 'ACC_ID', 'GENE_ID', 'HU_CHR_LOC', 'ORGANISM', 'MOD_RSD',
+    'SITE_GRP_ID', 'SITE_+/-7_AA', 'DOMAIN', 'PMIDs', 'LT_LIT', 'MS_LIT', 'MS_CST', 'CST_CAT#', 'NOTES',
+]
+
+_functions = ['activity', 'protein degradation', 'protein stabilization', 'intracellular localization']
+_processes = ['apoptosis', 'cell growth', 'transcription', 'cell motility', 'autophagy']
+_directions = ['induced', 'inhibited', 'altered']
+_diseases = ['breast cancer', 'Alzheimer\'s disease', 'leukemia', 'diabetes mellitus', 'melanoma']
+_alterations = ['increased', 'decreased']
+
+_amino_acids = 'ACDEFGHIKLMNPQRSTVWY'
+
+_preamble = [
+    'Synthetic PhosphoSitePlus data',
+    'Generated by bio2bel_phosphosite.synthetic',
+]
+
+
+def write_modification_site_file(path: str,
+                                 n_proteins: int = 1000,
+                                 sites_per_protein: int = 10,
+                                 species: Iterable[str] = ('human', 'mouse', 'rat'),
+                                 code: str = 'p',
+                                 seed: int = 0,
+                                 ) -> str:
+    """Write a gzipped TSV shaped like a PhosphoSitePlus modification site data set.
+
+    :param path: The path to write. Should end with ``.gz``.
+    :param n_proteins: The number of proteins per species
+    :param sites_per_protein: The number of modified sites on each protein
+    :param species: The names of the species to put in the ``ORGANISM`` column
+    :param code: The modification code to use as the suffix of ``MOD_RSD`` (e.g., ``p`` for phosphorylation)
+    :param seed: The seed for the random number generator
+    :return: The path that was written
+    """
+    rng = random.Random(seed)
+    residues = _code_to_residues[code]
+
+    with gzip.open(path, 'wt') as file:
+        for line in _preamble:
+            print(line, file=file)
+        print(*MODIFICATION_SITE_COLUMNS, sep='\t', file=file)
+
+        site_group_id = 0
+        for species_index, organism_name in enumerate(species):
+            for protein_index in range(n_proteins):
+                gene_name = f'GENE{protein_index}'
+                uniprot_id = f'Q{species_index}{protein_index:06d}'
+                positions = sorted(rng.sample(range(1, 10 * sites_per_protein + 100), sites_per_protein))
+
+                for position in positions:
+                    site_group_id += 1
+                    print(
+                        gene_name,
+                        f'Protein {protein_index}',
+                        uniprot_id,
+                        '1p36.1',
+                        f'{rng.choice(residues)}{position}-{code}',
+                        site_group_id,
+                        organism_name,
+                        50.0,
+                        '',
+                        'AAAAAAAsAAAAAAA',
+                        '',
+                        rng.randint(1, 10),
+                        '',
+                        '',
+                        sep='\t',
+                        file=file,
+                    )
+
+    return path
+
+
+def _sample_effects(names, rng: random.Random) -> str:
+    """Make a semicolon-separated list of effects, sometimes without a direction, or none at all."""
+    effects = [
+        name if rng.random() < 0.1 else f'{name}, {rng.choice(_directions)}'
+        for name in rng.sample(names, rng.randint(0, 2))
+    ]
+    return '; '.join(effects)
+
+
+def write_regulatory_sites_file(path: str, n_proteins: int = 1000, sites_per_protein: int = 2, seed: int = 0) -> str:
+    """Write a gzipped TSV shaped like the PhosphoSitePlus regulatory sites data set.
+
+    The UniProt identifiers match the human proteins made by :func:`write_modification_site_file`.
+
+    :param path: The path to write. Should end with ``.gz``.
+    :param n_proteins: The number of proteins
+    :param sites_per_protein: The number of regulatory sites on each protein
+    :param seed: The seed for the random number generator
+    :return: The path that was written
+    """
+    rng = random.Random(seed)
+
+    with gzip.open(path, 'wt') as file:
+        for line in _preamble:
+            print(line, file=file)
+        print(*REGULATORY_SITES_COLUMNS, sep='\t', file=file)
+
+        for protein_index in range(n_proteins):
+            for position in sorted(rng.sample(range(1, 10 * sites_per_protein + 100), sites_per_protein)):
+                print(
+                    f'GENE{protein_index}',
+                    f'Protein {protein_index}',
+                    'Kinase',
+                    f'Q0{protein_index:06d}',
+                    protein_index,
+                    '1p36.1',
+                    'human',
+                    f'{rng.choice(_code_to_residues["p"])}{position}-p',
+                    rng.randint(1, 999999),
+                    'AAAAAAAsAAAAAAA',
+                    '',
+                    _sample_effects(_functions, rng),
+                    _sample_effects(_processes, rng),
+                    '',
+                    '',
+                    '; '.join(str(rng.randint(1000000, 30000000)) for _ in range(rng.randint(1, 3))),
+                    rng.randint(1, 10),
+                    rng.randint(0, 100),
+                    '',
+                    '',
+                    sep='\t',
+                    file=file,
+                )
+
+    return path
+
+
+def write_disease_associated_sites_file(path: str,
+                                        n_proteins: int = 1000,
+                                        sites_per_protein: int = 1,
+                                        seed: int = 0,
+                                        ) -> str:
+    """Write a gzipped TSV shaped like the PhosphoSitePlus disease-associated sites data set.
+
+    The UniProt identifiers match the human proteins made by :func:`write_modification_site_file`.
+
+    :param path: The path to write. Should end with ``.gz``.
+    :param n_proteins: The number of proteins
+    :param sites_per_protein: The number of disease-associated sites on each protein
+    :param seed: The seed for the random number generator
+    :return: The path that was written
+    """
+    rng = random.Random(seed)
+
+    with gzip.open(path, 'wt') as file:
+        for line in _preamble:
+            print(line, file=file)
+        print(*DISEASE_ASSOCIATED_SITES_COLUMNS, sep='\t', file=file)
+
+        for protein_index in range(n_proteins):
+            for position in sorted(rng.sample(range(1, 10 * sites_per_protein + 100), sites_per_protein)):
+                print(
+                    rng.choice(_diseases),
+                    rng.choice(_alterations),
+                    f'GENE{protein_index}',
+                    f'Protein {protein_index}',
+                    f'Q0{protein_index:06d}',
+                    protein_index,
+                    '1p36.1',
+                    'human',
+                    f'{rng.choice(_code_to_residues["p"])}{position}-p',
+                    rng.randint(1, 999999),
+                    'AAAAAAAsAAAAAAA',
+                    '',
+                    rng.randint(1000000, 30000000),
+                    rng.randint(1, 10),
+                    rng.randint(0, 100),
+                    '',
+                    '',
+                    '',
+                    sep='\t',
+                    file=file,
+                )
+
+    return path
+
+
+_xml_declaration = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_main_namespace = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_relationships_namespace = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_package_relationships_namespace = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_content_type_prefix = 'application/vnd.openxmlformats-officedocument.spreadsheetml'
+
+_content_types = (
+    f'{_xml_declaration}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    f'<Override PartName="/xl/workbook.xml" ContentType="{_content_type_prefix}.sheet.main+xml"/>'
+    f'<Override PartName="/xl/worksheets/sheet1.xml" ContentType="{_content_type_prefix}.worksheet+xml"/>'
+    f'<Override PartName="/xl/worksheets/sheet2.xml" ContentType="{_content_type_prefix}.worksheet+xml"/>'
+    f'<Override PartName="/xl/sharedStrings.xml" ContentType="{_content_type_prefix}.sharedStrings+xml"/>'
+    '</Types>'
+)
+
+_package_relationships = (
+    f'{_xml_declaration}<Relationships xmlns="{_package_relationships_namespace}">'
+    f'<Relationship Id="rId1" Type="{_relationships_namespace}/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_workbook = (
+    f'{_xml_declaration}<workbook xmlns="{_main_namespace}" xmlns:r="{_relationships_namespace}"><sheets>'
+    '<sheet name="Legend" sheetId="1" r:id="rId1"/>'
+    '<sheet name="PTMVar" sheetId="2" r:id="rId2"/>'
+    '</sheets></workbook>'
+)
+
+_workbook_relationships = (
+    f'{_xml_declaration}<Relationships xmlns="{_package_relationships_namespace}">'
+    f'<Relationship Id="rId1" Type="{_relationships_namespace}/worksheet" Target="worksheets/sheet1.xml"/>'
+    f'<Relationship Id="rId2" Type="{_relationships_namespace}/worksheet" Target="worksheets/sheet2.xml"/>'
+    f'<Relationship Id="rId3" Type="{_relationships_namespace}/sharedStrings" Target="sharedStrings.xml"/>'
+    '</Relationships>'
+)
+
+_worksheet_start = f'{_xml_declaration}<worksheet xmlns="{_main_namespace}"><sheetData>'
+_worksheet_end = '</sheetData></worksheet>'
+
+
+def _column_letters(index: int) -> str:
+    """Convert a zero-based column index to letters, like 27 to ``AB``."""
+    rv = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        rv = chr(ord('A') + remainder) + rv
+    return rv
+
+
+class _SheetWriter:
+    """Writes rows of a worksheet with its text in a table of shared strings."""
+
+    def __init__(self, file, shared_strings: Mapping[str, int]):
+        self.file = file
+        self.shared_strings = shared_strings
+        self.row_number = 0
+        self.file.write(_worksheet_start.encode('utf-8'))
+
+    def write_row(self, values: Iterable) -> None:
+        self.row_number += 1
+        cells = []
+        for column, value in enumerate(values):
+            reference = f'{_column_letters(column)}{self.row_number}'
+            if value is None or value == '':
+                continue
+            elif isinstance(value, (int, float)):
+                cells.append(f'<c r="{reference}"><v>{value}</v></c>')
+            else:
+                index = self.shared_strings.setdefault(value, len(self.shared_strings))
+                cells.append(f'<c r="{reference}" t="s"><v>{index}</v></c>')
+        self.file.write(f'<row r="{self.row_number}">{"".join(cells)}</row>'.encode('utf-8'))
+
+    def close(self) -> None:
+        self.file.write(_worksheet_end.encode('utf-8'))
+
+
+def _iter_ptmvar_rows(n_proteins: int, variants_per_protein: int, rng: random.Random):
+    """Generate the data rows of a synthetic PTMVar sheet."""
+    for protein_index in range(n_proteins):
+        uniprot_id = f'Q0{protein_index:06d}'
+        for _ in range(variants_per_protein):
+            modification_type = rng.choice(sorted(_ptmvar_type_to_residues))
+            modification_residue = rng.choice(_ptmvar_type_to_residues[modification_type])
+            modification_position = rng.randint(10, 1000)
+            var_position = rng.randint(-5, 5)
+            mutation_position = modification_position + var_position
+            from_aa = modification_residue if var_position == 0 else rng.choice(_amino_acids)
+            to_aa = rng.choice(_amino_acids.replace(from_aa, ''))
+
+            yield [
+                f'GENE{protein_index}',
+                uniprot_id,
+                '1p36.1',
+                f'VAR_{rng.randint(1, 999999):06d}',
+                f'rs{rng.randint(1, 99999999)}',
+                f'{from_aa}{mutation_position}{to_aa}',
+                from_aa,
+                mutation_position,
+                to_aa,
+                rng.choice(['Polymorphism', 'Disease', 'Unclassified']),
+                '',
+                'HUMSAVAR',
+                f'Protein {protein_index}',
+                uniprot_id,
+                modification_position,
+                modification_residue,
+                'HMR',
+                modification_type,
+                rng.randint(1, 999999),
+                'AAAAAsAAAAA',
+                f"'{var_position}",
+                'AAAAAsAAAAA',
+                'CLASS I' if var_position == 0 else 'CLASS II',
+                rng.randint(0, 5),
+                rng.randint(0, 50),
+                rng.randint(0, 50),
+            ]
+
+
+def write_ptmvar_file(path: str, n_proteins: int = 1000, variants_per_protein: int = 3, seed: int = 0) -> str:
+    """Write a zipped workbook shaped like the PTMVar download.
+
+    The UniProt identifiers match the human proteins made by :func:`write_modification_site_file`. Like the real
+    workbook, the first sheet is a legend and the second has six lines of preamble before the header.
+
+    :param path: The path to write. Should end with ``.xlsx.zip``.
+    :param n_proteins: The number of proteins
+    :param variants_per_protein: The number of variants on each protein
+    :param seed: The seed for the random number generator
+    :return: The path that was written
+    """
+    rng = random.Random(seed)
+    shared_strings = {}
+
+    workbook = io.BytesIO()
+    with zipfile.ZipFile(workbook, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _content_types)
+        archive.writestr('_rels/.rels', _package_relationships)
+        archive.writestr('xl/workbook.xml', _workbook)
+        archive.writestr('xl/_rels/workbook.xml.rels', _workbook_relationships)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as file:
+            legend = _SheetWriter(file, shared_strings)
+            legend.write_row(['COLUMN', 'HEADER', 'DESCRIPTION'])
+            for column, name in enumerate(PTMVAR_COLUMNS):
+                legend.write_row([_column_letters(column), name, 'Synthetic'])
+            legend.close()
+
+        with archive.open('xl/worksheets/sheet2.xml', 'w') as file:
+            sheet = _SheetWriter(file, shared_strings)
+            for line in _preamble:
+                sheet.write_row([line])
+            for _ in range(6 - len(_preamble)):
+                sheet.write_row([])
+            sheet.write_row(PTMVAR_COLUMNS)
+            for row in _iter_ptmvar_rows(n_proteins, variants_per_protein, rng):
+                sheet.write_row(row)
+            sheet.close()
+
+        with archive.open('xl/sharedStrings.xml', 'w') as file:
+            file.write(
+                f'{_xml_declaration}<sst xmlns="{_main_namespace}" '
+                f'count="{len(shared_strings)}" uniqueCount="{len(shared_strings)}">'.encode('utf-8')
+            )
+            for string in shared_strings:
+                file.write(f'<si><t>{escape(string)}</t></si>'.encode('utf-8'))
+            file.write(b'</sst>')
+
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('PTMVar.xlsx', workbook.getvalue())
+
+    return path
+
+
+def write_synthetic_release(directory: str,
+                            n_proteins: int = 1000,
+                            sites_per_protein: int = 10,
+                            variants_per_protein: int = 3,
+                            ) -> Mapping[str, str]:
+    """Write a synthetic file for every data set to the directory, like a whole PhosphoSitePlus release.
+
+    :param directory: The directory to write to
+    :param n_proteins: The number of proteins per species in each modification site file, and the number of human
+     proteins in the other files
+    :param sites_per_protein: The number of sites per protein in each modification site file
+    :param variants_per_protein: The number of variants per protein in the PTMVar workbook
+    :return: The keyword arguments for :meth:`bio2bel_phosphosite.Manager.populate` that load the files
+    """
+    rv = {
+        f'{name}_url': write_modification_site_file(
+            os.path.join(directory, f'{name}.gz'),
+            n_proteins=n_proteins,
+            sites_per_protein=sites_per_protein,
+            code=code,
+            seed=seed,
+        )
+        for seed, (name, code) in enumerate(MODIFICATION_SITE_DATASET_CODES.items())
+    }
+    rv['ptmvar_url'] = write_ptmvar_file(
+        os.path.join(directory, 'PTMVar.xlsx.zip'),
+        n_proteins=n_proteins,
+        variants_per_protein=variants_per_protein,
+    )
+    rv['regulatory_sites_url'] = write_regulatory_sites_file(
+        os.path.join(directory, 'Regulatory_sites.gz'),
+        n_proteins=n_proteins,
+    )
+    rv['disease_associated_sites_url'] = write_disease_associated_sites_file(
+        os.path.join(directory, 'Disease-associated_sites.gz'),
+        n_proteins=n_proteins,
+    )
+    return rv
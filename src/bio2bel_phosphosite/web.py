@@ -1,16 +1,19 @@
 # -*- coding: utf-8 -*-
 
-"""This module builds a :mod:`Flask` application for interacting with the underlying database. When installing,
-use the web extra like:
+"""This module builds a :mod:`Flask` application for interacting with the underlying database. The admin interface is
+mounted at ``/`` and the read-only JSON API from :mod:`bio2bel_phosphosite.api` at ``/api``. When installing, use the
+web extra like:
 
 .. source-code:: sh
 
     pip install bio2bel_phosphosite[web]
 """
 
+from bio2bel_phosphosite.api import QueryService, get_blueprint
 from bio2bel_phosphosite.manager import Manager
 
 if __name__ == '__main__':
     manager = Manager()
     app_ = manager.get_flask_admin_app()
+    app_.register_blueprint(get_blueprint(QueryService(manager)))
     app_.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`bio2bel_phosphosite`."""
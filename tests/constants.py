@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""Test cases that load synthetic releases into temporary databases."""
+
+import logging
+import os
+import tempfile
+from typing import List, Mapping, Tuple
+
+from bio2bel.testing import TemporaryConnectionMethodMixin
+from bio2bel_phosphosite import Manager
+from bio2bel_phosphosite.models import Modification, ModificationType, Protein
+from bio2bel_phosphosite.synthetic import write_synthetic_release
+
+__all__ = [
+    'SyntheticReleaseTestCase',
+    'get_sites',
+]
+
+logging.getLogger('bio2bel_phosphosite').setLevel(logging.ERROR)
+
+
+def get_sites(manager: Manager) -> List[Tuple[str, str, int, str]]:
+    """Get the stored modifications as sorted tuples that don't depend on the database identifiers."""
+    query = manager.session.query(
+        Protein.uniprot_id,
+        Modification.residue,
+        Modification.position,
+        ModificationType.name,
+    )
+    return sorted(query.join(Modification.protein).join(Modification.modification_type))
+
+
+class SyntheticReleaseTestCase(TemporaryConnectionMethodMixin):
+    """A test case with a manager on a temporary SQLite database and a synthetic release in a temporary directory.
+
+    The keyword arguments for :meth:`bio2bel_phosphosite.Manager.populate` that load the release are in ``urls``.
+    """
+
+    #: The number of proteins per species in the release that's written for each test
+    n_proteins = 20
+
+    #: If true, the release is populated before each test
+    populate = False
+
+    def setUp(self):
+        """Create the manager and the directory, write the release, and populate it if the test case asks to."""
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.manager = self.make_manager(self.connection)
+        self.urls = self.write_release('release', n_proteins=self.n_proteins)
+        if self.populate:
+            self.manager.populate(**self.urls)
+
+    def tearDown(self):
+        """Close the manager and remove the directory."""
+        self.close_manager(self.manager)
+        self.directory.cleanup()
+        super().tearDown()
+
+    def make_manager(self, connection: str) -> Manager:
+        """Make a manager whose tables are created."""
+        manager = Manager(connection=connection)
+        manager.create_all()
+        return manager
+
+    @staticmethod
+    def close_manager(manager: Manager) -> None:
+        """Close the session and the connections of a manager."""
+        manager.session.close()
+        manager.engine.dispose()
+
+    def make_other_manager(self, name: str = 'other') -> Manager:
+        """Make another manager on its own database in the directory, which is closed when the test is done."""
+        manager = self.make_manager('sqlite:///' + os.path.join(self.directory.name, f'{name}.db'))
+        self.addCleanup(self.close_manager, manager)
+        return manager
+
+    def write_release(self, name: str, n_proteins: int = 20) -> Mapping[str, str]:
+        """Write a small synthetic release to its own subdirectory.
+
+        :return: The keyword arguments for :meth:`bio2bel_phosphosite.Manager.populate` that load it
+        """
+        directory = os.path.join(self.directory.name, name)
+        os.makedirs(directory)
+        return write_synthetic_release(directory, n_proteins=n_proteins, sites_per_protein=5, variants_per_protein=2)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for building BEL edges from the site annotations."""
+
+import unittest
+
+from pybel import BELGraph
+from pybel.constants import CITATION, CITATION_REFERENCE, OBJECT
+from pybel.dsl import activity, bioprocess, pathology
+
+from bio2bel_phosphosite.bel import (
+    PHOSPHOSITE_NAMESPACE, add_disease_association, add_regulatory_effect, modification_to_bel, protein_to_bel,
+)
+
+
+class TestSiteAnnotations(unittest.TestCase):
+    """Tests for the edges of regulatory effects and disease associations."""
+
+    def setUp(self):
+        """Make an empty graph."""
+        self.graph = BELGraph()
+        self.modification = modification_to_bel('P12345', 'Ph', 'S', 10)
+
+    def get_edges(self):
+        """Get the target, citation, and object modifier of each edge from the modification."""
+        return sorted(
+            (v.as_bel(), data[CITATION][CITATION_REFERENCE], str(data.get(OBJECT)))
+            for u, v, data in self.graph.edges(data=True)
+            if u == self.modification
+        )
+
+    def test_function(self):
+        """Test that an effect on a function goes to the activity of the protein, with one edge per citation."""
+        keys = add_regulatory_effect(self.graph, 'P12345', 'Ph', 'S', 10, 'function', 'protein degradation',
+                                     'induced', '123; 456')
+
+        self.assertEqual(2, len(keys))
+        modifier = str(activity(name='protein degradation', namespace=PHOSPHOSITE_NAMESPACE))
+        target = protein_to_bel('P12345').as_bel()
+        self.assertEqual([(target, '123', modifier), (target, '456', modifier)], self.get_edges())
+
+    def test_process(self):
+        """Test that an effect on a process goes to a biological process, with one edge per citation."""
+        add_regulatory_effect(self.graph, 'P12345', 'Ph', 'S', 10, 'process', 'apoptosis', 'inhibited', '123')
+
+        target = bioprocess(namespace=PHOSPHOSITE_NAMESPACE, name='apoptosis').as_bel()
+        self.assertEqual([(target, '123', 'None')], self.get_edges())
+
+    def test_disease(self):
+        """Test that a disease association has one edge per citation."""
+        add_disease_association(self.graph, 'P12345', 'Ph', 'S', 10, 'cancer', 'increased', '456;123;')
+
+        target = pathology(namespace=PHOSPHOSITE_NAMESPACE, name='cancer').as_bel()
+        self.assertEqual([(target, '123', 'None'), (target, '456', 'None')], self.get_edges())
+
+    def test_without_citations(self):
+        """Test that effects and associations without PubMed identifiers aren't added."""
+        self.assertEqual([], add_regulatory_effect(self.graph, 'P12345', 'Ph', 'S', 10, 'process', 'apoptosis',
+                                                   None, None))
+        self.assertEqual([], add_disease_association(self.graph, 'P12345', 'Ph', 'S', 10, 'cancer', None, ''))
+        self.assertEqual(0, self.graph.number_of_edges())
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for building BEL in worker processes."""
+
+from bio2bel_phosphosite.filters import SiteFilter
+from bio2bel_phosphosite.parallel import get_protein_id_ranges
+from tests.constants import SyntheticReleaseTestCase
+
+
+class TestEmptyParallel(SyntheticReleaseTestCase):
+    """Tests for building BEL in parallel from a database without proteins."""
+
+    def test_protein_id_ranges(self):
+        """Test that there are no partitions without proteins."""
+        self.assertEqual([], get_protein_id_ranges(self.manager, 4))
+
+    def test_to_bel(self):
+        """Test that the graph is empty, like the one built in this process."""
+        graph = self.manager.to_bel(parallel=True, max_workers=2)
+        self.assertEqual(0, graph.number_of_nodes())
+        self.assertEqual(self.manager.to_bel().number_of_edges(), graph.number_of_edges())
+
+
+class TestParallel(SyntheticReleaseTestCase):
+    """Tests for building BEL in parallel from a populated database."""
+
+    n_proteins = 10
+    populate = True
+
+    def assert_same_graph(self, expected, graph):
+        """Assert that two graphs have the same nodes and edges."""
+        self.assertEqual(set(expected), set(graph))
+        self.assertEqual(set(expected.edges(keys=True)), set(graph.edges(keys=True)))
+
+    def test_to_bel(self):
+        """Test that the graph is the same as the one built in this process."""
+        self.assertLess(0, self.manager.to_bel().number_of_edges())
+        self.assert_same_graph(self.manager.to_bel(), self.manager.to_bel(parallel=True, max_workers=2))
+
+    def test_filter_without_proteins(self):
+        """Test that a filter that keeps no proteins gives an empty graph, like the one built in this process."""
+        self.assertEqual([], get_protein_id_ranges(self.manager, 4, SiteFilter.from_values(uniprot_ids='nope')))
+
+        graph = self.manager.to_bel(uniprot_ids='nope', parallel=True, max_workers=2)
+        self.assertEqual(0, graph.number_of_nodes())
+        self.assert_same_graph(self.manager.to_bel(uniprot_ids='nope'), graph)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for populating the database."""
+
+import io
+from unittest import mock
+
+import pybel
+
+from bio2bel_phosphosite.models import Modification, Protein
+from tests.constants import SyntheticReleaseTestCase, get_sites
+
+
+def _get_graph_key(graph):
+    return set(graph), set(graph.edges(keys=True))
+
+
+class TestPopulate(SyntheticReleaseTestCase):
+    """Tests for the ways of populating the database giving the same result."""
+
+    def test_orm_matches_bulk(self):
+        """Test that populating with ORM objects stores the same as populating with bulk inserts."""
+        self.manager.populate(**self.urls, bulk=True)
+
+        orm_manager = self.make_other_manager('orm')
+        orm_manager.populate(**self.urls, bulk=False)
+
+        self.assertEqual(self.manager.summarize(), orm_manager.summarize())
+        self.assertEqual(get_sites(self.manager), get_sites(orm_manager))
+        self.assertEqual(_get_graph_key(self.manager.to_bel()), _get_graph_key(orm_manager.to_bel()))
+
+    def test_loaders(self):
+        """Test that the native SQLite loader stores the same as the default one and puts the journal mode back."""
+        self.manager.populate(**self.urls)
+
+        native_manager = self.make_other_manager('native')
+        native_manager.populate(**self.urls, loader='native')
+
+        self.assertEqual(self.manager.summarize(), native_manager.summarize())
+        self.assertEqual(get_sites(self.manager), get_sites(native_manager))
+        self.assertEqual('delete', native_manager.engine.execute('PRAGMA journal_mode').scalar())
+
+    def test_failed_load(self):
+        """Test that the native SQLite loader rolls back a load that fails instead of committing part of it."""
+        write_df = self.manager._write_df
+
+        def fail_on_modifications(model, *args, **kwargs):
+            if model is Modification:
+                raise RuntimeError('failed to write the modifications')
+            return write_df(model, *args, **kwargs)
+
+        with mock.patch.object(self.manager, '_write_df', side_effect=fail_on_modifications):
+            with self.assertRaises(RuntimeError):
+                self.manager.populate(**self.urls, loader='native')
+
+        # the proteins were written before the modifications failed
+        self.assertEqual(0, self.manager.session.query(Protein).count())
+        self.assertEqual('delete', self.manager.engine.execute('PRAGMA journal_mode').scalar())
+
+    def test_populate_twice(self):
+        """Test that populating again after dropping the tables works with the same manager."""
+        self.manager.populate(**self.urls)
+        summary = self.manager.summarize()
+
+        self.manager.drop_all()
+        self.manager.create_all()
+        self.manager.populate(**self.urls)
+
+        self.assertEqual(summary, self.manager.summarize())
+
+
+class TestFilteredPopulate(SyntheticReleaseTestCase):
+    """Tests for populating and exporting part of a release."""
+
+    populate = True
+
+    def test_filtered_populate(self):
+        """Test that populating part of a release gives the same graph as exporting that part of all of it."""
+        for filters in (dict(species='human', modification_types=['Ph']), dict(species='mouse')):
+            with self.subTest(**filters):
+                filtered_manager = self.make_other_manager('-'.join(map(str, filters.values())))
+                filtered_manager.populate(**self.urls, **filters)
+
+                graph = filtered_manager.to_bel()
+                self.assertLess(0, graph.number_of_edges())
+                self.assertEqual(_get_graph_key(self.manager.to_bel(**filters)), _get_graph_key(graph))
+
+    def test_filtered_export(self):
+        """Test that only the proteins a filter keeps are exported, and that streaming it matches the graph."""
+        graph = self.manager.to_bel(species='human', modification_types='Ph')
+        self.assertLess(0, graph.number_of_edges())
+        self.assertLess(graph.number_of_edges(), self.manager.to_bel().number_of_edges())
+
+        expected = io.StringIO()
+        pybel.to_csv(graph, expected)
+        streamed = io.StringIO()
+        self.manager.write_bel(streamed, fmt='tsv', species='human', modification_types='Ph')
+
+        self.assertEqual(sorted(expected.getvalue().splitlines()), sorted(streamed.getvalue().splitlines()))
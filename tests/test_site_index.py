@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the in-memory index of sites."""
+
+import unittest
+
+import pandas as pd
+
+from bio2bel_phosphosite.site_index import ModificationSite, SiteArray
+
+
+def _make_site_array(rows) -> SiteArray:
+    return SiteArray(ModificationSite, pd.DataFrame(rows, columns=ModificationSite._fields))
+
+
+class TestSiteArray(unittest.TestCase):
+    """Tests for :class:`bio2bel_phosphosite.site_index.SiteArray`."""
+
+    def setUp(self):
+        """Index a few sites on two proteins."""
+        self.sites = _make_site_array([
+            (1, 'P12345', 'S', 10, 'Ph'),
+            (2, 'P12345', 'T', 15, 'Ph'),
+            (3, 'Q67890', 'Y', 12, 'Ph'),
+        ])
+
+    def test_nearest_batch(self):
+        """Test that the batch matches finding the nearest site of each probe on its own."""
+        probes = [('P12345', 1), ('P12345', 12), ('P12345', 13), ('P12345', 100), ('Q67890', 12), ('A00000', 5)]
+        df = self.sites.nearest_batch(probes)
+
+        self.assertEqual([0, 1, 2, 3, 4], df.probe.tolist())
+        for probe, site_id, distance in zip(df.probe, df.id, df.distance):
+            site, expected_distance = self.sites.nearest(*probes[probe])
+            self.assertEqual(site.id, site_id)
+            self.assertEqual(expected_distance, abs(distance))
+
+    def test_out_of_range(self):
+        """Test that probes outside of the indexed positions find the closest site on their own protein."""
+        probes = [('P12345', -5), ('P12345', 2 ** 40), ('Q67890', 2 ** 40)]
+        df = self.sites.nearest_batch(probes)
+
+        self.assertEqual([1, 2, 3], df.id.tolist())
+        for probe, site_id in zip(df.probe, df.id):
+            site, _ = self.sites.nearest(*probes[probe])
+            self.assertEqual(site.id, site_id)
+
+    def test_negative_radius(self):
+        """Test that a negative radius is rejected instead of finding nothing."""
+        with self.assertRaises(ValueError):
+            self.sites.within('P12345', 10, radius=-1)
+        with self.assertRaises(ValueError):
+            self.sites.within_batch([('P12345', 10)], radius=-1)
+
+    def test_empty(self):
+        """Test that an index without sites finds nothing instead of failing."""
+        sites = _make_site_array([])
+        probes = [('P12345', 10), ('Q67890', 1)]
+
+        self.assertEqual(0, len(sites))
+        self.assertIsNone(sites.nearest('P12345', 10))
+        self.assertEqual([], sites.within('P12345', 10, radius=5))
+        self.assertEqual(0, len(sites.within_batch(probes, radius=5).index))
+
+        df = sites.nearest_batch(probes)
+        self.assertEqual(0, len(df.index))
+        self.assertEqual(['probe', 'distance', *ModificationSite._fields], df.columns.tolist())
+
+    def test_no_probes(self):
+        """Test that a batch without probes finds nothing."""
+        self.assertEqual(0, len(self.sites.nearest_batch([]).index))
+        self.assertEqual(0, len(_make_site_array([]).nearest_batch([]).index))
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for read-only snapshots."""
+
+import os
+
+from bio2bel_phosphosite.models import Mutation, Protein
+from bio2bel_phosphosite.snapshot import Snapshot
+from tests.constants import SyntheticReleaseTestCase
+
+
+class TestSnapshot(SyntheticReleaseTestCase):
+    """Tests for writing a snapshot and loading it back."""
+
+    def write_and_load(self) -> Snapshot:
+        """Write a snapshot of the database and load it."""
+        path = os.path.join(self.directory.name, 'phosphosite.snapshot')
+        self.assertLess(0, self.manager.write_snapshot(path))
+        return Snapshot.load(path)
+
+    def test_round_trip(self):
+        """Test that the snapshot has the same proteins, sites, and statistics as the database."""
+        self.manager.populate(**self.urls)
+        snapshot = self.write_and_load()
+
+        self.assertTrue(snapshot.is_populated())
+        self.assertEqual(self.manager.summarize(), snapshot.summarize())
+
+        for protein in self.manager.session.query(Protein):
+            with self.subTest(uniprot_id=protein.uniprot_id):
+                record = snapshot.get_protein_by_uniprot_id(protein.uniprot_id)
+                self.assertEqual(protein.gene_name, record.gene_name)
+                self.assertEqual(protein.species.name if protein.species else None, record.species)
+
+                modifications = sorted(
+                    (modification.residue, modification.position, modification.modification_type.name)
+                    for modification in protein.modifications
+                )
+                self.assertEqual(modifications, sorted(
+                    (site.residue, site.position, site.modification_type)
+                    for site in snapshot.get_modifications(protein.uniprot_id)
+                ))
+                for residue, position, modification_type in modifications:
+                    self.assertIsNotNone(snapshot.get_modification(protein.uniprot_id, residue, position,
+                                                                   modification_type))
+
+                mutations = sorted(
+                    (mutation.from_aa, mutation.position, mutation.to_aa)
+                    for mutation in self.manager.session.query(Mutation).filter(Mutation.protein_id == protein.id)
+                )
+                self.assertEqual(mutations, sorted(
+                    (site.from_aa, site.position, site.to_aa)
+                    for site in snapshot.get_mutations(protein.uniprot_id)
+                ))
+
+        self.assertIsNone(snapshot.get_protein_by_uniprot_id('nope'))
+        self.assertEqual([], snapshot.get_modifications('nope'))
+
+    def test_empty(self):
+        """Test that a snapshot of an empty database can be written, loaded, and queried."""
+        snapshot = self.write_and_load()
+
+        self.assertFalse(snapshot.is_populated())
+        self.assertEqual(0, snapshot.count_modifications())
+        self.assertIsNone(snapshot.get_protein_by_uniprot_id('P12345'))
+        self.assertEqual([], snapshot.get_modifications('P12345'))
+        self.assertEqual(0, len(snapshot.site_index.modifications.nearest_batch([('P12345', 10)]).index))
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the import time of the package and its command line interface."""
+
+import unittest
+
+from bio2bel_phosphosite.benchmark import benchmark_startup
+
+
+class TestStartup(unittest.TestCase):
+    """Tests for :func:`bio2bel_phosphosite.benchmark.benchmark_startup`."""
+
+    def test_budgets(self):
+        """Test that the imports stay within their budgets and don't import the deferred modules."""
+        results = benchmark_startup(repeats=3)
+        self.assertEqual([], results['violations'])
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the stored statistics."""
+
+from bio2bel_phosphosite.models import Statistic
+from tests.constants import SyntheticReleaseTestCase
+
+
+class TestStatistics(SyntheticReleaseTestCase):
+    """Tests for :attr:`bio2bel_phosphosite.Manager.statistics`."""
+
+    populate = True
+
+    def test_missing(self):
+        """Test that missing statistics are counted for reading without being stored."""
+        summary = self.manager.summarize()
+        self.manager.session.query(Statistic).delete()
+        self.manager.session.commit()
+        self.manager._statistics = None
+
+        self.assertEqual(summary, self.manager.summarize())
+        self.assertTrue(self.manager.is_populated())
+        self.assertFalse(self.manager.session.new or self.manager.session.dirty)
+        self.assertEqual(0, self.manager.session.query(Statistic).count())
+
+        self.manager.refresh_statistics()
+        self.assertLess(0, self.manager.session.query(Statistic).count())
+        self.assertEqual(summary, self.manager.summarize())
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for updating a database from a new release."""
+
+from tests.constants import SyntheticReleaseTestCase, get_sites
+
+
+class TestUpdate(SyntheticReleaseTestCase):
+    """Tests for :meth:`bio2bel_phosphosite.Manager.update`."""
+
+    def test_update_matches_populate(self):
+        """Test that populating then updating with the same manager gives the same database as a fresh populate."""
+        new_urls = self.write_release('new', n_proteins=25)
+
+        self.manager.populate(**self.urls)
+        old_sites = set(get_sites(self.manager))
+        self.manager.update(**new_urls)
+
+        fresh_manager = self.make_other_manager()
+        fresh_manager.populate(**new_urls)
+        new_sites = set(get_sites(fresh_manager))
+
+        # the releases have to differ both ways for the update to have sites to add and to remove
+        self.assertTrue(new_sites - old_sites)
+        self.assertTrue(old_sites - new_sites)
+
+        self.assertEqual(fresh_manager.summarize(), self.manager.summarize())
+        self.assertEqual(sorted(new_sites), get_sites(self.manager))
+
+    def test_update_unchanged(self):
+        """Test that updating from the release that was populated changes nothing."""
+        self.manager.populate(**self.urls)
+        summary = self.manager.summarize()
+        sites = get_sites(self.manager)
+
+        self.manager.update(**self.urls)
+
+        self.assertEqual(summary, self.manager.summarize())
+        self.assertEqual(sites, get_sites(self.manager))
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the streaming reader of worksheets."""
+
+import io
+import unittest
+import zipfile
+
+from bio2bel_phosphosite.parsers.xlsx import iter_xlsx_rows
+
+_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_RELATIONSHIP = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+_WORKBOOK = (
+    f'<workbook xmlns="{_MAIN}" xmlns:r="{_RELATIONSHIP}">'
+    '<sheets><sheet name="data" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELATIONSHIPS = (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_RELATIONSHIP}/worksheet" Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _make_workbook(rows: str) -> io.BytesIO:
+    """Make a workbook with one worksheet whose ``sheetData`` has the given rows."""
+    rv = io.BytesIO()
+    with zipfile.ZipFile(rv, 'w') as archive:
+        archive.writestr('xl/workbook.xml', _WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELATIONSHIPS)
+        archive.writestr(
+            'xl/worksheets/sheet1.xml',
+            f'<worksheet xmlns="{_MAIN}"><sheetData>{rows}</sheetData></worksheet>',
+        )
+    rv.seek(0)
+    return rv
+
+
+class TestIterRows(unittest.TestCase):
+    """Tests for :func:`bio2bel_phosphosite.parsers.xlsx.iter_xlsx_rows`."""
+
+    def test_references(self):
+        """Test that cells are placed by their references, skipping the columns that aren't requested."""
+        workbook = _make_workbook(
+            '<row r="2"><c r="A2"><v>1</v></c><c r="C2" t="inlineStr"><is><t>x</t></is></c></row>'
+        )
+        self.assertEqual([(2, {0: 1, 2: 'x'})], list(iter_xlsx_rows(workbook)))
+        workbook.seek(0)
+        self.assertEqual([(2, {2: 'x'})], list(iter_xlsx_rows(workbook, columns=[2])))
+
+    def test_without_references(self):
+        """Test that rows and cells without references follow the ones before them."""
+        workbook = _make_workbook(
+            '<row><c><v>1</v></c><c><v>2</v></c></row>'
+            '<row r="5"><c r="B5"><v>3</v></c><c><v>4</v></c></row>'
+            '<row><c><v>5</v></c></row>'
+        )
+        self.assertEqual(
+            [(1, {0: 1, 1: 2}), (5, {1: 3, 2: 4}), (6, {0: 5})],
+            list(iter_xlsx_rows(workbook)),
+        )